@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processamento em lote: um manifesto com vários condomínios numa execução só.
+
+Manifesto CSV (com cabeçalho) ou JSON (lista de objetos, ou um objeto por linha):
+    condominium_id,vendor,contatos_path,inad_path
+    123,superlogica,/dados/123/contatos.pdf,/dados/123/inad.pdf
+    456,condomob,/dados/456/relatorio.pdf,
+
+Os jobs vão para o mesmo pool pré-forkado do extract_worker e cada condomínio
+sai como uma linha JSON assim que termina (ordem de conclusão, não do manifesto):
+    {"condominium_id": "123", "vendor": "superlogica", "ok": true, "layouts": ..., "totais": ..., "data": [...]}
+    {"condominium_id": "456", "vendor": "condomob", "ok": false, "erro": "..."}
+
+Com --store (ou EXTRACT_STORE) os contatos de cada condomínio ficam gravados
+(ver contact_store); uma linha sem contatos_path vira "só casamento": a lista
+de inadimplentes é cruzada com os últimos contatos gravados do condomínio.
+    123,superlogica,,/dados/123/inad-2024-06.pdf
+Com --diff cada condomínio sai só com os contatos das unidades que entraram na
+lista desde a anterior dele, mais novos/quitados/persistentes.
+
+Um PDF ruim (arquivo faltando, scan sem texto, exceção no parser, worker que
+morre) vira uma linha com ok=false; o lote segue.
+
+    python3 scripts/batch_extract.py manifesto.csv --workers 8 > resultados.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from multiprocessing.connection import wait
+from typing import Dict, Iterator, List, Optional
+
+import contact_store
+import ocr
+import pdf_io
+import timings
+import unit_match
+from extract_worker import MATCH_VENDORS, VENDORS, WorkerPool, handle
+
+MANIFEST_FIELDS = ("condominium_id", "vendor", "contatos_path", "inad_path")
+
+
+# ------------------ manifesto ------------------
+def _read_json_rows(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    try:
+        rows = json.loads(raw)
+    except ValueError:
+        # JSON Lines; linha que não é JSON vira None (erro só dela, em read_manifest)
+        return [_json_or_none(line) for line in raw.splitlines() if line.strip()]
+    if isinstance(rows, dict):
+        rows = rows.get("jobs") or [rows]
+    if not isinstance(rows, list):
+        raise ValueError("esperado lista de objetos")
+    return rows
+
+
+def _json_or_none(line: str):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _read_csv_rows(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        return list(csv.DictReader(f, dialect=dialect))
+
+
+def read_manifest(path: str) -> List[Dict]:
+    if path.lower().endswith((".json", ".jsonl", ".ndjson")):
+        rows = _read_json_rows(path)
+    else:
+        rows = _read_csv_rows(path)
+
+    return [_manifest_row(row) for row in rows]
+
+
+def _manifest_row(row) -> Dict:
+    """
+    Linha com os MANIFEST_FIELDS. Linha que não é objeto, ou com campo que não
+    é texto, sai com "erro" (vira resposta ok=false em manifest_jobs).
+    """
+    if not isinstance(row, dict):
+        rec = dict.fromkeys(MANIFEST_FIELDS, "")
+        rec["erro"] = "Linha do manifesto não é um objeto JSON."
+        return rec
+    row = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    rec = {k: row.get(k) or "" for k in MANIFEST_FIELDS}
+    if isinstance(rec["condominium_id"], int) and not isinstance(rec["condominium_id"], bool):
+        rec["condominium_id"] = str(rec["condominium_id"])
+    bad = [k for k in MANIFEST_FIELDS if not isinstance(rec[k], str)]
+    if bad:
+        for k in bad:
+            rec[k] = ""
+        rec["erro"] = f"Campo do manifesto não é texto: {', '.join(bad)}"
+    return rec
+
+
+def _path_error(vendor: str, contatos: str, inad: str) -> Optional[str]:
+    """Quantos PDFs cada vendor recebe: Condomob um só; os outros dois, ou só a lista (só casamento)."""
+    if vendor == "condomob":
+        if bool(contatos) == bool(inad):
+            return "Condomob recebe exatamente um PDF (contatos_path ou inad_path)."
+        return None
+    if not inad:
+        return "Falta inad_path (sem ele não há o que cruzar com os contatos)."
+    return None
+
+
+def _row_error(vendor: str, args: List[str], row: Dict) -> Optional[str]:
+    if vendor not in VENDORS:
+        return f"Vendor desconhecido: {vendor!r}"
+    if not args:
+        return "Manifesto sem caminho de PDF."
+    erro = _path_error(vendor, row["contatos_path"], row["inad_path"])
+    missing = [p for p in args if not os.path.isfile(p)]
+    if not erro and missing:
+        erro = f"Arquivo não encontrado: {', '.join(missing)}"
+    return erro
+
+
+def manifest_jobs(rows: List[Dict], diff: bool = False) -> Iterator[Dict]:
+    """
+    Jobs no formato do worker. Linhas inválidas saem já como resposta de erro
+    (chave "resp") para não ocupar worker.
+
+    O id do job é a linha do manifesto (o mesmo condomínio pode aparecer com
+    vendors diferentes); o condomínio vai em "condominium_id".
+    """
+    for i, row in enumerate(rows):
+        job_id = f"linha-{i + 1}"
+        cid = str(row["condominium_id"] or job_id)
+        vendor = (row["vendor"] or "").lower()
+        args = [p for p in (row["contatos_path"], row["inad_path"]) if p]
+        match_only = bool(row["inad_path"] and not row["contatos_path"] and vendor in MATCH_VENDORS)
+
+        erro = row.get("erro") or _row_error(vendor, args, row)
+
+        job = {"id": job_id, "condominium_id": cid, "vendor": vendor, "args": args}
+        if row["condominium_id"]:
+            job["condominio"] = cid
+        if match_only:
+            job["match_only"] = True
+        if diff and vendor in MATCH_VENDORS:
+            job["diff"] = True
+        if erro:
+            job["resp"] = {"id": job_id, "ok": False, "erro": erro}
+        yield job
+
+
+# ------------------ saída ------------------
+def batch_line(resp: Dict, condominium_id: str, vendor: str) -> Dict:
+    line = {"condominium_id": condominium_id, "vendor": vendor}
+    if not resp.get("ok"):
+        line.update(ok=False, erro=resp.get("erro"))
+        return line
+
+    result = resp.get("result")
+    if isinstance(result, list):
+        # condomob devolve a lista direto
+        result = {"data": result}
+    line["ok"] = "erro" not in result
+    line.update(result)
+    return line
+
+
+def _emit(out, line: Dict):
+    out.write(json.dumps(line, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run_batch(rows: List[Dict], workers: int, out=sys.stdout,
+              max_jobs: int = 0, max_rss_mb: float = 0, diff: bool = False) -> Dict:
+    labels = {}
+    summary = {"total": 0, "ok": 0, "erro": 0}
+
+    def emit(resp):
+        line = batch_line(resp, *labels.get(resp.get("id"), ("", "")))
+        summary["total"] += 1
+        summary["ok" if line["ok"] else "erro"] += 1
+        _emit(out, line)
+
+    jobs = []
+    for job in manifest_jobs(rows, diff):
+        labels[job["id"]] = (job["condominium_id"], job["vendor"])
+        if "resp" in job:
+            emit(job["resp"])
+        else:
+            jobs.append(job)
+
+    if workers <= 0:
+        for job in jobs:
+            emit(handle(job))
+        return summary
+
+    pool = WorkerPool(min(workers, max(1, len(jobs))), max_jobs, max_rss_mb)
+    try:
+        for job in jobs:
+            pool.submit(job)
+        while pool.pending():
+            for resp in pool.collect(wait(pool.connections())):
+                emit(resp)
+    finally:
+        pool.close()
+    return summary
+
+
+# ------------------ main ------------------
+def main():
+    ap = argparse.ArgumentParser(description="Extração em lote a partir de um manifesto.")
+    ap.add_argument("manifest", help="CSV ou JSON com condominium_id, vendor, contatos_path, inad_path")
+    ap.add_argument("--out", help="arquivo JSON Lines de saída (padrão: stdout)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="processos no pool (0 = serial no próprio processo)")
+    ap.add_argument("--max-jobs", type=int, default=0,
+                    help="recicla o worker após N jobs (0 = sem limite)")
+    ap.add_argument("--max-rss-mb", type=float, default=0,
+                    help="recicla o worker quando o RSS passar de N MB (0 = sem limite)")
+    ap.add_argument("--cache-dir",
+                    help="cache de texto extraído (padrão: $EXTRACT_CACHE_DIR)")
+    ap.add_argument("--cache-max-mb", type=float, default=512,
+                    help="tamanho máximo do cache antes de despejar (LRU)")
+    ap.add_argument("--jobs", type=int,
+                    help="processos na extração por página (PDFs grandes)")
+    ap.add_argument("--layout", choices=pdf_io.LAYOUTS,
+                    help='"rows" refaz linhas e células das tabelas pela geometria das palavras (ou EXTRACT_LAYOUT)')
+    ap.add_argument("--inad-fast", action="store_true",
+                    help="da lista de inadimplentes extrai só a coluna das unidades (ou EXTRACT_INAD_FAST=1)")
+    ap.add_argument("--approx-units", action="store_true",
+                    help="casa também unidades grafadas diferente nos dois PDFs, pelos componentes "
+                         "(ou EXTRACT_UNIT_APPROX=1)")
+    ap.add_argument("--list-unmatched", action="store_true",
+                    help='inclui "sem_contato": unidades em débito sem contato (ou EXTRACT_LIST_UNMATCHED=1)')
+    ap.add_argument("--ocr", action="store_true",
+                    help="PDF escaneado (sem texto): OCR local com tesseract (ou EXTRACT_OCR=1)")
+    ap.add_argument("--ocr-dpi", type=int, help="resolução da renderização para o OCR (padrão 300)")
+    ap.add_argument("--concurrent", action="store_true",
+                    help="processa contatos e inadimplentes em processos separados (ou EXTRACT_CONCURRENT=1)")
+    ap.add_argument("--store", help="banco SQLite dos contatos parseados (ou EXTRACT_STORE)")
+    ap.add_argument("--diff", action="store_true",
+                    help="só os contatos novos desde a lista anterior de cada condomínio (precisa do store)")
+    ap.add_argument("--timings", action="store_true",
+                    help="inclui tempos por etapa em debug (ou EXTRACT_TIMINGS=1)")
+    opts = ap.parse_args()
+
+    if opts.jobs:
+        pdf_io.set_jobs(opts.jobs)
+    if opts.layout:
+        pdf_io.set_layout(opts.layout)
+    if opts.inad_fast:
+        pdf_io.set_inad_fast(True)
+    if opts.concurrent:
+        pdf_io.set_concurrent(True)
+    if opts.approx_units:
+        unit_match.set_approx(True)
+    if opts.list_unmatched:
+        unit_match.set_list_unmatched(True)
+    if opts.ocr:
+        ocr.set_enabled(True)
+    if opts.ocr_dpi:
+        ocr.set_dpi(opts.ocr_dpi)
+    if opts.cache_dir:
+        pdf_io.set_cache(pdf_io.TextCache(opts.cache_dir, int(opts.cache_max_mb * 1024 * 1024)))
+    if opts.store:
+        contact_store.set_path(opts.store)
+    if opts.timings:
+        timings.set_enabled(True)
+
+    try:
+        rows = read_manifest(opts.manifest)
+    except (OSError, ValueError) as e:
+        print(json.dumps({"erro": f"Manifesto inválido: {e}"}, ensure_ascii=False))
+        sys.exit(2)
+
+    out = open(opts.out, "w", encoding="utf-8") if opts.out else sys.stdout
+    try:
+        summary = run_batch(rows, opts.workers, out, opts.max_jobs, opts.max_rss_mb, opts.diff)
+    finally:
+        if opts.out:
+            out.close()
+
+    print(json.dumps({"lote": summary}, ensure_ascii=False), file=sys.stderr)
+    sys.exit(1 if summary["erro"] and not summary["ok"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark adversarial dos parsers de bloco da Superlógica.
+
+Gera textos patológicos (página enorme sem marcador, linha única gigante,
+milhares de linhas em branco, corridas de zeros/dígitos, marcadores quase
+válidos) e roda os parsers que segmentam o documento em blocos. Cada caso
+tem orçamento de tempo por MB de texto; estourou, sai com código 1.
+
+    python3 scripts/bench/bench_segment.py [--mb 1] [--budget 2.0] [--legacy]
+
+--legacy roda também as regex antigas (corpo preguiçoso em DOTALL com
+lookahead) num recorte pequeno do mesmo texto, só para comparação: nelas o
+tempo cresce com o quadrado do tamanho e o MB inteiro não termina.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import superlogica_extract as sl  # noqa: E402
+from text_doc import TextDoc  # noqa: E402
+
+MB = 1 << 20
+
+NAMES = ("JOSE", "MARIA", "ANA", "SOUZA", "LIMA", "SÁ", "JOÃO", "PEDRO")
+
+
+# ------------------ textos patológicos ------------------
+def _fill(size: int, piece) -> str:
+    parts = []
+    n = 0
+    while n < size:
+        p = piece()
+        parts.append(p)
+        n += len(p)
+    return "".join(parts)[:size]
+
+
+def sem_marcadores(size: int, rnd: random.Random) -> str:
+    return _fill(size, lambda: " ".join(rnd.choice(NAMES) for _ in range(8)) + "\n")
+
+
+def linha_unica(size: int, rnd: random.Random) -> str:
+    # sem nenhum "\n": nome, telefone e e-mail colados sem fim
+    return _fill(size, lambda: f"{rnd.choice(NAMES)} 98 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)} ")
+
+
+def linhas_em_branco(size: int, rnd: random.Random) -> str:
+    # um marcador e depois só linhas vazias/espaços: ^\s* do lookahead relia tudo
+    return "0101 01 JOSE\n101 BL 01\n0101 - ANA\n" + _fill(size, lambda: " \n" if rnd.random() < 0.5 else "\n")
+
+
+def corridas_de_digitos(size: int, rnd: random.Random) -> str:
+    # zeros/dígitos longos e pares "1 1" sem letra depois (quase marcadores)
+    return _fill(size, lambda: rnd.choice(("0" * 4096 + " ", "1 " * 512, "9" * 2048 + "\n", "12 34 \n")))
+
+
+def quase_marcadores(size: int, rnd: random.Random) -> str:
+    return _fill(size, lambda: rnd.choice((
+        f"{rnd.randint(1, 99999)} {rnd.randint(1, 999)} ",
+        f"{rnd.randint(1, 99999)} BL",
+        f"{rnd.randint(1000, 9999)}",
+        "\n",
+    )))
+
+
+def colado_valido(size: int, rnd: random.Random) -> str:
+    # muitas unidades válidas por linha (o caso bom, para ver a vazão)
+    def unit():
+        nome = " ".join(rnd.choice(NAMES) for _ in range(3))
+        sep = "\n" if rnd.random() < 0.2 else " "
+        return f"{rnd.randint(101, 908)} {rnd.randint(1, 12)} {nome} 98 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}{sep}"
+    return _fill(size, unit)
+
+
+CASES = (
+    ("sem_marcadores", sem_marcadores),
+    ("linha_unica", linha_unica),
+    ("linhas_em_branco", linhas_em_branco),
+    ("corridas_de_digitos", corridas_de_digitos),
+    ("quase_marcadores", quase_marcadores),
+    ("colado_valido", colado_valido),
+)
+
+PARSERS = (
+    ("apbl_sem_rotulo", sl.parse_contatos_apbl_sem_rotulo),
+    ("inad_apbl_sem_rotulo", sl.parse_inad_apbl_sem_rotulo),
+    ("ap_sem_bloco", sl.parse_contatos_ap_sem_bloco),
+    ("apbl_num_bl", sl.parse_contatos_apbl_num_bl),
+)
+
+
+# ------------------ regex antigas (referência) ------------------
+LEGACY = (
+    ("apbl_sem_rotulo", re.compile(
+        r"^0*(\d{1,5})\s+0*(\d{1,3})\s+(.+?)(?=^\s*0*\d{1,5}\s+0*\d{1,3}\s+|\Z)", re.M | re.S)),
+    ("ap_sem_bloco", re.compile(r"(?m)^\s*(0*\d{4})\s*(.*?)(?=^\s*0*\d{4}\b|\Z)", re.S)),
+    ("apbl_num_bl", re.compile(
+        r"(?m)^\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b\s*(.*?)(?=^\s*0*\d{1,5}\s+BL\s*0*\d{1,3}\b|\Z)", re.S)),
+)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark adversarial dos segmentadores de bloco.")
+    ap.add_argument("--mb", type=float, default=1.0, help="tamanho de cada texto em MB")
+    ap.add_argument("--budget", type=float, default=2.0, help="segundos por MB de texto, por parser")
+    ap.add_argument("--legacy", action="store_true", help="compara com as regex antigas")
+    ap.add_argument("--legacy-kb", type=int, default=16, help="recorte (KB) usado nas regex antigas")
+    ap.add_argument("--seed", type=int, default=1)
+    opts = ap.parse_args()
+
+    size = int(opts.mb * MB)
+    failed = 0
+    for case, gen in CASES:
+        doc = TextDoc.from_text(gen(size, random.Random(f"{opts.seed}:{case}")))
+        mb = len(doc.text) / MB
+        doc.upper  # a visão em maiúsculas é cache do TextDoc, fora da medição
+        for name, fn in PARSERS:
+            dt = timed(fn, doc)
+            per_mb = dt / mb if mb else 0.0
+            ok = per_mb <= opts.budget
+            failed += not ok
+            print(f"{case:20s} {name:28s} {mb:6.2f} MB {dt:7.3f} s {per_mb:7.3f} s/MB  {'ok' if ok else 'ESTOUROU'}")
+
+        if opts.legacy:
+            cut = doc.text[:opts.legacy_kb * 1024]
+            for name, rx in LEGACY:
+                dt = timed(rx.findall, cut)
+                label = f"(antiga) {name}"
+                print(f"{case:20s} {label:28s} {len(cut) / MB:6.2f} MB {dt:7.3f} s"
+                      f" {dt / (len(cut) / MB):7.3f} s/MB")
+
+    print(f"orçamento {opts.budget} s/MB: {'ok' if not failed else f'{failed} caso(s) estouraram'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
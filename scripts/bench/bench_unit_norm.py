@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark da normalização de unidades.
+
+Compara, sobre a mesma lista de unidades (com repetição, como nos relatórios),
+a função sem memo (regex pré-compiladas) e a versão com lru_cache.
+
+    python3 scripts/bench/bench_unit_norm.py [--units 5000] [--repeat 6]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unit_norm  # noqa: E402
+
+
+def superlogica_units(n: int, rnd: random.Random):
+    forms = (
+        lambda: f"AP {rnd.randint(1, 1800):04d} BL {rnd.randint(1, 12):02d}",
+        lambda: f"{rnd.randint(1, 12)}-{rnd.randint(101, 1804)}",
+        lambda: f"Apartamento {rnd.randint(101, 1804)} Bloco {rnd.randint(1, 12)}",
+        lambda: f"{rnd.randint(101, 1804)}BL{rnd.randint(1, 12):02d}",
+        lambda: f"CASA {rnd.randint(1, 400):03d} QUADRA {rnd.choice('ABCDEF')}",
+        lambda: f"LOTE {rnd.randint(1, 60)} QD {rnd.randint(1, 30):02d}",
+    )
+    return [rnd.choice(forms)() for _ in range(n)]
+
+
+def brcondominios_units(n: int, rnd: random.Random):
+    forms = (
+        lambda: f"BL {rnd.choice(['I', 'II', 'III', 'IV', 'V'])} {rnd.randint(1, 120)}",
+        lambda: f"{rnd.choice(['AR', 'BA', 'BALI'])} {rnd.randint(101, 1804)}",
+    )
+    return [rnd.choice(forms)() for _ in range(n)]
+
+
+def timed(fn, units):
+    t0 = time.perf_counter()
+    for u in units:
+        fn(u)
+    return time.perf_counter() - t0
+
+
+def bench(name, units, cached, uncached):
+    cached.cache_clear()
+    t_raw = timed(uncached, units)
+    t_memo = timed(cached, units)
+    info = cached.cache_info()
+    n = len(units)
+    print(
+        f"{name:14s} {n:8d} chamadas  sem memo {t_raw * 1e6 / n:6.2f} us/un"
+        f"  com memo {t_memo * 1e6 / n:6.2f} us/un  ({t_raw / t_memo:4.1f}x,"
+        f" hits {info.hits}, únicas {info.currsize})"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de normalize_unidade.")
+    ap.add_argument("--units", type=int, default=5000, help="unidades distintas geradas")
+    ap.add_argument("--repeat", type=int, default=6,
+                    help="vezes que cada unidade aparece (contatos, inad, join...)")
+    ap.add_argument("--seed", type=int, default=1)
+    opts = ap.parse_args()
+
+    rnd = random.Random(opts.seed)
+    for name, gen, cached in (
+        ("superlogica", superlogica_units, unit_norm._normalize_superlogica),
+        ("brcondominios", brcondominios_units, unit_norm._normalize_brcondominios),
+    ):
+        units = gen(opts.units, rnd) * opts.repeat
+        rnd.shuffle(units)
+        bench(name, units, cached, cached.__wrapped__)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de PDFs sintéticos para benchmark dos extratores.
+
+Um par (contatos, inadimplentes) por layout do Superlógica que o detect_layout
+conhece, os dois formatos de unidade do BRCondomínios (antigo "BL I 05" e novo
+"AR1001") e o Condomob ("B01AP101"), em qualquer quantidade de unidades.
+A geração é determinística (seed + layout + tamanho) e reaproveita arquivos já
+gerados no diretório de saída.
+
+    python3 scripts/bench/corpus.py /tmp/bench-corpus --sizes 50,500,5000
+
+Formatos que não comportam N unidades distintas (AP_SEM_BLOCO usa 4 dígitos,
+o BRCondomínios antigo usa bloco romano + 3 dígitos) repetem unidades depois
+do limite; os demais geram N unidades únicas.
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+SUPERLOGICA_LAYOUTS = (
+    "AP_BLOCO_PALAVRA",
+    "APBL_NAO_ROTULADO",
+    "APBL_ROTULADO",
+    "AP_SEM_BLOCO",
+    "APBL_NUM_BL",
+    "CASA",
+    "CASA_QD",
+    "LT",
+    "QD_LT",
+)
+BRCONDOMINIOS_LAYOUTS = ("BR_ANTIGO", "BR_NOVO")
+CONDOMOB_LAYOUTS = ("CONDOMOB",)
+
+DEFAULT_SIZES = (50, 500, 5000, 50000)
+
+# fração de unidades que aparece no relatório de inadimplentes
+INAD_RATE = 0.4
+
+LINES_PER_PAGE = 55
+LINE_HEIGHT = 13
+FONT_SIZE = 8
+
+_NOMES = ("JOSE", "MARIA", "ANA", "JOÃO", "PEDRO", "LUCIA", "CARLOS", "SÁ", "SOUZA", "LIMA")
+_ROMANOS = ("I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X")
+
+
+# ------------------ dados falsos ------------------
+def _phone(rnd: random.Random) -> str:
+    n = "9" + "".join(rnd.choice("0123456789") for _ in range(8))
+    fmt = rnd.choice(("({d}) {a}-{b}", "{d} {a}-{b}", "{d}{n}", "{a}-{b}", "+55 {d} {n}"))
+    return fmt.format(d=rnd.choice(("98", "11", "21")), a=n[:5], b=n[5:], n=n)
+
+
+def _name(rnd: random.Random) -> str:
+    return " ".join(rnd.choice(_NOMES) for _ in range(rnd.randint(2, 4)))
+
+
+def _email(rnd: random.Random, nome: str) -> str:
+    user = nome.split()[0].lower().replace("ã", "a").replace("á", "a")
+    return f"{user}{rnd.randint(1, 99)}@mail.com"
+
+
+def _quadra(q: int) -> str:
+    # A..Z, depois A1..Z1, A2...
+    return chr(65 + q % 26) + (str(q // 26) if q >= 26 else "")
+
+
+# ------------------ PDF ------------------
+def write_pdf(path: str, lines: List[str]):
+    doc = fitz.open()
+    for i in range(0, len(lines), LINES_PER_PAGE):
+        page = doc.new_page()
+        page.insert_text(
+            (30, 30),
+            "\n".join(lines[i:i + LINES_PER_PAGE]),
+            fontsize=FONT_SIZE,
+            fontname="helv",
+            lineheight=LINE_HEIGHT / FONT_SIZE,
+        )
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+# ------------------ Superlógica ------------------
+def superlogica_lines(layout: str, n: int, rnd: random.Random) -> Tuple[List[str], List[str]]:
+    cont = ["CONTATOS DAS UNIDADES", "Unidade Nome/Telefone Tipo do contato"]
+    inad = ["RELATORIO DE INADIMPLENCIA"]
+
+    for k in range(n):
+        # 101..908: com 4 dígitos o detect_layout leria AP_SEM_BLOCO
+        ap = 101 + (k % 8) + 100 * ((k // 8) % 9)
+        bl = 1 + k // 72
+        nome, ph = _name(rnd), _phone(rnd)
+        em = _email(rnd, nome)
+        deve = rnd.random() < INAD_RATE
+
+        if layout == "AP_BLOCO_PALAVRA":
+            cont += [f"{ap} BLOCO {bl:02d}", nome, f"{ph} {em}", rnd.choice(("Proprietário", "PROPRIETARIO"))]
+            if deve:
+                inad.append(f"{ap} BLOCO {bl:02d} - {nome} 1.234,56")
+        elif layout == "APBL_NAO_ROTULADO":
+            cont += [f"{ap:04d} {bl:02d} {nome} PROPRIETARIO", f"{ph}  {em}"]
+            if deve:
+                inad.append(f"{ap} {bl} - {nome} 300,00")
+        elif layout == "APBL_ROTULADO":
+            cont += [f"AP {ap} BL {bl} - {nome}", ph, em]
+            if deve:
+                inad.append(f"{ap} BL {bl} - {nome} BLOCO AP")
+        elif layout == "AP_SEM_BLOCO":
+            ap4 = 1000 + k % 9000
+            cont += [f"{ap4} - {nome}", "Proprietário", ph, em]
+            if deve:
+                inad.append(f"{ap4:04d} - {nome} 10,00")
+        elif layout == "APBL_NUM_BL":
+            cont += [f"{ap} BL {bl:02d}", "PROPRIETARIO", nome, ph, em]
+            if deve:
+                inad.append(f"{ap} BL {bl} - {nome}")
+        elif layout == "CASA":
+            cont += [f"CASA {k + 1:02d} - {nome} PROPRIETÁRIO", ph, em]
+            if deve:
+                inad.append(f"CASA {k + 1} - {nome}")
+        elif layout == "CASA_QD":
+            casa, qd = k % 20 + 1, k // 20 + 1
+            cont += [f"CASA {casa:02d}", f"QUADRA {qd:02d}", "Proprietário", nome, f"{ph} {em}"]
+            if deve:
+                inad.append(f"CASA {casa:02d} QUADRA {qd:02d} - {nome}")
+        elif layout == "LT":
+            cont.append(f"LOTE {k + 1:02d} {nome} {ph} {em}")
+            if deve:
+                inad.append(f"LOTE {k + 1:02d} - {nome}")
+        elif layout == "QD_LT":
+            qd, lt = _quadra(k // 30), k % 30 + 1
+            cont.append(f"QD {qd} LOTE {lt} {nome} {ph} {em}")
+            if deve:
+                inad.append(f"LOTE {lt:02d} QUADRA {qd} - {nome}")
+        else:
+            raise ValueError(f"layout desconhecido: {layout}")
+
+    cont.append(f"TOTAL DE CONTATOS: {n}")
+    return cont, inad
+
+
+# ------------------ BRCondomínios ------------------
+def brcondominios_lines(layout: str, n: int, rnd: random.Random) -> Tuple[List[str], List[str]]:
+    cont = ["RELATORIO UNIDADES EXPANDIDAS"]
+    deb = ["LISTA DE DEBITOS"]
+
+    for k in range(n):
+        if layout == "BR_ANTIGO":
+            unidade = f"BL {_ROMANOS[(k // 999) % len(_ROMANOS)]} {k % 999 + 1}"
+        else:
+            unidade = f"{('AR', 'BA', 'BALI')[k % 3]}{100 + k}"
+
+        cont.append(f"Unidade: {unidade} Local: Torre")
+        for tipo in ("Proprietário", "Inquilino"):
+            nome = _name(rnd)
+            cont += [
+                f"Pessoa: {nome}",
+                f"Tp. Pessoa: {tipo}",
+                f"Telefone: {_phone(rnd)}",
+                f"Telefone: Comercial: Celular: {_phone(rnd)} Whats:",
+                f"Email: {_email(rnd, nome)}",
+            ]
+        if rnd.random() < INAD_RATE:
+            deb.append(f"{unidade} 12/2025 123,45")
+
+    return cont, deb
+
+
+# ------------------ Condomob ------------------
+def condomob_lines(n: int, rnd: random.Random) -> List[str]:
+    lines = ["CONDOMOB RELATORIO"]
+    for k in range(n):
+        nome = _name(rnd)
+        unidade = f"B{k // 1000 + 1:02d}AP{k % 1000:03d}"
+        lines.append(
+            f"{unidade} Proprietário: {nome} (123.456.789-0{k % 10}) "
+            f"{_phone(rnd)}; {_email(rnd, nome)} Inquilino: X Pagador: Y"
+        )
+        lines.append("Tipo Ordinária 100,00")
+    return lines
+
+
+# ------------------ corpus ------------------
+def _rnd(seed: int, layout: str, n: int) -> random.Random:
+    return random.Random(f"{seed}:{layout}:{n}")
+
+
+def generate_case(out_dir: str, layout: str, n: int, seed: int = 7) -> Dict:
+    """
+    Gera (se ainda não existir) um caso e devolve sua descrição:
+    {"vendor", "layout", "units", "args": [pdfs...]}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{layout.lower()}_{n}")
+    rnd = _rnd(seed, layout, n)
+
+    if layout in SUPERLOGICA_LAYOUTS:
+        vendor = "superlogica"
+        args = [base + "_contatos.pdf", base + "_inad.pdf"]
+        if not all(os.path.exists(p) for p in args):
+            cont, inad = superlogica_lines(layout, n, rnd)
+            write_pdf(args[0], cont)
+            write_pdf(args[1], inad)
+    elif layout in BRCONDOMINIOS_LAYOUTS:
+        vendor = "brcondominios"
+        args = [base + "_contatos.pdf", base + "_debitos.pdf"]
+        if not all(os.path.exists(p) for p in args):
+            cont, deb = brcondominios_lines(layout, n, rnd)
+            write_pdf(args[0], cont)
+            write_pdf(args[1], deb)
+    elif layout in CONDOMOB_LAYOUTS:
+        vendor = "condomob"
+        args = [base + ".pdf"]
+        if not os.path.exists(args[0]):
+            write_pdf(args[0], condomob_lines(n, rnd))
+    else:
+        raise ValueError(f"layout desconhecido: {layout}")
+
+    return {"vendor": vendor, "layout": layout, "units": n, "args": args}
+
+
+def all_layouts() -> Tuple[str, ...]:
+    return SUPERLOGICA_LAYOUTS + BRCONDOMINIOS_LAYOUTS + CONDOMOB_LAYOUTS
+
+
+def parse_list(value: str, cast=str) -> list:
+    return [cast(x) for x in value.split(",") if x.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera PDFs sintéticos para benchmark.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="quantidades de unidades, separadas por vírgula")
+    ap.add_argument("--layouts", default=",".join(all_layouts()),
+                    help="layouts a gerar, separados por vírgula")
+    ap.add_argument("--seed", type=int, default=7)
+    opts = ap.parse_args()
+
+    for layout in parse_list(opts.layouts):
+        for n in parse_list(opts.sizes, int):
+            case = generate_case(opts.out_dir, layout, n, opts.seed)
+            print(f"{layout:18s} {n:6d}  " + " ".join(case["args"]))
+
+
+if __name__ == "__main__":
+    main()
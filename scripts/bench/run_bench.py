@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos extratores sobre o corpus sintético (corpus.py).
+
+Cada caso roda num processo novo (`python3 scripts/<vendor>_extract.py ... --timings`),
+então o pico de RSS é só daquele caso. Para cada extrator/layout/tamanho sai:
+páginas/s, unidades/s, tempo total e pico de memória, além do layout detectado
+(para pegar regressão de detecção junto com a de desempenho).
+
+    python3 scripts/bench/run_bench.py --corpus /tmp/bench-corpus --sizes 50,500,5000
+    python3 scripts/bench/run_bench.py --json resultados.json   # baseline para comparar depois
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import corpus
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = {
+    "superlogica": "superlogica_extract.py",
+    "brcondominios": "brcondominios_extract.py",
+    "condomob": "condomob_extract.py",
+}
+
+
+def run_case(case: dict, extra_args=(), python=sys.executable) -> dict:
+    script = os.path.join(SCRIPTS_DIR, SCRIPTS[case["vendor"]])
+    cmd = [python, script, *case["args"], "--timings", *extra_args]
+
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+
+    row = {
+        "vendor": case["vendor"],
+        "layout": case["layout"],
+        "units": case["units"],
+        "wall_s": round(wall, 3),
+    }
+    try:
+        out = json.loads(proc.stdout)
+    except ValueError:
+        row["erro"] = (proc.stderr or proc.stdout).strip()[-500:]
+        return row
+
+    debug = out.get("debug") or {}
+    pages = debug.get("paginas") or 0
+    if isinstance(pages, dict):
+        pages = sum(pages.values())
+    total_s = (debug.get("timings") or {}).get("total", 0) / 1000
+
+    if isinstance(out.get("layouts"), dict):
+        row["detectado"] = out["layouts"].get("contatos")
+    if out.get("erro"):
+        row["erro"] = out["erro"]
+
+    row.update({
+        "paginas": pages,
+        "run_s": round(total_s, 3),
+        "paginas_s": round(pages / total_s, 1) if total_s else None,
+        "unidades_s": round(case["units"] / total_s, 1) if total_s else None,
+        "peak_rss_mb": debug.get("peak_rss_mb"),
+        "saida": len(out.get("data") or []),
+    })
+    return row
+
+
+def print_row(row: dict):
+    if "paginas" not in row:
+        print(f"{row['vendor']:13s} {row['layout']:18s} {row['units']:6d}  ERRO {row.get('erro')}")
+        return
+
+    flag = ""
+    if row.get("detectado") and row["vendor"] == "superlogica" and row["detectado"] != row["layout"]:
+        flag = f"  (detectou {row['detectado']})"
+    print(
+        f"{row['vendor']:13s} {row['layout']:18s} {row['units']:6d} un {row['paginas']:5d} pág"
+        f"  {row['run_s']:8.3f} s  {row['paginas_s'] or 0:9.1f} pág/s"
+        f"  {row['unidades_s'] or 0:10.1f} un/s  {row['peak_rss_mb'] or 0:7.1f} MB{flag}"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark dos extratores de PDF.")
+    ap.add_argument("--corpus", default="/tmp/bench-corpus",
+                    help="diretório do corpus (gerado se faltar)")
+    ap.add_argument("--sizes", default=",".join(map(str, corpus.DEFAULT_SIZES)))
+    ap.add_argument("--layouts", default=",".join(corpus.all_layouts()))
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", help="grava os resultados neste arquivo")
+    ap.add_argument("extra", nargs=argparse.REMAINDER,
+                    help="argumentos repassados aos extratores (ex.: -- --jobs 4)")
+    opts = ap.parse_args()
+
+    extra = [a for a in opts.extra if a != "--"]
+    rows = []
+    for layout in corpus.parse_list(opts.layouts):
+        for n in corpus.parse_list(opts.sizes, int):
+            case = corpus.generate_case(opts.corpus, layout, n, opts.seed)
+            row = run_case(case, extra)
+            print_row(row)
+            rows.append(row)
+
+    if opts.json:
+        with open(opts.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
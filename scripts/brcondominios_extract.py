@@ -4,100 +4,45 @@
 import re
 import json
 import sys
-import fitz  # PyMuPDF
+import argparse
+
+import contact_store
+import ndjson_out
+import ocr
+import pdf_io
+from contact_record import Contato
+from contact_scan import BRCONDOMINIOS, scanner
+import timings
+import unit_match
+from pdf_io import Source, pdf_pages
+from text_doc import cell_rows
+# unidades (antigo "BL I 05", novo "AR1001"): regras pré-compiladas + memo
+from unit_norm import normalize_brcondominios as normalize_unidade
+from unit_norm import unit_key_brcondominios as unit_key
+
+VENDOR = "brcondominios"
+CONT_LAYOUT = "BR_UNIDADES_EXPANDIDAS_AUTO"
+INAD_LAYOUT = "BR_LISTA_DEBITOS_AUTO"
 
 # ------------------ leitura PDF ------------------
-def pdf_text(path: str) -> str:
-    doc = fitz.open(path)
-    parts = []
-    for p in doc:
-        parts.append(p.get_text("text"))
-    doc.close()
-    t = "\n".join(parts)
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
-    return t
+def pdf_text(path: Source, pages_fn=pdf_pages) -> str:
+    # páginas já vêm normalizadas (NBSP/espaços) e podem sair do cache
+    # scan sem texto: com --ocr as páginas vazias passam pelo tesseract
+    pages = ocr.fallback(path, pages_fn(path))
+    with timings.stage("normalizacao"):
+        text = "\n".join(pages)
+    timings.count("texto_len", len(text))
+    return text
 
 # ------------------ helpers ------------------
-EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
-
-def uniq(xs):
-    seen = set()
-    out = []
-    for x in xs or []:
-        x = (x or "").strip()
-        if not x or x in seen:
-            continue
-        seen.add(x)
-        out.append(x)
-    return out
-
-# ====== Layout antigo: BL I 05 / BL I 106 ======
-OLD_UNIT_RE = re.compile(r"^(BL)\s+([A-ZIVX]+)\s+(\d{1,3})\b", re.I)
-
-# ====== Layout novo: AR1001 / BA102 / BALI1004 (com ou sem espaço) ======
-NEW_UNIT_RE = re.compile(r"\b([A-Z]{1,10})\s*(\d{1,6})\b")
-
-def normalize_unidade(u: str) -> str:
-    """
-    NÃO altera o que já existia.
-    Apenas adiciona suporte ao novo layout.
-
-    Antigo: "BL I 5" -> "BL I 05"
-    Novo:   "AR 1001" -> "AR1001"
-    """
-    s = (u or "").upper().strip()
-    s = s.replace("\u00A0", " ")
-    s = re.sub(r"[ \t]+", " ", s).strip()
-
-    # --- mantém comportamento antigo ---
-    m = OLD_UNIT_RE.match(s)
-    if m:
-        bl, bloco, num = m.group(1).upper(), m.group(2).upper(), m.group(3)
-        if len(num) == 1:
-            num = "0" + num
-        return f"{bl} {bloco} {num}"
-
-    # --- adiciona comportamento novo ---
-    # só aplica se parecer unidade do novo padrão (letras + dígitos)
-    m2 = NEW_UNIT_RE.search(s)
-    if m2:
-        return f"{m2.group(1).upper()}{m2.group(2)}"
-
-    return s
-
-def normalize_phone(raw: str):
-    raw_str = (raw or "").strip()
-    digits = re.sub(r"\D+", "", raw_str)
-    if not digits:
-        return None
-
-    # 55 + ddd + num
-    if len(digits) in (12, 13) and digits.startswith("55"):
-        rest = digits[2:]
-        if len(rest) in (10, 11):
-            return f"+{digits}"
-        return None
-
-    # BR com DDD
-    if len(digits) == 11:
-        return f"+55{digits}"
-    if len(digits) == 10:
-        return f"+55{digits}"
-
-    # sem DDD (8/9)
-    if len(digits) == 9 and digits.startswith("9"):
-        return digits
-    if len(digits) == 8 and digits[0] in "2345":
-        return digits
-
-    return None
+# telefones só dos campos rotulados, já canônicos (ver contact_scan)
+_contacts = scanner(BRCONDOMINIOS)
 
 # ------------------ PARSER: DÉBITOS ------------------
 # Antigo: "BL I 05 ..."
-DEBITO_OLD_RE = re.compile(r"(?m)^\s*(BL)\s+([A-ZIVX]+)\s+(\d{1,3})\b", re.I)
+DEBITO_OLD_RE = re.compile(r"^\s*(BL)\s+([A-ZIVX]+)\s+(\d{1,3})\b", re.M | re.I)
 # Novo: "AR301 ..." / "BALI1004 ..."
-DEBITO_NEW_RE = re.compile(r"(?m)^\s*([A-Z]{1,10}\s*\d{1,6})\b")
+DEBITO_NEW_RE = re.compile(r"^\s*([A-Z]{1,10}\s*\d{1,6})\b", re.M)
 
 def parse_inadimplentes_debitos(text: str):
     """
@@ -118,6 +63,45 @@ def parse_inadimplentes_debitos(text: str):
 
     return out
 
+def parse_inadimplentes_debitos_rows(text: str):
+    """Layout "rows": a unidade é a primeira célula da linha, sem procurar no resto."""
+    out = set()
+    for cells in cell_rows(text):
+        first = cells[0].upper()
+        m = DEBITO_OLD_RE.match(first)
+        if m:
+            out.add(normalize_unidade(f"{m.group(1)} {m.group(2)} {m.group(3)}"))
+        m = DEBITO_NEW_RE.match(first)
+        if m:
+            out.add(normalize_unidade(m.group(1)))
+    return out
+
+def debitos_parser():
+    if pdf_io.layout() == "rows":
+        return parse_inadimplentes_debitos_rows
+    return parse_inadimplentes_debitos
+
+# só a coluna das unidades da lista de débitos (ver pdf_io.column_pages)
+DEBITO_UNIT_RE = re.compile(f"(?:{DEBITO_OLD_RE.pattern})|(?:{DEBITO_NEW_RE.pattern})", re.M | re.I)
+
+def _debitos_probe(pages):
+    return DEBITO_UNIT_RE if debitos_parser()(pages[-1]) else None
+
+def _debitos_check(full: str, clipped: str) -> bool:
+    parse = debitos_parser()
+    return parse(full) == parse(clipped)
+
+def debitos_column_pages(path: Source):
+    pages = pdf_io.column_pages(path, _debitos_probe, _debitos_check)
+    if pages is None:
+        return pdf_io.fitz_pages(path)
+    return pages
+
+def debitos_pages(path: Source):
+    if not pdf_io.inad_fast():
+        return pdf_pages(path)
+    return pdf_io.cached_pages(path, f"{pdf_io.column_version()}:brcondominios", debitos_column_pages)
+
 # ------------------ PARSER: CONTATOS (Unidades Expandidas) ------------------
 UNIT_SPLIT_RE = re.compile(r"(?m)^\s*Unidade:\s*", re.I)
 
@@ -172,36 +156,17 @@ def parse_person(pb: str):
         tipo = mt.group(1).strip()
 
     # emails (prioriza campo Email:)
-    emails = []
-    for em in EMAIL_FIELD_RE.findall(pb):
-        emails.append(em.strip())
+    emails = [em.strip() for em in EMAIL_FIELD_RE.findall(pb)]
     if not emails:
-        emails = EMAIL_RE.findall(pb)
-    emails = uniq([e.lower() for e in emails])
-
-    phones = []
-
-    # --- método antigo (preservado): pega linhas do tipo "Telefone: 98 9...."
-    for _label, val in PHONE_FIELDS_RE.findall(pb):
-        chunks = re.split(r"[;,/]| e |\s{2,}", val)
-        for c in chunks:
-            p = normalize_phone(c)
-            if p:
-                phones.append(p)
-
-    # --- método novo (adicionado): pega campos encadeados na mesma linha
-    for _label, val in PHONE_KV_INLINE_RE.findall(pb):
-        val = (val or "").strip()
-        if not val:
-            continue
-        chunks = re.split(r"[;,/]| e |\s{2,}", val)
-        for c in chunks:
-            p = normalize_phone(c)
-            if p:
-                phones.append(p)
-
-    phones = uniq(phones)
+        emails = _contacts.emails(pb)
+    emails = [e.lower() for e in emails]
 
+    # campos "Telefone: 98 9...." numa linha própria (antigo) ou encadeados
+    # na mesma linha (novo)
+    phones = _contacts.field_phones(val for _label, val in PHONE_FIELDS_RE.findall(pb))
+    phones += _contacts.field_phones(val for _label, val in PHONE_KV_INLINE_RE.findall(pb))
+
+    # duplicados saem no Contato
     return nome, tipo, phones, emails
 
 def is_owner(tipo: str) -> bool:
@@ -223,57 +188,343 @@ def parse_contatos_unidades(text: str):
             if not is_owner(tipo):
                 continue
 
-            if not (nome or phones or emails):
+            c = Contato(unidade, nome.title() if nome else "")
+            c.add_phones(phones)
+            c.add_emails(emails)
+            if not (nome or c.has_contacts()):
                 continue
 
-            contatos.append({
-                "unidade": unidade,
-                "Nome": nome.title() if nome else "",
-                "Telefone": phones,
-                "Email": emails
-            })
+            contatos.append(c)
 
     return contatos
 
-# ------------------ main ------------------
-def main():
-    if len(sys.argv) < 3:
-        print(json.dumps({"erro": "Uso: python3 brcondominio_extract.py contatos.pdf debitos.pdf"}, ensure_ascii=False))
-        sys.exit(2)
+# ------------------ layout "rows": campos pelas células ------------------
+# "Rótulo:" dentro da célula; o valor vai até o próximo rótulo ou o fim da célula
+FIELD_LABEL_RE = re.compile(r"\b(Tp\.?\s*Pessoa|E-?mail|[A-Za-zÀ-ÿ]+)\s*:\s*")
+PHONE_LABELS = frozenset(("TELEFONE", "CELULAR", "CONTATO", "WHATS", "COMERCIAL"))
 
-    contatos_path = sys.argv[1]
-    debitos_path  = sys.argv[2]
+def row_fields(cells):
+    """
+    [rótulo, valor] de uma linha. Texto sem rótulo vira o valor do rótulo
+    anterior da mesma linha quando ele ficou vazio ("Telefone:" numa célula, o
+    número na seguinte); senão sai com rótulo None.
+    """
+    fields = []
+
+    def put(value):
+        if fields and fields[-1][0] is not None and not fields[-1][1]:
+            fields[-1][1] = value
+        else:
+            fields.append([None, value])
+
+    for cell in cells:
+        pos = 0
+        for m in FIELD_LABEL_RE.finditer(cell):
+            lead = cell[pos:m.start()].strip()
+            if lead:
+                put(lead)
+            fields.append([m.group(1), ""])
+            pos = m.end()
+        rest = cell[pos:].strip()
+        if rest:
+            put(rest)
+    return fields
+
+def _label_key(label: str) -> str:
+    return re.sub(r"[^A-Z]", "", label.upper())
+
+class _Pessoa:
+    __slots__ = ("nome", "tipo", "phones", "emails", "text")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.tipo = None
+        self.phones = []
+        self.emails = []
+        self.text = []
+
+    def contato(self, unidade: str):
+        """Contato do proprietário (mesmas regras de parse_contatos_unidades) ou None."""
+        if not is_owner(self.tipo):
+            return None
+        emails = self.emails or _contacts.emails("\n".join(self.text))
+        c = Contato(unidade, self.nome.title() if self.nome else "")
+        c.add_phones(_contacts.field_phones(self.phones))
+        c.add_emails([e.lower() for e in emails])
+        if not (self.nome or c.has_contacts()):
+            return None
+        return c
+
+def parse_contatos_unidades_rows(text: str):
+    """
+    Layout "rows": cada linha vira campos "Rótulo: valor" lidos célula a célula
+    (Unidade, Pessoa, Tp. Pessoa, telefones, Email), sem os re.split por
+    "Unidade:"/"Pessoa:" nem a segunda passada dos campos encadeados.
+    """
+    contatos = []
+    unidade = None
+    pessoa = None
+
+    def flush():
+        if pessoa is not None:
+            c = pessoa.contato(unidade)
+            if c is not None:
+                contatos.append(c)
+
+    for cells in cell_rows(text):
+        for label, value in row_fields(cells):
+            key = _label_key(label) if label else ""
+            if key == "UNIDADE":
+                flush()
+                pessoa = None
+                unidade = extract_unit_name(value)
+            elif unidade is None:
+                continue
+            elif key == "PESSOA":
+                flush()
+                pessoa = _Pessoa(value)
+            elif pessoa is None:
+                continue
+            elif key == "TPPESSOA":
+                if pessoa.tipo is None:
+                    pessoa.tipo = value
+            elif key in PHONE_LABELS:
+                pessoa.phones.append(value)
+            elif key == "EMAIL" and value:
+                pessoa.emails.append(value.split()[0])
+            if pessoa is not None:
+                # sem campo Email: os e-mails saem de qualquer valor da pessoa
+                pessoa.text.append(value)
+    flush()
+    return contatos
 
-    cont_text = pdf_text(contatos_path)
-    deb_text  = pdf_text(debitos_path)
+def contatos_parser():
+    if pdf_io.layout() == "rows":
+        return parse_contatos_unidades_rows
+    return parse_contatos_unidades
 
-    if len(cont_text.strip()) < 50 or len(deb_text.strip()) < 50:
-        print(json.dumps({
+# ------------------ main ------------------
+def debitos_pipeline(debitos_path: Source):
+    """(tamanho do texto, unidades em débito); unidades None = texto vazio."""
+    with timings.scope("debitos"):
+        deb_text = pdf_text(debitos_path, debitos_pages)
+    if len(deb_text.strip()) < 50:
+        return len(deb_text), None
+    parse = debitos_parser()
+    with timings.scope("debitos"), timings.stage(f"parser.{parse.__name__}"):
+        return len(deb_text), parse(deb_text)
+
+def _inad_diff(debitos_path: Source, condominio, inad_set):
+    return contact_store.inad_diff(condominio, VENDOR, lambda: pdf_io.source_sha256(debitos_path), inad_set)
+
+def iter_run(contatos_path: Source, debitos_path: Source, condominio=None, diff=False):
+    """
+    Contatos casados um a um e, por último, o registro "fim" (layouts/totais).
+    Com store e condomínio, os contatos parseados ficam gravados (ver contact_store);
+    com diff, só saem os contatos das unidades novas na lista.
+    """
+    t = timings.begin()
+
+    # débitos num processo à parte com --concurrent; junta só no filtro
+    deb = pdf_io.side_call(debitos_pipeline, debitos_path)
+
+    with timings.scope("contatos"):
+        cont_text = pdf_text(contatos_path)
+    cont_ok = len(cont_text.strip()) >= 50
+    if cont_ok:
+        parse = contatos_parser()
+        with timings.scope("contatos"), timings.stage(f"parser.{parse.__name__}"):
+            contatos = parse(cont_text)
+        with timings.scope("contatos"):
+            contact_store.save(condominio, VENDOR, lambda: pdf_io.source_sha256(contatos_path),
+                               CONT_LAYOUT, contatos, normalize_unidade)
+
+    deb_len, inad_set = deb.result()
+    if not cont_ok or inad_set is None:
+        yield ndjson_out.trailer(timings.attach({
             "erro": "PDF parece ser imagem/scan (texto vazio). Precisa OCR/vision.",
-            "debug": {"cont_text_len": len(cont_text), "deb_text_len": len(deb_text)}
-        }, ensure_ascii=False))
-        sys.exit(0)
-
-    # (opcional) labels: agora pode ser um dos dois layouts
-    cont_layout = "BR_UNIDADES_EXPANDIDAS_AUTO"
-    inad_layout = "BR_LISTA_DEBITOS_AUTO"
-
-    contatos = parse_contatos_unidades(cont_text)
-    inad_set = parse_inadimplentes_debitos(deb_text)
-
-    data = [c for c in contatos if normalize_unidade(c.get("unidade")) in inad_set]
-
-    out = {
-        "layouts": {"contatos": cont_layout, "inadimplentes": inad_layout},
+            "debug": {"cont_text_len": len(cont_text), "deb_text_len": deb_len}
+        }, t))
+        return
+
+    d = _inad_diff(debitos_path, condominio, inad_set) if diff else None
+    index, hits = _match(contatos, inad_set)
+    emit = d.novos if d else inad_set
+
+    matched = 0
+    for c, hit in zip(contatos, hits):
+        if hit is not None:
+            matched += 1
+            if hit in emit:
+                yield c.to_dict()
+
+    yield ndjson_out.trailer(timings.attach(unit_match.attach(contact_store.attach_diff({
+        # (opcional) labels: agora pode ser um dos dois layouts
+        "layouts": {"contatos": CONT_LAYOUT, "inadimplentes": INAD_LAYOUT},
         "totais": {
             "contatos_extraidos": len(contatos),
             "inad_unicos": len(inad_set),
-            "match": len(data)
+            "match": matched
         },
-        "data": data
-    }
+    }, d), index), t))
+
+def _match(contatos, inad_set, units=None):
+    """
+    (índice, unidade em débito de cada contato ou None). units: unidades do
+    diretório inteiro, quando contatos é só uma parte dele. Casa tudo antes do
+    primeiro yield para o tempo de "match" não incluir quem consome a saída.
+    """
+    with timings.stage("match.indice"):
+        keys = [normalize_unidade(c.unidade) for c in contatos]
+        index = unit_match.UnitIndex(inad_set, set(keys) if units is None else units, unit_key)
+    with timings.stage("match"):
+        hits = [index.find(u) for u in keys]
+    return index, hits
+
+def iter_match(debitos_path: Source, condominio, diff=False):
+    """Só a lista de débitos, cruzada com os últimos contatos gravados do condomínio."""
+    t = timings.begin()
+
+    erro = contact_store.match_error(condominio)
+    if erro:
+        yield ndjson_out.trailer(timings.attach({"erro": erro}, t))
+        return
+
+    store = contact_store.get_store()
+    versao = store.latest(str(condominio), VENDOR)
+    if versao is None:
+        yield ndjson_out.trailer(timings.attach({
+            "erro": f"Sem contatos gravados do condomínio {condominio!r} (rode antes com os dois PDFs e --store).",
+        }, t))
+        return
+
+    deb_len, inad_set = debitos_pipeline(debitos_path)
+    if inad_set is None:
+        yield ndjson_out.trailer(timings.attach({
+            "erro": "PDF parece ser imagem/scan (texto vazio). Precisa OCR/vision.",
+            "debug": {"deb_text_len": deb_len}
+        }, t))
+        return
+
+    d = _inad_diff(debitos_path, condominio, inad_set) if diff else None
+    contatos, units = store.for_match(str(condominio), VENDOR, versao.pdf_sha256, inad_set, unit_match.APPROX)
+    index, hits = _match(contatos, inad_set, units)
+    emit = d.novos if d else inad_set
+
+    matched = 0
+    for c, hit in zip(contatos, hits):
+        if hit is not None:
+            matched += 1
+            if hit in emit:
+                yield c.to_dict()
+
+    yield ndjson_out.trailer(timings.attach(unit_match.attach(contact_store.attach_diff({
+        "layouts": {"contatos": versao.layout, "inadimplentes": INAD_LAYOUT},
+        "totais": {
+            "contatos_extraidos": versao.total,
+            "inad_unicos": len(inad_set),
+            "match": matched
+        },
+    }, d), index), t))
+
+def _collect(records):
+    data, tail = ndjson_out.collect(records)
+    if "erro" in tail:
+        return tail
+    out = {"layouts": tail["layouts"], "totais": tail["totais"], "data": data}
+    for k in ("diff", "sem_contato", "debug"):
+        if k in tail:
+            out[k] = tail[k]
+    return out
+
+def run(contatos_path: Source, debitos_path: Source, condominio=None, diff=False):
+    return _collect(iter_run(contatos_path, debitos_path, condominio, diff))
+
+def run_match(debitos_path: Source, condominio, diff=False):
+    return _collect(iter_match(debitos_path, condominio, diff))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("contatos", nargs="?", help='caminho do PDF ou "-" para ler do stdin')
+    ap.add_argument("debitos", nargs="?", help='caminho do PDF ou "-" para ler do stdin')
+    ap.add_argument("--jobs", type=int, help="processos na extração por página (PDFs grandes)")
+    ap.add_argument("--layout", choices=pdf_io.LAYOUTS,
+                    help='"rows" refaz linhas e células das tabelas pela geometria das palavras (ou EXTRACT_LAYOUT)')
+    ap.add_argument("--inad-fast", action="store_true",
+                    help="da lista de débitos extrai só a coluna das unidades (ou EXTRACT_INAD_FAST=1)")
+    ap.add_argument("--ocr", action="store_true",
+                    help="PDF escaneado (sem texto): OCR local com tesseract (ou EXTRACT_OCR=1)")
+    ap.add_argument("--ocr-dpi", type=int, help="resolução da renderização para o OCR (padrão 300)")
+    ap.add_argument("--concurrent", action="store_true",
+                    help="processa contatos e débitos em processos separados (ou EXTRACT_CONCURRENT=1)")
+    ap.add_argument("--store", help="banco SQLite dos contatos parseados (ou EXTRACT_STORE)")
+    ap.add_argument("--condominio", help="id do condomínio no store")
+    ap.add_argument("--match-only", action="store_true",
+                    help="recebe só debitos.pdf e cruza com os contatos gravados (--store/--condominio)")
+    ap.add_argument("--approx-units", action="store_true",
+                    help="casa também unidades grafadas diferente nos dois PDFs, pelos componentes "
+                         "(ou EXTRACT_UNIT_APPROX=1)")
+    ap.add_argument("--list-unmatched", action="store_true",
+                    help='inclui "sem_contato": unidades em débito sem contato (ou EXTRACT_LIST_UNMATCHED=1)')
+    ap.add_argument("--diff", action="store_true",
+                    help="compara com a lista anterior do condomínio: só saem os contatos novos, "
+                         "com novos/quitados/persistentes (--store/--condominio)")
+    ap.add_argument("--timings", action="store_true",
+                    help="inclui tempos por etapa em debug (ou EXTRACT_TIMINGS=1)")
+    ap.add_argument("--ndjson", action="store_true",
+                    help='um contato por linha, conforme casam, e por último {"fim": true, ...}')
+    opts = ap.parse_args()
+
+    if opts.match_only:
+        # o único PDF posicional é a lista de débitos
+        opts.debitos = opts.debitos or opts.contatos
+        if not opts.debitos or not opts.condominio:
+            print(json.dumps({"erro": "Uso: python3 brcondominio_extract.py --match-only --condominio ID debitos.pdf"}, ensure_ascii=False))
+            sys.exit(2)
+    elif not opts.debitos:
+        print(json.dumps({"erro": "Uso: python3 brcondominio_extract.py contatos.pdf debitos.pdf"}, ensure_ascii=False))
+        sys.exit(2)
 
-    print(json.dumps(out, ensure_ascii=False))
+    if opts.jobs:
+        pdf_io.set_jobs(opts.jobs)
+    if opts.layout:
+        pdf_io.set_layout(opts.layout)
+    if opts.inad_fast:
+        pdf_io.set_inad_fast(True)
+    if opts.concurrent:
+        pdf_io.set_concurrent(True)
+    if opts.approx_units:
+        unit_match.set_approx(True)
+    if opts.list_unmatched:
+        unit_match.set_list_unmatched(True)
+    if opts.ocr:
+        ocr.set_enabled(True)
+    if opts.ocr_dpi:
+        ocr.set_dpi(opts.ocr_dpi)
+    if opts.store:
+        contact_store.set_path(opts.store)
+    for on, check in ((opts.match_only, contact_store.match_error), (opts.diff, contact_store.diff_error)):
+        erro = check(opts.condominio) if on else None
+        if erro:
+            print(json.dumps({"erro": erro}, ensure_ascii=False))
+            sys.exit(2)
+    if opts.timings:
+        timings.set_enabled(True)
+
+    if opts.match_only:
+        debitos, = pdf_io.stdin_sources([opts.debitos])
+        records = iter_match(debitos, opts.condominio, opts.diff)
+    else:
+        contatos, debitos = pdf_io.stdin_sources([opts.contatos, opts.debitos])
+        records = iter_run(contatos, debitos, opts.condominio, opts.diff)
+    if opts.ndjson:
+        out = ndjson_out.write_ndjson(records, sys.stdout)
+    else:
+        out = _collect(records)
+        print(json.dumps(out, ensure_ascii=False))
+    # store sem a versão do condomínio: quem chama precisa ver a falha
+    if opts.match_only and "erro" in out:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
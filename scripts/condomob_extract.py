@@ -1,30 +1,35 @@
 import re
 import json
+import os
 import sys
+import time
+import argparse
+import io
 import unicodedata
-import pdfplumber
 
-UNIT_RE = re.compile(r"\b(B\d{2}AP\d{3})\b", re.I)
+import contact_store
+import ndjson_out
+import pdf_io
+from contact_record import Contato
+from contact_scan import CONDOMOB, scanner
+import timings
+from pdf_io import Source, cached_pages, is_stream, map_page_ranges, open_pdf, page_count
+
+# muda sempre que a extração/normalização do texto mudar
+PLUMBER_TEXT_VERSION = "plumber-fold-1"
+FITZ_FOLD_VERSION = "fitz-fold-1"
 
-EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
+# "pdfplumber" força o caminho antigo (mais lento) para o documento inteiro
+ENGINE = os.environ.get("CONDOMOB_ENGINE", "fitz")
+
+UNIT_RE = re.compile(r"\b(B\d{2}AP\d{3})\b", re.I)
 
-# Telefones mais "seguros":
+# Telefones só nos formatos mais "seguros" (perfil CONDOMOB do contact_scan):
 # - (98) 98503-3520
 # - 98 985033520
 # - 98503-3520
 # - 3503-3520
-PHONE_SAFE_RE = re.compile(
-    r"""
-    (?:\(\d{2}\)\s*\d{4,5}[-\s]?\d{4})     # (98) 98503-3520
-    |
-    (?:\b\d{2}\s*\d{4,5}[-\s]?\d{4}\b)     # 98 98503-3520 ou 98985033520 (se tiver espaço/hífen)
-    |
-    (?:\b9\d{4}[-\s]?\d{4}\b)              # 98503-3520 (celular sem DDD)
-    |
-    (?:\b[2-5]\d{3}[-\s]?\d{4}\b)          # 3503-3520 (fixo sem DDD)
-    """,
-    re.VERBOSE
-)
+_contacts = scanner(CONDOMOB)
 
 STOP_ANY_RE = re.compile(
     r"\b(PAGADOR|TIPO\sPAGADOR|TIPO\s|ORDINARIA|ORDINÁRIA|ACORDO|EXTRA|INADIMPL|DATA\sDE\sREFER|N\.\s*NÚMERO|VL\.ATUAL)\b",
@@ -38,37 +43,80 @@ def fold(s: str) -> str:
     s = "".join(ch for ch in s if not unicodedata.combining(ch))
     return s
 
-def extract_full_text(pdf_path: str) -> str:
-    chunks = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            if not t.strip():
-                words = page.extract_words() or []
-                if words:
-                    words.sort(key=lambda w: (round(w["top"], 1), w["x0"]))
-                    t = " ".join(w["text"] for w in words)
-            chunks.append(t)
-    return "\n".join(chunks)
-
-def normalize_phone(raw: str) -> str | None:
-    s = re.sub(r"\D+", "", raw or "")
-    if not s:
-        return None
+def _plumber_page_text(page) -> str:
+    t = page.extract_text() or ""
+    if not t.strip():
+        words = page.extract_words() or []
+        if words:
+            words.sort(key=lambda w: (round(w["top"], 1), w["x0"]))
+            t = " ".join(w["text"] for w in words)
+    return t
 
-    # casos com DDD (10 ou 11)
-    if len(s) == 10:
-        return f"+55{s}"
-    if len(s) == 11:
-        return f"+55{s}"
+def _plumber_pages(pdf_path: Source, indexes) -> list:
+    import pdfplumber  # só quando o MuPDF não der conta
 
-    # sem DDD: 9 (cel) ou 8 (fixo)
-    if len(s) == 9 and s.startswith("9"):
-        return s
-    if len(s) == 8 and s[0] in ("2", "3", "4", "5"):
-        return s
+    src = io.BytesIO(pdf_path) if is_stream(pdf_path) else pdf_path
+    with pdfplumber.open(src) as pdf:
+        return [_plumber_page_text(pdf.pages[i]) for i in indexes]
 
-    return None
+def _plumber_range(pdf_path: Source, start: int, stop: int) -> list:
+    return _plumber_pages(pdf_path, range(start, stop))
+
+def fitz_page_text(page) -> str:
+    """
+    Reproduz o extract_text() do pdfplumber com as palavras do MuPDF: linhas
+    pela geometria (pdf_io.word_rows, mesma tolerância de 3pt do pdfplumber),
+    palavras juntadas com espaço.
+    """
+    return pdf_io.rows_page_text(page)
+
+def _timed_page_texts(doc, start: int, stop: int, t) -> list:
+    chunks = []
+    for i in range(start, stop):
+        t0 = time.perf_counter()
+        chunks.append(fitz_page_text(doc[i]))
+        secs = time.perf_counter() - t0
+        t.page(i, secs)
+        t.add("extracao", secs)
+    return chunks
+
+def _fitz_range(pdf_path: Source, start: int, stop: int) -> list:
+    with timings.stage("abrir"):
+        doc = open_pdf(pdf_path)
+    try:
+        t = timings.current()
+        if t is not None:
+            chunks = _timed_page_texts(doc, start, stop, t)
+        else:
+            chunks = [fitz_page_text(doc[i]) for i in range(start, stop)]
+    finally:
+        doc.close()
+
+    # páginas sem texto no MuPDF: tenta o pdfplumber só nelas
+    empty = [start + i for i, t in enumerate(chunks) if not t.strip()]
+    if empty:
+        timings.count("paginas_pdfplumber", len(empty))
+        with timings.stage("extracao_pdfplumber"):
+            for i, t in zip(empty, _plumber_pages(pdf_path, empty)):
+                chunks[i - start] = t
+    return chunks
+
+def extract_pages(pdf_path: Source) -> list:
+    extract_range = _plumber_range if ENGINE == "pdfplumber" else _fitz_range
+    return map_page_ranges(pdf_path, page_count(pdf_path), extract_range)
+
+def extract_full_text(pdf_path: Source) -> str:
+    return "\n".join(extract_pages(pdf_path))
+
+def folded_pages(pdf_path: Source) -> list:
+    # fold é por caractere, então dobrar página a página == dobrar o texto todo
+    version = PLUMBER_TEXT_VERSION if ENGINE == "pdfplumber" else FITZ_FOLD_VERSION
+    return cached_pages(pdf_path, version, _extract_folded)
+
+def _extract_folded(pdf_path: Source) -> list:
+    pages = extract_pages(pdf_path)
+    with timings.stage("normalizacao"):
+        return [fold(t) for t in pages]
 
 def split_by_units(full_text: str):
     matches = list(UNIT_RE.finditer(full_text))
@@ -115,40 +163,83 @@ def extract_clean_name(owner_part: str) -> str:
     return re.sub(r"\s{2,}", " ", name)
 
 def extract_contacts(owner_part: str):
-    emails = sorted(set(EMAIL_RE.findall(owner_part or "")))
-
-    phones = []
-    for p in PHONE_SAFE_RE.findall(owner_part or ""):
-        np = normalize_phone(p)
-        if np:
-            phones.append(np)
+    phones, emails = _contacts.scan(owner_part)
+    return sorted(set(phones)), sorted(set(emails))
 
-    return sorted(set(phones)), emails
+def iter_run(pdf_path: Source, condominio=None):
+    """
+    Unidades uma a uma e, por último, o registro "fim" (totais). Com store e
+    condomínio, os contatos ficam gravados (ver contact_store).
+    """
+    t = timings.begin()
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: python scripts/condomob_apartamentos_extract.py arquivo.pdf", file=sys.stderr)
-        sys.exit(1)
+    pages = folded_pages(pdf_path)
+    with timings.stage("normalizacao"):
+        text = "\n".join(pages)
+    timings.count("texto_len", len(text))
 
-    pdf_path = sys.argv[1]
-    text = fold(extract_full_text(pdf_path))
+    with timings.stage("parser.split_by_units"):
+        blocks = split_by_units(text)
 
-    results = []
-    for unidade, chunk in split_by_units(text):
+    contatos = []
+    for unidade, chunk in blocks:
         owner_part = extract_owner_line(chunk)
         if not owner_part:
             continue
 
-        nome = extract_clean_name(owner_part)
+        c = Contato(unidade, extract_clean_name(owner_part))
         phones, emails = extract_contacts(owner_part)
+        c.add_phones(phones)
+        c.add_emails(emails)
+
+        contatos.append(c)
+        # a saída do Condomob não leva Nome
+        yield c.to_dict(nome=False)
+
+    # a unidade já sai canônica (maiúsculas) do split_by_units
+    contact_store.save(condominio, "condomob", lambda: pdf_io.source_sha256(pdf_path),
+                       "CONDOMOB_APARTAMENTOS", contatos, str.upper)
+    yield ndjson_out.trailer(timings.attach({"totais": {"contatos_extraidos": len(contatos)}}, t))
+
+def run(pdf_path: Source, condominio=None):
+    """
+    Lista de {"unidade", "Telefone", "Email"}. Com timings ligado vira
+    {"data": [...], "debug": {...}}.
+    """
+    results, tail = ndjson_out.collect(iter_run(pdf_path, condominio))
+    if "debug" not in tail:
+        return results
+    return {"data": results, "debug": tail["debug"]}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdf", nargs="?", help='caminho do PDF ou "-" para ler do stdin')
+    ap.add_argument("--jobs", type=int, help="processos na extração por página (PDFs grandes)")
+    ap.add_argument("--timings", action="store_true",
+                    help="sai {data, debug} com tempos por etapa (ou EXTRACT_TIMINGS=1)")
+    ap.add_argument("--ndjson", action="store_true",
+                    help='uma unidade por linha e por último {"fim": true, "totais": ...}')
+    ap.add_argument("--store", help="banco SQLite onde gravar os contatos (ou EXTRACT_STORE)")
+    ap.add_argument("--condominio", help="id do condomínio no store")
+    opts = ap.parse_args()
+
+    if not opts.pdf:
+        print("Uso: python scripts/condomob_apartamentos_extract.py arquivo.pdf", file=sys.stderr)
+        sys.exit(1)
+
+    if opts.jobs:
+        pdf_io.set_jobs(opts.jobs)
+    if opts.timings:
+        timings.set_enabled(True)
+    if opts.store:
+        contact_store.set_path(opts.store)
 
-        results.append({
-            "unidade": unidade,
-            
-            "Telefone": phones,
-            "Email": emails,
-        })
+    pdf, = pdf_io.stdin_sources([opts.pdf])
+    if opts.ndjson:
+        ndjson_out.write_ndjson(iter_run(pdf, opts.condominio), sys.stdout)
+        return
 
+    results = run(pdf, opts.condominio)
     print(json.dumps(results, ensure_ascii=False))
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de contato compartilhado pelos extratores.
+
+Telefones e e-mails são conjuntos ordenados pela primeira ocorrência (valor sem
+espaços nas pontas, vazios descartados): cada valor é deduplicado uma única
+vez, ao entrar. Como quase sempre são 1 a 3 valores, o conjunto é uma lista com
+teste de pertinência linear, menor que um dict/set do mesmo tamanho.
+
+to_dict() é a única serialização, feita só para os contatos que vão para a
+saída; entrega as próprias listas, sem cópia.
+"""
+
+from typing import Dict, Iterable
+
+
+class Contato:
+    __slots__ = ("unidade", "nome", "telefones", "emails")
+
+    def __init__(self, unidade: str, nome: str = ""):
+        self.unidade = unidade
+        self.nome = nome
+        self.telefones = []
+        self.emails = []
+
+    def add_phone(self, p: str):
+        p = (p or "").strip()
+        if p and p not in self.telefones:
+            self.telefones.append(p)
+
+    def add_phones(self, ps: Iterable[str]):
+        tel = self.telefones
+        for p in ps:
+            p = (p or "").strip()
+            if p and p not in tel:
+                tel.append(p)
+
+    def add_emails(self, es: Iterable[str]):
+        em = self.emails
+        for e in es:
+            e = (e or "").strip()
+            if e and e not in em:
+                em.append(e)
+
+    def has_contacts(self) -> bool:
+        return bool(self.telefones or self.emails)
+
+    def to_dict(self, nome: bool = True) -> Dict:
+        if not nome:
+            return {"unidade": self.unidade, "Telefone": self.telefones, "Email": self.emails}
+        return {
+            "unidade": self.unidade,
+            "Nome": self.nome,
+            "Telefone": self.telefones,
+            "Email": self.emails,
+        }
+
+    def __repr__(self) -> str:
+        return f"Contato({self.unidade!r}, {self.nome!r}, {self.telefones}, {self.emails})"
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Varredura de contatos (telefones + e-mails) compartilhada pelos extratores.
+
+Uma regex combinada por perfil acha e-mails e candidatos a telefone numa única
+passada pelo trecho; cada telefone vira a forma canônica:
+    +55DDDNNNNNNNN   com DDD (10/11 dígitos, com ou sem o 55 na frente)
+    NNNNNNNNN        sem DDD (celular 9xxxxxxxx ou fixo [2-5]xxxxxxx), sem
+                     como saber o país/DDD, fica só com os dígitos
+
+Cada fornecedor só configura as suas manias num PhoneProfile: qual regex
+acha candidatos em texto livre e o que fazer com números fora do padrão.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+EMAIL_PATTERN = r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}"
+EMAIL_RE = re.compile(EMAIL_PATTERN, re.I)
+
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+# valores encadeados num campo ("98 9999-0000; 3222-1111 e 98888-7777")
+_FIELD_SPLIT_RE = re.compile(r"[;,/]| e |\s{2,}")
+
+
+class PhoneProfile(NamedTuple):
+    name: str
+    # candidatos em texto livre (None = o fornecedor só usa campos rotulados)
+    finder: Optional[str]
+    # números com 8+ dígitos que não fecham com o padrão BR ficam como dígitos
+    keep_unknown: bool = False
+    # menos de 8 ou exatamente estes tamanhos de dígitos são descartados
+    drop_lengths: Tuple[int, ...] = ()
+
+
+# Superlógica: +55, DDD com/sem parênteses, nono dígito separado, 4+4
+SUPERLOGICA = PhoneProfile(
+    name="superlogica",
+    finder=r"""
+    (?<!\d)
+    (?:\+?55\s*)?
+    (?:\(?\d{2}\)?\s*)?
+    (?:9\s*)?\d{4}[-\s]?\d{4}
+    (?!\d)
+    """,
+    keep_unknown=True,
+    drop_lengths=(14,),
+)
+
+# Condomob: só formatos "seguros" (o relatório mistura CPF e valores no texto)
+CONDOMOB = PhoneProfile(
+    name="condomob",
+    finder=r"""
+    (?:\(\d{2}\)\s*\d{4,5}[-\s]?\d{4})     # (98) 98503-3520
+    |
+    (?:\b\d{2}\s*\d{4,5}[-\s]?\d{4}\b)     # 98 98503-3520 ou 98985033520 (se tiver espaço/hífen)
+    |
+    (?:\b9\d{4}[-\s]?\d{4}\b)              # 98503-3520 (celular sem DDD)
+    |
+    (?:\b[2-5]\d{3}[-\s]?\d{4}\b)          # 3503-3520 (fixo sem DDD)
+    """,
+)
+
+# BRCondomínios: telefones só nos campos "Telefone:", "Celular:"...
+BRCONDOMINIOS = PhoneProfile(name="brcondominios", finder=None)
+
+
+# ------------------ normalização ------------------
+def canonical_phone(digits: str, keep_unknown: bool = False) -> Optional[str]:
+    n = len(digits)
+    if n in (12, 13) and digits.startswith("55"):
+        return f"+{digits}"
+    if n in (10, 11):
+        return f"+55{digits}"
+    if n == 9 and digits[0] == "9":
+        return digits
+    if n == 8 and digits[0] in "2345":
+        return digits
+    if keep_unknown and n >= 8:
+        return digits
+    return None
+
+
+def normalize_phone(raw: str, profile: PhoneProfile = CONDOMOB) -> Optional[str]:
+    digits = _NON_DIGIT_RE.sub("", raw or "")
+    if len(digits) < 8 or len(digits) in profile.drop_lengths:
+        return None
+    return canonical_phone(digits, profile.keep_unknown)
+
+
+# ------------------ varredura ------------------
+class ContactScanner:
+    """Uma passada por trecho: e-mails e telefones canônicos, na ordem em que aparecem."""
+
+    __slots__ = ("profile", "_re", "_phone_re")
+
+    def __init__(self, profile: PhoneProfile):
+        self.profile = profile
+        alts = [f"(?P<email>{EMAIL_PATTERN})"]
+        if profile.finder:
+            alts.append(f"(?P<phone>{profile.finder})")
+        self._re = re.compile("|".join(alts), re.I | re.X)
+        # sem "@" no trecho não há e-mail: só a regex de telefone, que é bem
+        # mais barata (a de e-mail tenta casar a partir de cada letra)
+        self._phone_re = re.compile(profile.finder, re.I | re.X) if profile.finder else None
+
+    def scan(self, text: str) -> Tuple[List[str], List[str]]:
+        """(telefones, emails) do trecho; duplicados ficam para quem acumula."""
+        phones, emails = [], []
+        if not text:
+            return phones, emails
+        prof = self.profile
+        if "@" not in text:
+            if self._phone_re is not None:
+                for m in self._phone_re.finditer(text):
+                    p = normalize_phone(m.group(0), prof)
+                    if p:
+                        phones.append(p)
+            return phones, emails
+        for m in self._re.finditer(text):
+            em = m.group("email")
+            if em is not None:
+                emails.append(em)
+                continue
+            p = normalize_phone(m.group(0), prof)
+            if p:
+                phones.append(p)
+        return phones, emails
+
+    def phones(self, text: str) -> List[str]:
+        return self.scan(text)[0]
+
+    def emails(self, text: str) -> List[str]:
+        return self.scan(text)[1]
+
+    def has_contact(self, text: str) -> bool:
+        """Algum e-mail ou telefone válido no trecho (para no primeiro)."""
+        if not text:
+            return False
+        prof = self.profile
+        if "@" not in text:
+            if self._phone_re is None:
+                return False
+            return any(normalize_phone(m.group(0), prof) for m in self._phone_re.finditer(text))
+        for m in self._re.finditer(text):
+            if m.group("email") is not None or normalize_phone(m.group(0), prof):
+                return True
+        return False
+
+    def field_phones(self, values: Iterable[str]) -> List[str]:
+        """Telefones de valores de campos rotulados, cada um podendo ter vários números."""
+        out = []
+        prof = self.profile
+        for val in values:
+            for chunk in _FIELD_SPLIT_RE.split(val or ""):
+                p = normalize_phone(chunk, prof)
+                if p:
+                    out.append(p)
+        return out
+
+
+_scanners = {}
+
+
+def scanner(profile: PhoneProfile) -> ContactScanner:
+    sc = _scanners.get(profile.name)
+    if sc is None:
+        sc = _scanners[profile.name] = ContactScanner(profile)
+    return sc
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diretório de contatos persistido em SQLite, por condomínio.
+
+O cadastro de contatos quase não muda de um mês para o outro, mas todo mês o
+PDF de contatos era extraído e parseado de novo só para cruzar com a lista de
+inadimplentes nova. Com o store ligado, cada execução completa grava os
+contatos parseados (já deduplicados, na ordem do relatório) sob
+(condomínio, vendor, SHA-256 do PDF); o modo "só casamento" recebe só a lista
+de inadimplentes e cruza com a última versão gravada do condomínio.
+
+Cada contato guarda a unidade como saiu do parser e a chave canônica (a
+unidade normalizada do vendor, a mesma usada no filtro). O casamento exato é um
+join no índice (condomínio, vendor, pdf, chave) com as unidades em débito numa
+tabela temporária, e o resultado volta na ordem original do relatório; as
+chaves distintas da versão (para as sobras nos totais) saem do mesmo índice,
+sem decodificar contato nenhum. Só o casamento aproximado (unit_match) lê o
+diretório inteiro da versão.
+
+O mesmo PDF gravado de novo substitui a versão anterior dele (parser novo,
+mesma entrada); PDFs diferentes viram versões diferentes e a mais recente vale.
+
+No modo diff o store guarda também o conjunto de unidades em débito de cada
+lista (por condomínio, vendor e SHA-256 do PDF) e compara com a lista anterior
+do condomínio, a última gravada de outro PDF: novos (não estavam), quitados
+(saíram) e persistentes (continuam). Rodar de novo a mesma lista compara com a
+anterior a ela, não com ela mesma.
+
+Configuração por ambiente:
+    EXTRACT_STORE   caminho do banco SQLite (sem ele nada é gravado) — ou --store
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import timings
+from contact_record import Contato
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versao (
+    condominio  TEXT NOT NULL,
+    vendor      TEXT NOT NULL,
+    pdf_sha256  TEXT NOT NULL,
+    layout      TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    criado_em   REAL NOT NULL,
+    PRIMARY KEY (condominio, vendor, pdf_sha256)
+);
+CREATE TABLE IF NOT EXISTS contato (
+    condominio  TEXT NOT NULL,
+    vendor      TEXT NOT NULL,
+    pdf_sha256  TEXT NOT NULL,
+    ordem       INTEGER NOT NULL,
+    unidade_key TEXT NOT NULL,
+    unidade     TEXT NOT NULL,
+    nome        TEXT NOT NULL,
+    telefones   TEXT NOT NULL,
+    emails      TEXT NOT NULL,
+    PRIMARY KEY (condominio, vendor, pdf_sha256, ordem)
+);
+CREATE INDEX IF NOT EXISTS contato_unidade
+    ON contato (condominio, vendor, pdf_sha256, unidade_key);
+CREATE TABLE IF NOT EXISTS inad_versao (
+    condominio  TEXT NOT NULL,
+    vendor      TEXT NOT NULL,
+    pdf_sha256  TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    criado_em   REAL NOT NULL,
+    PRIMARY KEY (condominio, vendor, pdf_sha256)
+);
+CREATE TABLE IF NOT EXISTS inad_unidade (
+    condominio  TEXT NOT NULL,
+    vendor      TEXT NOT NULL,
+    pdf_sha256  TEXT NOT NULL,
+    unidade_key TEXT NOT NULL,
+    PRIMARY KEY (condominio, vendor, pdf_sha256, unidade_key)
+);
+"""
+
+_path = os.environ.get("EXTRACT_STORE") or None
+_store = None
+
+
+class Versao(NamedTuple):
+    pdf_sha256: str
+    layout: str
+    total: int
+
+
+class Diff(NamedTuple):
+    novos: Set[str]
+    quitados: Set[str]
+    persistentes: Set[str]
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {k: sorted(v) for k, v in self._asdict().items()}
+
+    def totais(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self._asdict().items()}
+
+
+def _contatos(rows) -> List[Contato]:
+    out = []
+    for unidade, nome, telefones, emails in rows:
+        c = Contato(unidade, nome)
+        c.telefones = json.loads(telefones)
+        c.emails = json.loads(emails)
+        out.append(c)
+    return out
+
+
+class ContactStore:
+    def __init__(self, path: str):
+        self.path = path
+        # timeout: workers do pool gravam no mesmo banco
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def save(self, condominio: str, vendor: str, sha: str, layout: str,
+             contatos: List[Contato], key_fn: Callable[[str], str]):
+        rows = [
+            (condominio, vendor, sha, i, key_fn(c.unidade), c.unidade, c.nome,
+             json.dumps(c.telefones, ensure_ascii=False), json.dumps(c.emails, ensure_ascii=False))
+            for i, c in enumerate(contatos)
+        ]
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM contato WHERE condominio = ? AND vendor = ? AND pdf_sha256 = ?",
+                (condominio, vendor, sha))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO versao VALUES (?, ?, ?, ?, ?, ?)",
+                (condominio, vendor, sha, layout, len(rows), time.time()))
+            self.conn.executemany("INSERT INTO contato VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def latest(self, condominio: str, vendor: str) -> Optional[Versao]:
+        row = self.conn.execute(
+            "SELECT pdf_sha256, layout, total FROM versao WHERE condominio = ? AND vendor = ?"
+            " ORDER BY criado_em DESC LIMIT 1",
+            (condominio, vendor)).fetchone()
+        return Versao(*row) if row else None
+
+    def match(self, condominio: str, vendor: str, sha: str, keys: Iterable[str]) -> List[Contato]:
+        """Contatos da versão `sha` cuja chave está em `keys`, na ordem do relatório."""
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS chave (k TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM chave")
+            self.conn.executemany("INSERT OR IGNORE INTO chave VALUES (?)", ((k,) for k in keys))
+            rows = self.conn.execute(
+                "SELECT c.unidade, c.nome, c.telefones, c.emails FROM chave"
+                " JOIN contato c ON c.condominio = ? AND c.vendor = ? AND c.pdf_sha256 = ?"
+                " AND c.unidade_key = chave.k ORDER BY c.ordem",
+                (condominio, vendor, sha)).fetchall()
+        return _contatos(rows)
+
+    def contatos(self, condominio: str, vendor: str, sha: str) -> List[Contato]:
+        """Todos os contatos da versão `sha`, na ordem do relatório."""
+        rows = self.conn.execute(
+            "SELECT unidade, nome, telefones, emails FROM contato"
+            " WHERE condominio = ? AND vendor = ? AND pdf_sha256 = ? ORDER BY ordem",
+            (condominio, vendor, sha)).fetchall()
+        return _contatos(rows)
+
+    def unit_keys(self, condominio: str, vendor: str, sha: str) -> Set[str]:
+        """Chaves distintas da versão `sha` (só o índice, sem ler os contatos)."""
+        return {k for (k,) in self.conn.execute(
+            "SELECT DISTINCT unidade_key FROM contato WHERE condominio = ? AND vendor = ? AND pdf_sha256 = ?",
+            (condominio, vendor, sha))}
+
+    def for_match(self, condominio: str, vendor: str, sha: str, keys: Set[str],
+                  full: bool) -> Tuple[List[Contato], Optional[Set[str]]]:
+        """
+        (contatos, chaves da versão) para o casamento. Exato: só os contatos das
+        chaves em `keys`, pelo join, e as chaves pelo índice. full (aproximado):
+        o diretório inteiro, e as chaves ficam por conta de quem casa (None).
+        """
+        with timings.stage("store.leitura"):
+            if full:
+                return self.contatos(condominio, vendor, sha), None
+            return self.match(condominio, vendor, sha, keys), self.unit_keys(condominio, vendor, sha)
+
+    def previous_inad(self, condominio: str, vendor: str, sha: str) -> Optional[Set[str]]:
+        """Unidades da última lista gravada do condomínio que não seja `sha`."""
+        row = self.conn.execute(
+            "SELECT pdf_sha256 FROM inad_versao WHERE condominio = ? AND vendor = ? AND pdf_sha256 != ?"
+            " ORDER BY criado_em DESC LIMIT 1",
+            (condominio, vendor, sha)).fetchone()
+        if row is None:
+            return None
+        return {k for (k,) in self.conn.execute(
+            "SELECT unidade_key FROM inad_unidade WHERE condominio = ? AND vendor = ? AND pdf_sha256 = ?",
+            (condominio, vendor, row[0]))}
+
+    def save_inad(self, condominio: str, vendor: str, sha: str, keys: Set[str]):
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM inad_unidade WHERE condominio = ? AND vendor = ? AND pdf_sha256 = ?",
+                (condominio, vendor, sha))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO inad_versao VALUES (?, ?, ?, ?, ?)",
+                (condominio, vendor, sha, len(keys), time.time()))
+            self.conn.executemany(
+                "INSERT INTO inad_unidade VALUES (?, ?, ?, ?)",
+                ((condominio, vendor, sha, k) for k in keys))
+
+    def close(self):
+        self.conn.close()
+
+
+def set_path(path: Optional[str]):
+    global _path, _store
+    if _store is not None:
+        _store.close()
+    _path = path or None
+    _store = None
+
+
+def get_store() -> Optional[ContactStore]:
+    global _store
+    if _store is None and _path:
+        _store = ContactStore(_path)
+    return _store
+
+
+def save(condominio: Optional[str], vendor: str, sha_fn: Callable[[], str], layout: str,
+         contatos: List[Contato], key_fn: Callable[[str], str]):
+    """Grava os contatos se houver store e condomínio; sha_fn só roda nesse caso."""
+    store = get_store()
+    if store is None or not condominio:
+        return
+    with timings.stage("store.gravacao"):
+        store.save(str(condominio), vendor, sha_fn(), layout, contatos, key_fn)
+
+
+def store_error(condominio: Optional[str], modo: str) -> Optional[str]:
+    """Mensagem de erro se `modo` não tem como rodar (sem store ou condomínio)."""
+    if not _path:
+        return f"{modo} precisa do store (--store ou EXTRACT_STORE)."
+    if not condominio:
+        return f"{modo} precisa do condomínio (--condominio)."
+    return None
+
+
+def diff_error(condominio: Optional[str]) -> Optional[str]:
+    return store_error(condominio, "diff")
+
+
+def match_error(condominio: Optional[str]) -> Optional[str]:
+    return store_error(condominio, "match-only")
+
+
+def inad_diff(condominio: str, vendor: str, sha_fn: Callable[[], str], inad_set: Set[str]) -> Diff:
+    """Compara com a lista anterior do condomínio e grava esta como a mais recente."""
+    erro = diff_error(condominio)
+    if erro:
+        raise ValueError(erro)
+    store = get_store()
+    with timings.stage("store.diff"):
+        sha = sha_fn()
+        prev = store.previous_inad(str(condominio), vendor, sha) or set()
+        store.save_inad(str(condominio), vendor, sha, inad_set)
+    return Diff(inad_set - prev, prev - inad_set, inad_set & prev)
+
+
+def attach_diff(out: Dict, d: Optional[Diff]) -> Dict:
+    """Com diff: contagens em totais e os três conjuntos em "diff"."""
+    if d is not None:
+        out["totais"].update(d.totais())
+        out["diff"] = d.to_dict()
+    return out
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker persistente dos extratores (Superlógica, BRCondomínios, Condomob).
+
+Carrega fitz e os três módulos uma única vez e atende vários jobs
+no mesmo processo, evitando o custo de subir um interpretador por upload.
+
+Modo servidor (--serve): um job JSON por linha no stdin
+    {"id": "abc", "vendor": "superlogica", "args": ["contatos.pdf", "inad.pdf"]}
+
+Os PDFs também podem ir no próprio stdin, sem arquivo temporário: o job declara
+os tamanhos em "bodies" e os bytes vêm logo depois da linha, na mesma ordem;
+cada "-" de args é trocado pelo corpo correspondente.
+    {"id": "abc", "vendor": "superlogica", "args": ["-", "-"], "bodies": [48211, 9133]}\n<48211 bytes><9133 bytes>
+
+e uma resposta JSON por linha no stdout, com o mesmo id:
+    {"id": "abc", "ok": true, "result": {...}}
+    {"id": "abc", "ok": false, "erro": "..."}
+
+Com "condominio" os contatos parseados ficam gravados no store (--store ou
+EXTRACT_STORE, ver contact_store); com "match_only": true o job leva só a lista
+de inadimplentes e cruza com os contatos gravados do condomínio:
+    {"id": "abc", "vendor": "superlogica", "args": ["inad.pdf"], "condominio": "123", "match_only": true}
+Com "diff": true (precisa de "condominio" e do store) só saem os contatos das
+unidades novas na lista, e a resposta traz novos/quitados/persistentes.
+
+Com "stream": true o job responde em NDJSON incremental: uma linha por contato
+casado, assim que sai do parser, e a resposta final (sem "data") fecha o job:
+    {"id": "abc", "item": {"unidade": "AP 101 BL 1", ...}}
+    {"id": "abc", "ok": true, "result": {"layouts": {...}, "totais": {...}}}
+
+Com --workers N o processo vira supervisor de um pool pré-forkado: os N
+workers nascem por fork do pai (bibliotecas já importadas), atendem um job por
+vez e são reciclados ao atingir --max-jobs ou --max-rss-mb. O job especial
+    {"id": "x", "op": "stats"}
+responde na hora com o estado do pool (inclusive a profundidade da fila).
+
+Sem --serve roda um job só, direto da linha de comando:
+    python3 extract_worker.py superlogica contatos.pdf inadimplentes.pdf
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import traceback
+from collections import deque
+from multiprocessing.connection import wait
+
+import brcondominios_extract
+import condomob_extract
+import contact_store
+import ndjson_out
+import ocr
+import pdf_io
+import superlogica_extract
+import timings
+import unit_match
+
+VENDORS = {
+    "superlogica": superlogica_extract.run,
+    "brcondominios": brcondominios_extract.run,
+    "condomob": condomob_extract.run,
+}
+
+STREAM_VENDORS = {
+    "superlogica": superlogica_extract.iter_run,
+    "brcondominios": brcondominios_extract.iter_run,
+    "condomob": condomob_extract.iter_run,
+}
+
+# só a lista de inadimplentes contra os contatos gravados, e diff entre listas
+# (Condomob não tem lista de inadimplentes)
+MATCH_VENDORS = {
+    "superlogica": superlogica_extract.run_match,
+    "brcondominios": brcondominios_extract.run_match,
+}
+
+STREAM_MATCH_VENDORS = {
+    "superlogica": superlogica_extract.iter_match,
+    "brcondominios": brcondominios_extract.iter_match,
+}
+
+
+# ------------------ jobs ------------------
+ARGS_ERRO = 'args inválido: esperado lista de caminhos (ou "-").'
+
+
+def _valid_args(args) -> bool:
+    # bytes: corpos já trocados pelos "-" (stdin)
+    return isinstance(args, list) and all(isinstance(a, (str, bytes)) for a in args)
+
+
+def job_call(job: dict, stream: bool = False):
+    """(função, args, kwargs) do job, ou (None, mensagem de erro, None)."""
+    vendor = job.get("vendor")
+    args = job.get("args") or []
+    if not _valid_args(args):
+        return None, ARGS_ERRO, None
+    args = list(args)
+    kwargs = {}
+    condominio = job.get("condominio")
+    if job.get("diff"):
+        if vendor not in MATCH_VENDORS:
+            return None, f"Vendor sem modo diff: {vendor!r}", None
+        erro = contact_store.diff_error(condominio)
+        if erro:
+            return None, erro, None
+        kwargs["diff"] = True
+
+    if job.get("match_only"):
+        fn = (STREAM_MATCH_VENDORS if stream else MATCH_VENDORS).get(vendor)
+        if fn is None:
+            return None, f"Vendor sem modo match_only: {vendor!r}", None
+        erro = contact_store.match_error(condominio)
+        if erro:
+            return None, erro, None
+        return fn, args + [condominio], kwargs
+
+    fn = (STREAM_VENDORS if stream else VENDORS).get(vendor)
+    if fn is None:
+        return None, f"Vendor desconhecido: {vendor!r}", None
+    if condominio:
+        kwargs["condominio"] = condominio
+    return fn, args, kwargs
+
+
+def handle(job: dict) -> dict:
+    job_id = job.get("id")
+    try:
+        fn, args, kwargs = job_call(job)
+        if fn is None:
+            return {"id": job_id, "ok": False, "erro": args}
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        return {"id": job_id, "ok": False, "erro": f"{type(e).__name__}: {e}"}
+
+    return {"id": job_id, "ok": True, "result": result}
+
+
+def handle_stream(job: dict):
+    """Respostas parciais {"id", "item"} e, por último, a final {"id", "ok", ...}."""
+    job_id = job.get("id")
+    try:
+        fn, args, kwargs = job_call(job, stream=True)
+        if fn is None:
+            yield {"id": job_id, "ok": False, "erro": args}
+            return
+        for rec in fn(*args, **kwargs):
+            if ndjson_out.is_trailer(rec):
+                tail = {k: v for k, v in rec.items() if k != ndjson_out.TRAILER_KEY}
+                yield {"id": job_id, "ok": True, "result": tail}
+                return
+            yield {"id": job_id, "item": rec}
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        yield {"id": job_id, "ok": False, "erro": f"{type(e).__name__}: {e}"}
+
+
+def respond(job: dict):
+    if job.get("stream"):
+        return handle_stream(job)
+    return iter((handle(job),))
+
+
+def is_final(resp: dict) -> bool:
+    return "ok" in resp
+
+
+def _write(out, resp: dict):
+    out.write(json.dumps(resp, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def _parse_job(line: str):
+    try:
+        job = json.loads(line)
+    except ValueError:
+        return None
+    return job if isinstance(job, dict) else None
+
+
+def _attach_bodies(job: dict, sizes: list, data: bytes) -> dict:
+    # os bytes já foram consumidos: o fluxo segue sincronizado, só este job falha
+    if not _valid_args(job.get("args") or []):
+        return {"id": job.get("id"), "invalid": ARGS_ERRO}
+    bodies = []
+    off = 0
+    for n in sizes:
+        bodies.append(data[off:off + n])
+        off += n
+
+    args = []
+    for a in job.get("args") or []:
+        args.append(bodies.pop(0) if a == "-" and bodies else a)
+    job["args"] = args + bodies
+    del job["bodies"]
+    return job
+
+
+class JobReader:
+    """
+    Separa o fluxo bruto do stdin em jobs: uma linha JSON e, se ela tiver
+    "bodies", os bytes dos PDFs logo em seguida. Jobs inválidos saem como None.
+
+    Com "bodies" malformado não há como achar o próximo job no fluxo: o job sai
+    como {"id", "invalid": mensagem} e o leitor para (broken), entregando só
+    o que já tinha separado antes dele. Já "args" inválido num job com
+    "bodies" só falha o próprio job: os bytes dele foram consumidos.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.job = None
+        self.sizes = None
+        self.need = 0
+        self.broken = False
+
+    def feed(self, chunk: bytes) -> list:
+        if self.broken:
+            return []
+        self.buf += chunk
+        out = []
+        while not self.broken:
+            if self.job is not None:
+                if len(self.buf) < self.need:
+                    break
+                data = bytes(self.buf[:self.need])
+                del self.buf[:self.need]
+                out.append(_attach_bodies(self.job, self.sizes, data))
+                self.job = None
+                continue
+
+            i = self.buf.find(b"\n")
+            if i < 0:
+                break
+            line = self.buf[:i].decode("utf-8", "replace").strip()
+            del self.buf[:i + 1]
+            if line:
+                self._line(line, out)
+        return out
+
+    def _line(self, line: str, out: list):
+        job = _parse_job(line)
+        sizes = job.get("bodies") if job else None
+        if not sizes:
+            out.append(job)
+            return
+        if not isinstance(sizes, list) or not all(
+                isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in sizes):
+            # sem os tamanhos não dá para achar o próximo job no fluxo
+            out.append({"id": job.get("id"), "invalid": "bodies inválido: esperado lista de tamanhos em bytes."})
+            self.broken = True
+            self.buf.clear()
+            return
+        self.job, self.sizes, self.need = job, sizes, sum(sizes)
+
+    def close(self) -> list:
+        out = []
+        if self.broken:
+            return out
+        if self.job is None:
+            line = self.buf.decode("utf-8", "replace").strip()
+            if line:
+                self._line(line, out)
+        if self.job is not None:
+            out.append({"id": self.job.get("id"), "truncated": True})
+            self.job = None
+        self.buf.clear()
+        return out
+
+
+def _job_response(job):
+    """Resposta imediata para jobs que não vão para o worker (None se for processar)."""
+    if job is None:
+        return {"id": None, "ok": False, "erro": "Job não é JSON válido."}
+    if job.get("truncated"):
+        return {"id": job.get("id"), "ok": False, "erro": "stdin terminou antes dos PDFs do job."}
+    if job.get("invalid"):
+        return {"id": job.get("id"), "ok": False, "erro": job["invalid"]}
+    return None
+
+
+def _read_jobs(reader: JobReader, inp_fd: int):
+    """Lê o que houver no fd; devolve (jobs, eof). Fluxo dessincronizado conta como eof."""
+    chunk = os.read(inp_fd, 1 << 20)
+    if not chunk:
+        return reader.close(), True
+    jobs = reader.feed(chunk)
+    return jobs, reader.broken
+
+
+def serve(inp_fd: int = 0, out=sys.stdout):
+    reader = JobReader()
+    eof = False
+    while not eof:
+        jobs, eof = _read_jobs(reader, inp_fd)
+        for job in jobs:
+            resp = _job_response(job)
+            if resp is None:
+                if job.get("op") == "stats":
+                    resp = {"id": job.get("id"), "ok": True, "result": {"workers": 0, "fila": 0}}
+                else:
+                    for resp in respond(job):
+                        _write(out, resp)
+                    continue
+            _write(out, resp)
+
+
+# ------------------ pool pré-forkado ------------------
+def rss_mb() -> float:
+    """RSS atual do processo em MB (pico, se /proc não estiver disponível)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker_loop(conn, max_jobs: int, max_rss_mb: float):
+    done = 0
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        for resp in respond(job):
+            if not is_final(resp):
+                conn.send((resp, False, False))
+        done += 1
+        retire = bool(
+            (max_jobs and done >= max_jobs)
+            or (max_rss_mb and rss_mb() >= max_rss_mb)
+        )
+        conn.send((resp, True, retire))
+        if retire:
+            break
+    conn.close()
+
+
+class _Worker:
+    __slots__ = ("proc", "conn", "job")
+
+    def __init__(self, proc, conn):
+        self.proc = proc
+        self.conn = conn
+        self.job = None
+
+
+class WorkerPool:
+    """
+    N processos filhos criados por fork, cada um atendendo um job por vez.
+    Jobs excedentes esperam numa fila FIFO (queue_depth).
+    """
+
+    def __init__(self, size: int, max_jobs: int = 0, max_rss_mb: float = 0):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self._ctx = multiprocessing.get_context("fork")
+        self._queue = deque()
+        # herdado pelo fork: N workers com OCR não sobem N x CPUs tesseracts
+        ocr.set_cpu_share(self.size)
+        self._workers = [self._spawn() for _ in range(self.size)]
+        self.processed = 0
+        self.recycled = 0
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_loop,
+            args=(child_conn, self.max_jobs, self.max_rss_mb),
+        )
+        proc.start()
+        child_conn.close()
+        return _Worker(proc, parent_conn)
+
+    def _replace(self, w: _Worker):
+        try:
+            w.conn.close()
+        except OSError:
+            pass
+        w.proc.join(timeout=5)
+        if w.proc.is_alive():
+            w.proc.kill()
+            w.proc.join()
+        self._workers[self._workers.index(w)] = self._spawn()
+        self.recycled += 1
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def busy(self) -> int:
+        return sum(1 for w in self._workers if w.job is not None)
+
+    def pending(self) -> bool:
+        return bool(self._queue) or self.busy > 0
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.size,
+            "ocupados": self.busy,
+            "fila": self.queue_depth,
+            "processados": self.processed,
+            "reciclados": self.recycled,
+        }
+
+    def submit(self, job: dict):
+        self._queue.append(job)
+        self._dispatch()
+
+    def _dispatch(self):
+        for w in self._workers:
+            if not self._queue:
+                return
+            if w.job is None:
+                job = self._queue.popleft()
+                w.job = job
+                w.conn.send(job)
+
+    def connections(self):
+        return [w.conn for w in self._workers if w.job is not None]
+
+    def collect(self, ready) -> list:
+        """
+        Recebe as respostas das conexões prontas (parciais de jobs em stream
+        inclusive) e redespacha a fila quando um job termina.
+        """
+        out = []
+        for w in list(self._workers):
+            if w.job is None or w.conn not in ready:
+                continue
+
+            while True:
+                try:
+                    resp, final, retire = w.conn.recv()
+                except (EOFError, OSError):
+                    resp = {
+                        "id": w.job.get("id"),
+                        "ok": False,
+                        "erro": f"Worker morreu (exit {w.proc.exitcode}).",
+                    }
+                    final = retire = True
+                out.append(resp)
+                if final or not w.conn.poll():
+                    break
+
+            if not final:
+                continue
+            w.job = None
+            self.processed += 1
+            if retire:
+                self._replace(w)
+
+        self._dispatch()
+        return out
+
+    def close(self):
+        for w in self._workers:
+            try:
+                w.conn.send(None)
+            except OSError:
+                pass
+        for w in self._workers:
+            w.proc.join(timeout=5)
+            if w.proc.is_alive():
+                w.proc.kill()
+                w.proc.join()
+
+
+def serve_pool(pool: WorkerPool, inp_fd: int = 0, out=sys.stdout):
+    reader = JobReader()
+    eof = False
+
+    # workers não são daemon: sem o close, um erro aqui deixa o pai preso no join
+    try:
+        while not eof or pool.pending():
+            waitables = pool.connections()
+            if not eof:
+                waitables.append(inp_fd)
+            ready = wait(waitables)
+
+            if inp_fd in ready:
+                jobs, eof = _read_jobs(reader, inp_fd)
+                for job in jobs:
+                    resp = _job_response(job)
+                    if resp is not None:
+                        _write(out, resp)
+                    elif job.get("op") == "stats":
+                        _write(out, {"id": job.get("id"), "ok": True, "result": pool.stats()})
+                    else:
+                        pool.submit(job)
+
+            for resp in pool.collect(ready):
+                _write(out, resp)
+    finally:
+        pool.close()
+
+
+# ------------------ main ------------------
+def main():
+    ap = argparse.ArgumentParser(description="Worker dos extratores de PDF.")
+    ap.add_argument("--serve", action="store_true",
+                    help="lê jobs NDJSON do stdin e responde NDJSON no stdout")
+    ap.add_argument("--workers", type=int, default=0,
+                    help="com --serve: tamanho do pool pré-forkado (0 = no próprio processo)")
+    ap.add_argument("--max-jobs", type=int, default=0,
+                    help="recicla o worker após N jobs (0 = sem limite)")
+    ap.add_argument("--max-rss-mb", type=float, default=0,
+                    help="recicla o worker quando o RSS passar de N MB (0 = sem limite)")
+    ap.add_argument("--cache-dir",
+                    help="cache de texto extraído (padrão: $EXTRACT_CACHE_DIR)")
+    ap.add_argument("--cache-max-mb", type=float, default=512,
+                    help="tamanho máximo do cache antes de despejar (LRU)")
+    ap.add_argument("--jobs", type=int,
+                    help="processos na extração por página (PDFs grandes)")
+    ap.add_argument("--layout", choices=pdf_io.LAYOUTS,
+                    help='"rows" refaz linhas e células das tabelas pela geometria das palavras (ou EXTRACT_LAYOUT)')
+    ap.add_argument("--inad-fast", action="store_true",
+                    help="da lista de inadimplentes extrai só a coluna das unidades (ou EXTRACT_INAD_FAST=1)")
+    ap.add_argument("--approx-units", action="store_true",
+                    help="casa também unidades grafadas diferente nos dois PDFs, pelos componentes "
+                         "(ou EXTRACT_UNIT_APPROX=1)")
+    ap.add_argument("--list-unmatched", action="store_true",
+                    help='inclui "sem_contato": unidades em débito sem contato (ou EXTRACT_LIST_UNMATCHED=1)')
+    ap.add_argument("--ocr", action="store_true",
+                    help="PDF escaneado (sem texto): OCR local com tesseract (ou EXTRACT_OCR=1)")
+    ap.add_argument("--ocr-dpi", type=int, help="resolução da renderização para o OCR (padrão 300)")
+    ap.add_argument("--concurrent", action="store_true",
+                    help="processa contatos e inadimplentes em processos separados (ou EXTRACT_CONCURRENT=1)")
+    ap.add_argument("--store", help="banco SQLite dos contatos parseados (ou EXTRACT_STORE)")
+    ap.add_argument("--condominio", help="sem --serve: id do condomínio no store")
+    ap.add_argument("--match-only", action="store_true",
+                    help="sem --serve: recebe só a lista de inadimplentes e cruza com os contatos gravados")
+    ap.add_argument("--diff", action="store_true",
+                    help="sem --serve: só os contatos novos desde a lista anterior do condomínio")
+    ap.add_argument("--timings", action="store_true",
+                    help="inclui tempos por etapa em debug (ou EXTRACT_TIMINGS=1)")
+    ap.add_argument("vendor", nargs="?", choices=sorted(VENDORS))
+    ap.add_argument("args", nargs="*")
+    opts = ap.parse_args()
+
+    if opts.jobs:
+        pdf_io.set_jobs(opts.jobs)
+    if opts.layout:
+        pdf_io.set_layout(opts.layout)
+    if opts.inad_fast:
+        pdf_io.set_inad_fast(True)
+    if opts.concurrent:
+        pdf_io.set_concurrent(True)
+    if opts.approx_units:
+        unit_match.set_approx(True)
+    if opts.list_unmatched:
+        unit_match.set_list_unmatched(True)
+    if opts.ocr:
+        ocr.set_enabled(True)
+    if opts.ocr_dpi:
+        ocr.set_dpi(opts.ocr_dpi)
+    if opts.timings:
+        timings.set_enabled(True)
+    if opts.cache_dir:
+        pdf_io.set_cache(pdf_io.TextCache(opts.cache_dir, int(opts.cache_max_mb * 1024 * 1024)))
+    if opts.store:
+        contact_store.set_path(opts.store)
+
+    if opts.serve:
+        if opts.workers > 0:
+            serve_pool(WorkerPool(opts.workers, opts.max_jobs, opts.max_rss_mb))
+        else:
+            serve()
+        return
+
+    if not opts.vendor:
+        ap.error("informe --serve ou vendor + PDFs")
+
+    resp = handle({
+        "vendor": opts.vendor,
+        "args": pdf_io.stdin_sources(opts.args),
+        "condominio": opts.condominio,
+        "match_only": opts.match_only,
+        "diff": opts.diff,
+    })
+    if not resp["ok"]:
+        print(json.dumps({"erro": resp["erro"]}, ensure_ascii=False))
+        sys.exit(1)
+    print(json.dumps(resp["result"], ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificação por linha para os parsers orientados a linha (Superlógica).
+
+Cada linha passa uma única vez pelo classificador, que devolve o tipo e, quando
+precisa olhar o conteúdo, os contatos já extraídos:
+    fim          "TOTAL DE CONTATOS..." (rodapé do relatório)
+    header       cabeçalho/rodapé de página do layout
+    unit_marker  início de unidade (match da regex do layout em .unit)
+    role         PROPRIETÁRIO / INQUILINO / SÍNDICO
+    contacts     tem telefone ou e-mail
+    name         sem contato, com letras e sem cara de número
+    text         o resto
+
+Os parsers só decidem o que fazer com cada tipo; ninguém mais roda regex de
+telefone/e-mail na mesma linha.
+"""
+
+import re
+from typing import Callable, Iterator, List, Match, NamedTuple, Optional, Pattern, Sequence
+
+from contact_scan import ContactScanner
+
+END = "fim"
+HEADER = "header"
+UNIT = "unit_marker"
+ROLE = "role"
+CONTACTS = "contacts"
+NAME = "name"
+TEXT = "text"
+
+ROLES = frozenset(("PROPRIETÁRIO", "PROPRIETARIO", "INQUILINO", "SÍNDICO", "SINDICO"))
+END_PREFIX = "TOTAL DE CONTATOS"
+# o mesmo fim de relatório visto no texto de uma página (linha que começa assim)
+END_RE = re.compile(rf"^[ \t]*{END_PREFIX}", re.M | re.I)
+
+_NON_DIGIT_RE = re.compile(r"\D")
+_ONLY_NUMBER_RE = re.compile(r"\d{8,14}")
+_LETTER_RE = re.compile(r"[A-ZÀ-Ü]")
+
+
+def report_end(page: str) -> Optional[int]:
+    """Offset da linha "TOTAL DE CONTATOS..." na página, se houver."""
+    m = END_RE.search(page)
+    return m.start() if m else None
+
+
+class Line(NamedTuple):
+    kind: str
+    text: str
+    up: str
+    unit: Optional[Match] = None   # match da regex de unidade (m.re diz qual)
+    phones: Sequence[str] = ()
+    emails: Sequence[str] = ()
+
+    def add_contacts_to(self, c):
+        c.add_phones(self.phones)
+        c.add_emails(self.emails)
+
+
+# sem passar pelo __new__ gerado (uma linha do PDF = uma tupla)
+_line = tuple.__new__
+
+
+class LineClassifier:
+    """
+    units: regexes de início de unidade, na ordem de prioridade
+    is_header: cabeçalhos do layout (recebe a linha em maiúsculas)
+    search: usa search() em vez de match() nas regexes de unidade
+    end: para em "TOTAL DE CONTATOS"
+    scan_units: extrai contatos também da linha de início de unidade
+    scan_rest: com False, linhas fora de unidade/cabeçalho/papel viram text sem varredura
+    """
+
+    __slots__ = ("contacts", "units", "is_header", "search", "end", "scan_units", "scan_rest")
+
+    def __init__(
+        self,
+        contacts: ContactScanner,
+        units: Sequence[Pattern] = (),
+        is_header: Optional[Callable[[str], bool]] = None,
+        search: bool = False,
+        end: bool = True,
+        scan_units: bool = False,
+        scan_rest: bool = True,
+    ):
+        self.contacts = contacts
+        self.units = tuple(units)
+        self.is_header = is_header
+        self.search = search
+        self.end = end
+        self.scan_units = scan_units
+        self.scan_rest = scan_rest
+
+    def classify(self, text: str, up: str) -> Line:
+        if self.end and up.startswith(END_PREFIX):
+            return _line(Line, (END, text, up, None, (), ()))
+        if self.is_header is not None and self.is_header(up):
+            return _line(Line, (HEADER, text, up, None, (), ()))
+
+        for rx in self.units:
+            m = rx.search(text) if self.search else rx.match(text)
+            if m:
+                if self.scan_units:
+                    phones, emails = self.contacts.scan(text)
+                    return _line(Line, (UNIT, text, up, m, phones, emails))
+                return _line(Line, (UNIT, text, up, m, (), ()))
+
+        if up in ROLES:
+            return _line(Line, (ROLE, text, up, None, (), ()))
+        if not self.scan_rest:
+            return _line(Line, (TEXT, text, up, None, (), ()))
+
+        phones, emails = self.contacts.scan(text)
+        if phones or emails:
+            return _line(Line, (CONTACTS, text, up, None, phones, emails))
+        if _ONLY_NUMBER_RE.fullmatch(_NON_DIGIT_RE.sub("", text)) or not _LETTER_RE.search(up):
+            return _line(Line, (TEXT, text, up, None, (), ()))
+        return _line(Line, (NAME, text, up, None, (), ()))
+
+    def lines(self, lines: List[str], upper_lines: List[str]) -> Iterator[Line]:
+        return map(self.classify, lines, upper_lines)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saída NDJSON em streaming dos extratores.
+
+Cada iter_run() produz os contatos casados um a um e termina com um registro
+"fim" (layouts, totais, debug, ou o erro). Em NDJSON cada contato vira uma linha
+assim que sai do parser e o registro "fim" é a última linha:
+    {"unidade": "AP 101 BL 1", "Nome": "...", "Telefone": [...], "Email": [...]}
+    ...
+    {"fim": true, "layouts": {...}, "totais": {...}}
+
+run() continua devolvendo o JSON único de sempre, montado a partir do mesmo fluxo.
+"""
+
+import json
+from typing import Dict, Iterable, List, Tuple
+
+TRAILER_KEY = "fim"
+
+
+def trailer(payload: Dict) -> Dict:
+    return {TRAILER_KEY: True, **payload}
+
+
+def is_trailer(rec: Dict) -> bool:
+    return rec.get(TRAILER_KEY) is True
+
+
+def collect(records: Iterable[Dict]) -> Tuple[List[Dict], Dict]:
+    """(contatos, trailer sem a marca "fim")."""
+    data = []
+    tail = {}
+    for rec in records:
+        if is_trailer(rec):
+            tail = {k: v for k, v in rec.items() if k != TRAILER_KEY}
+        else:
+            data.append(rec)
+    return data, tail
+
+
+def write_ndjson(records: Iterable[Dict], out) -> Dict:
+    """Escreve uma linha por registro; devolve o último (o "fim"), ou {}."""
+    rec = {}
+    for rec in records:
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+    return rec
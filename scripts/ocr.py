@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR local (Tesseract) para relatórios escaneados, opcional.
+
+Quando o texto extraído de um documento inteiro não chega a MIN_TEXT
+caracteres (o mesmo limite do erro "PDF parece ser imagem/scan"), as páginas
+sem texto são renderizadas pelo MuPDF no DPI configurado e passam pelo
+binário do tesseract (stdin → stdout, sem arquivo temporário). As páginas são
+divididas em faixas contíguas entre processos, como na extração paralela do
+pdf_io, e o texto de cada página fica no cache de texto endereçado pelo hash
+da imagem renderizada: o mesmo scan de novo (ou a mesma página em outro PDF)
+não volta para o OCR.
+
+Configuração por ambiente:
+    EXTRACT_OCR         "1" liga o OCR (ou --ocr)
+    EXTRACT_OCR_DPI     resolução da renderização (padrão 300, ou --ocr-dpi)
+    EXTRACT_OCR_LANG    idiomas do tesseract (padrão "por")
+    EXTRACT_OCR_JOBS    processos de OCR (padrão: as CPUs divididas entre os
+                        workers do pool, ver set_cpu_share)
+    TESSERACT_CMD       caminho do binário (padrão "tesseract")
+"""
+
+import hashlib
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence
+
+import fitz  # PyMuPDF
+
+import pdf_io
+import timings
+from pdf_io import Source
+
+# muda sempre que a renderização/chamada do tesseract mudar (entra na chave)
+OCR_VERSION = "tesseract-1"
+
+# abaixo disso (texto do documento, sem espaços nas pontas) o PDF é tratado como scan
+MIN_TEXT = 50
+
+ENABLED = os.environ.get("EXTRACT_OCR") == "1"
+DPI = int(os.environ.get("EXTRACT_OCR_DPI") or 300)
+LANG = os.environ.get("EXTRACT_OCR_LANG") or "por"
+JOBS = int(os.environ.get("EXTRACT_OCR_JOBS") or 0) or None
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD") or "tesseract"
+
+# processos que dividem as CPUs (workers do pool): cada um usa a sua parte
+_cpu_share = 1
+
+
+class OcrError(RuntimeError):
+    """Tesseract ausente ou falhou numa página."""
+
+
+def set_enabled(flag: bool):
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+def set_dpi(dpi: int):
+    global DPI
+    DPI = max(72, int(dpi))
+
+
+def set_cpu_share(n: int):
+    """n processos vão fazer OCR ao mesmo tempo (o pool, antes do fork)."""
+    global _cpu_share
+    _cpu_share = max(1, int(n))
+
+
+def default_jobs() -> int:
+    if JOBS:
+        return JOBS
+    return max(1, (os.cpu_count() or 1) // _cpu_share)
+
+
+# ------------------ uma página ------------------
+def render_png(page: fitz.Page, dpi: int) -> bytes:
+    # tons de cinza: o tesseract binariza de qualquer jeito e o PNG fica 3x menor
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes("png")
+
+
+def tesseract(png: bytes, dpi: int, lang: str) -> str:
+    try:
+        proc = subprocess.run(
+            [TESSERACT_CMD, "stdin", "stdout", "-l", lang, "--dpi", str(dpi)],
+            input=png,
+            capture_output=True,
+            check=False,
+        )
+    except OSError as e:
+        raise OcrError(f"tesseract não encontrado ({TESSERACT_CMD}): {e}") from e
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", "replace").strip()
+        raise OcrError(f"tesseract falhou: {err[-300:]}")
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def _image_key(png: bytes, lang: str) -> str:
+    return hashlib.sha256(f"{OCR_VERSION}:{lang}:".encode() + png).hexdigest()
+
+
+def ocr_page(page: fitz.Page, dpi: int, lang: str) -> str:
+    png = render_png(page, dpi)
+    key = _image_key(png, lang)
+    cache = pdf_io.get_cache()
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0]
+    text = pdf_io.normalize_page(tesseract(png, dpi, lang))
+    if cache is not None:
+        cache.put(key, [text])
+    return text
+
+
+def _ocr_indexes(path: Source, indexes: Sequence[int], dpi: int, lang: str) -> List[str]:
+    doc = pdf_io.open_pdf(path)
+    try:
+        return [ocr_page(doc[i], dpi, lang) for i in indexes]
+    finally:
+        doc.close()
+
+
+# ------------------ documento ------------------
+def ocr_indexes(path: Source, indexes: Sequence[int], jobs: int = None) -> List[str]:
+    """Texto das páginas `indexes`, em ordem, com o OCR dividido entre processos."""
+    jobs = default_jobs() if jobs is None else jobs
+    indexes = list(indexes)
+    parts = [indexes[a:b] for a, b in pdf_io.page_ranges(len(indexes), jobs)] if indexes else []
+    if len(parts) <= 1:
+        return _ocr_indexes(path, indexes, DPI, LANG)
+
+    timings.count("processos_ocr", len(parts))
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=len(parts), mp_context=ctx) as ex:
+        futures = [ex.submit(_ocr_indexes, path, part, DPI, LANG) for part in parts]
+        return [text for f in futures for text in f.result()]
+
+
+def fallback(path: Source, pages: List[str]) -> List[str]:
+    """
+    Com o OCR ligado e o documento sem texto (scan), troca as páginas vazias
+    pelo OCR delas. OCR ligado sem tesseract é erro de configuração: OcrError.
+    """
+    if not ENABLED or len("\n".join(pages).strip()) >= MIN_TEXT:
+        return pages
+    empty = [i for i, p in enumerate(pages) if not p.strip()]
+    if not empty:
+        return pages
+
+    timings.count("paginas_ocr", len(empty))
+    with timings.stage("ocr"):
+        texts = ocr_indexes(path, empty)
+
+    out = list(pages)
+    for i, text in zip(empty, texts):
+        out[i] = text
+    return out
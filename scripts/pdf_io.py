@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura de PDF compartilhada pelos extratores + cache de texto em disco.
+
+O cache é endereçado pelo conteúdo: chave = SHA-256 do arquivo + versão do
+extrator de texto. Guarda as páginas já normalizadas, então um PDF repetido
+(o mesmo "contatos" todo mês) não passa de novo pelo MuPDF/pdfplumber.
+
+PDFs grandes (a partir de EXTRACT_PARALLEL_MIN_PAGES páginas) podem ser
+extraídos em paralelo: cada processo abre o documento por conta própria,
+extrai uma faixa contígua de páginas e as faixas são concatenadas em ordem.
+
+Um documento pode ser um caminho ou os próprios bytes do PDF (aberto pela API
+de stream do MuPDF, sem passar por arquivo temporário). Na linha de comando,
+"-" no lugar de um caminho lê o próximo PDF do stdin: uma linha com o
+tamanho em bytes, seguida dos bytes do PDF.
+
+Configuração por ambiente:
+    EXTRACT_CACHE_DIR           diretório do cache (sem ele o cache fica desligado)
+    EXTRACT_CACHE_MAX_MB        tamanho máximo antes de despejar os menos usados (padrão 512)
+    EXTRACT_JOBS                processos na extração por página (padrão 1 = serial)
+    EXTRACT_PARALLEL_MIN_PAGES  abaixo disso fica serial mesmo com EXTRACT_JOBS > 1 (padrão 64)
+    EXTRACT_TIMINGS             "1" liga os tempos por etapa (ver timings.py)
+    EXTRACT_LAYOUT              "text" (padrão, get_text("text") do MuPDF) ou "rows"
+                                (linhas e células refeitas pela geometria das palavras)
+    EXTRACT_CONCURRENT          "1" processa contatos e inadimplentes em processos separados
+    EXTRACT_INAD_FAST           "1" extrai da lista de inadimplentes só a coluna das
+                                unidades, pulando páginas sem unidade (ver column_pages)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Iterator, List, Optional, Pattern, Sequence, Tuple, Union
+
+import fitz  # PyMuPDF
+
+import timings
+from text_doc import CELL_SEP
+
+# muda sempre que a extração/normalização do texto mudar
+FITZ_TEXT_VERSION = "fitz-text-1"
+FITZ_ROWS_VERSION = "fitz-rows-2"
+
+_WS_RE = re.compile(r"[ \t]+")
+_SPACES_RE = re.compile(r" +")
+
+
+# caminho no disco ou bytes do PDF
+Source = Union[str, bytes]
+
+
+# ------------------ documentos ------------------
+def is_stream(src: Source) -> bool:
+    return isinstance(src, (bytes, bytearray, memoryview))
+
+
+def open_pdf(src: Source) -> fitz.Document:
+    if is_stream(src):
+        return fitz.open(stream=src, filetype="pdf")
+    return fitz.open(src)
+
+
+def read_framed(stream: BinaryIO) -> bytes:
+    """Lê um PDF emoldurado: linha com o tamanho em bytes + os bytes."""
+    header = stream.readline()
+    if not header:
+        raise EOFError("stdin terminou antes do PDF")
+    size = int(header.strip())
+    body = stream.read(size)
+    if len(body) != size:
+        raise EOFError(f"PDF truncado no stdin ({len(body)} de {size} bytes)")
+    return body
+
+
+def stdin_sources(args: Sequence[Optional[str]], stream: Optional[BinaryIO] = None) -> List[Optional[Source]]:
+    """Troca cada "-" dos argumentos pelo próximo PDF do stdin, na ordem."""
+    if "-" not in args:
+        return list(args)
+    stream = stream or sys.stdin.buffer
+    return [read_framed(stream) if a == "-" else a for a in args]
+
+
+# ------------------ extração ------------------
+def normalize_page(t: str) -> str:
+    t = t.replace("\u00A0", " ")
+    return _WS_RE.sub(" ", t)
+
+
+def normalize_cells(t: str) -> str:
+    """normalize_page sem apagar o CELL_SEP entre as células."""
+    t = t.replace("\u00A0", " ")
+    return _SPACES_RE.sub(" ", t)
+
+
+# "text": ordem do fluxo de conteúdo do PDF. Em tabelas o MuPDF pode emendar
+# células de linhas vizinhas ou quebrar uma linha da tabela em várias, e os
+# parsers gastam regex recortando de novo (o "PDF colado").
+# "rows": cada linha visual da página (palavras com o mesmo topo) vira uma linha
+# de texto, com as colunas na ordem do x e CELL_SEP onde o espaço entre duas
+# palavras é de coluna (ver row_cells). Os parsers que recortavam o texto no
+# meio da linha (Superlógica APBL_NAO_ROTULADO, BRCondominios) leem as células
+# (TextDoc.rows) e contam com uma unidade por linha da tabela; os demais já
+# eram ancorados no começo da linha e leem as linhas refeitas.
+LAYOUTS = ("text", "rows")
+
+_layout = os.environ.get("EXTRACT_LAYOUT") or "text"
+
+# tolerância vertical (pt) para duas palavras ficarem na mesma linha; encadeada
+ROW_Y_TOLERANCE = 3
+# espaço entre palavras, em alturas da palavra, a partir do qual abre célula nova
+# (o espaço comum fica em ~0,3; dois espaços seguidos ainda ficam abaixo)
+CELL_GAP = 0.8
+
+
+def set_layout(name: str):
+    global _layout
+    if name not in LAYOUTS:
+        raise ValueError(f"layout de extração desconhecido: {name}")
+    _layout = name
+
+
+def layout() -> str:
+    return _layout
+
+
+def word_rows(page, tol: float = ROW_Y_TOLERANCE, clip=None) -> List[List[tuple]]:
+    """Palavras do MuPDF agrupadas por topo e, dentro da linha, ordenadas por x."""
+    words = page.get_text("words", clip=clip)
+    words.sort(key=lambda w: (w[1], w[0]))
+
+    rows = []
+    cur = []
+    last_top = None
+    for w in words:
+        if last_top is not None and w[1] - last_top > tol:
+            rows.append(cur)
+            cur = []
+        cur.append(w)
+        last_top = w[1]
+    if cur:
+        rows.append(cur)
+    for row in rows:
+        row.sort(key=lambda w: w[0])
+    return rows
+
+
+def rows_page_text(page, clip=None) -> str:
+    return "\n".join(" ".join(w[4] for w in row) for row in word_rows(page, clip=clip))
+
+
+def row_cells(row: List[tuple], gap: float = CELL_GAP) -> List[List[tuple]]:
+    """Palavras de uma linha (ordenadas por x) agrupadas em células pelo espaço entre elas."""
+    cells = [[row[0]]]
+    for prev, w in zip(row, row[1:]):
+        if w[0] - prev[2] > gap * (prev[3] - prev[1]):
+            cells.append([w])
+        else:
+            cells[-1].append(w)
+    return cells
+
+
+def cells_page_text(page, clip=None) -> str:
+    return "\n".join(
+        CELL_SEP.join(" ".join(w[4] for w in cell) for cell in row_cells(row))
+        for row in word_rows(page, clip=clip)
+    )
+
+
+def page_raw_text(page, clip=None) -> str:
+    if _layout == "rows":
+        return cells_page_text(page, clip)
+    return page.get_text("text", clip=clip)
+
+
+def normalize(t: str) -> str:
+    return normalize_cells(t) if _layout == "rows" else normalize_page(t)
+
+
+def text_version() -> str:
+    return FITZ_ROWS_VERSION if _layout == "rows" else FITZ_TEXT_VERSION
+
+
+def _fitz_range(path: Source, start: int, stop: int) -> List[str]:
+    doc = open_pdf(path)
+    try:
+        return [normalize(page_raw_text(doc[i])) for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _timed_pages(doc, t: timings.Timings) -> List[str]:
+    clock = time.perf_counter
+    out = []
+    for i, page in enumerate(doc):
+        t0 = clock()
+        raw = page_raw_text(page)
+        t1 = clock()
+        out.append(normalize(raw))
+        t2 = clock()
+        t.page(i, t1 - t0)
+        t.add("extracao", t1 - t0)
+        t.add("normalizacao", t2 - t1)
+    return out
+
+
+def fitz_pages(path: Source, jobs: Optional[int] = None) -> List[str]:
+    with timings.stage("abrir"):
+        doc = open_pdf(path)
+    try:
+        n = doc.page_count
+        if not use_parallel(n, jobs):
+            t = timings.current()
+            if t is not None:
+                return _timed_pages(doc, t)
+            return [normalize(page_raw_text(p)) for p in doc]
+    finally:
+        doc.close()
+    return map_page_ranges(path, n, _fitz_range, jobs)
+
+
+# ------------------ página a página, até o fim do relatório ------------------
+def iter_fitz_pages(path: Source) -> Iterator[str]:
+    """Páginas normalizadas uma a uma; fechar o gerador fecha o documento."""
+    with timings.stage("abrir"):
+        doc = open_pdf(path)
+    t = timings.current()
+    clock = time.perf_counter
+    try:
+        for i, page in enumerate(doc):
+            t0 = clock()
+            raw = page_raw_text(page)
+            t1 = clock()
+            text = normalize(raw)
+            if t is not None:
+                t.page(i, t1 - t0)
+                t.add("extracao", t1 - t0)
+                t.add("normalizacao", clock() - t1)
+            yield text
+    finally:
+        doc.close()
+
+
+def pages_until(pages: Iterator[str], end: Callable[[str], Optional[int]]) -> List[str]:
+    """
+    Consome as páginas até end(página) devolver o offset do rodapé do
+    relatório: essa página sai cortada ali e as seguintes (anexos) nem são
+    extraídas, o gerador é fechado.
+    """
+    out = []
+    try:
+        for text in pages:
+            cut = end(text)
+            if cut is not None:
+                out.append(text[:cut])
+                timings.count("fim_na_pagina", len(out) - 1)
+                break
+            out.append(text)
+    finally:
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+    return out
+
+
+def report_pages(path: Source, end: Callable[[str], Optional[int]], jobs: Optional[int] = None) -> List[str]:
+    """
+    Páginas até o rodapé do relatório. Serial, o MuPDF para no rodapé; com
+    extração em paralelo as faixas já foram distribuídas, então extrai tudo e
+    só corta. Sem jobs > 1 nem abre o PDF para contar as páginas.
+    """
+    jobs = _jobs if jobs is None else jobs
+    if jobs > 1 and use_parallel(page_count(path), jobs):
+        return pages_until(iter(fitz_pages(path, jobs)), end)
+    return pages_until(iter_fitz_pages(path), end)
+
+
+# ------------------ só a coluna das unidades (inadimplentes) ------------------
+# Da lista de inadimplentes só interessam as unidades: o resto da linha (nome,
+# valores, vencimentos) é texto que os parsers varrem à toa. A coluna é
+# aprendida na primeira página com unidade; dali em diante cada página sai
+# recortada nela e, se o recorte não tem unidade nenhuma, vira "" (capa, resumo,
+# totais). O MuPDF ainda interpreta a página inteira: o ganho é no volume de
+# texto normalizado e varrido, não na extração.
+FITZ_COLUMN_VERSION = "fitz-col-1"
+
+_inad_fast = os.environ.get("EXTRACT_INAD_FAST") == "1"
+
+# folga (pt) em volta das palavras da unidade; o MuPDF corta caracteres na borda
+COLUMN_MARGIN = 2.0
+
+
+def set_inad_fast(flag: bool):
+    global _inad_fast
+    _inad_fast = bool(flag)
+
+
+def inad_fast() -> bool:
+    return _inad_fast
+
+
+def unit_column(page, unit_re: Pattern, margin: float = COLUMN_MARGIN) -> Optional[fitz.Rect]:
+    """
+    Faixa vertical que cobre todas as palavras tocadas por um match de unit_re
+    (nas linhas refeitas pela geometria, em maiúsculas), na altura da página.
+
+    Vai até o primeiro caractere da palavra seguinte: as regex terminam em
+    "\\s*-\\s*" e sem nada depois da unidade o \\s* atravessa a quebra de linha
+    e come o começo da unidade de baixo.
+    """
+    x0 = x1 = None
+    for row in word_rows(page):
+        spans = []
+        pos = 0
+        for w in row:
+            spans.append((pos, pos + len(w[4]), w))
+            pos += len(w[4]) + 1
+        line = " ".join(w[4] for w in row).upper()
+        for m in unit_re.finditer(line):
+            for a, b, w in spans:
+                if b <= m.start():
+                    continue
+                if a >= m.end():
+                    right = w[0] + (w[2] - w[0]) / max(1, len(w[4]))
+                    x1 = right if x1 is None else max(x1, right)
+                    break
+                x0 = w[0] if x0 is None else min(x0, w[0])
+                x1 = w[2] if x1 is None else max(x1, w[2])
+    if x0 is None:
+        return None
+    r = page.rect
+    return fitz.Rect(max(r.x0, x0 - margin), r.y0, min(r.x1, x1 + margin), r.y1)
+
+
+# chave de cache das páginas recortadas (cada fornecedor acrescenta o seu nome)
+def column_version() -> str:
+    return f"{FITZ_COLUMN_VERSION}:{text_version()}"
+
+
+def column_pages(
+    path: Source,
+    probe: Callable[[List[str]], Union[Pattern, None, bool]],
+    check: Callable[[str, str], bool],
+) -> Optional[List[str]]:
+    """
+    Páginas da lista só com a coluna das unidades.
+
+    probe(páginas até aqui, inteiras) devolve a regex das unidades quando já
+    dá para aprender a coluna, None para continuar procurando ou False quando
+    o layout não tem coluna fixa (o resto sai inteiro). A regex tem que casar
+    tudo o que os parsers casam: página recortada sem match é descartada.
+
+    check(página inteira, recortada) confirma na página do aprendizado que o
+    recorte não perde unidade; se falhar devolve None e quem chamou extrai o
+    documento inteiro.
+    """
+    with timings.stage("abrir"):
+        doc = open_pdf(path)
+    try:
+        pages = []
+        unit_re = rect = None
+        learning = True
+        skipped = 0
+        with timings.stage("extracao"):
+            for page in doc:
+                if rect is not None:
+                    text = normalize(page_raw_text(page, rect))
+                    if unit_re.search(text.upper()) is None:
+                        text = ""
+                        skipped += 1
+                    pages.append(text)
+                    continue
+
+                text = normalize(page_raw_text(page))
+                pages.append(text)
+                if not learning:
+                    continue
+                unit_re = probe(pages)
+                if unit_re is False:
+                    learning = False
+                    continue
+                if unit_re is None:
+                    continue
+                rect = unit_column(page, unit_re)
+                if rect is None or not check(text, normalize(page_raw_text(page, rect))):
+                    timings.count("coluna", "recusada")
+                    return None
+    finally:
+        doc.close()
+
+    timings.count("coluna", "ok" if rect is not None else "sem_coluna")
+    timings.count("paginas_puladas", skipped)
+    return pages
+
+
+def page_count(path: Source) -> int:
+    doc = open_pdf(path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def pdf_pages(path: Source) -> List[str]:
+    """Páginas normalizadas via MuPDF, passando pelo cache quando configurado."""
+    return cached_pages(path, text_version(), fitz_pages)
+
+
+# ------------------ paralelismo por página ------------------
+PARALLEL_MIN_PAGES = int(os.environ.get("EXTRACT_PARALLEL_MIN_PAGES") or 64)
+
+_jobs = int(os.environ.get("EXTRACT_JOBS") or 1)
+
+
+def set_jobs(n: int):
+    global _jobs
+    _jobs = max(1, int(n))
+
+
+def use_parallel(n_pages: int, jobs: Optional[int] = None) -> bool:
+    jobs = _jobs if jobs is None else jobs
+    return jobs > 1 and n_pages >= PARALLEL_MIN_PAGES
+
+
+def page_ranges(n_pages: int, parts: int) -> List[Tuple[int, int]]:
+    parts = max(1, min(parts, n_pages))
+    size, extra = divmod(n_pages, parts)
+    out = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        out.append((start, stop))
+        start = stop
+    return out
+
+
+def map_page_ranges(
+    path: Source,
+    n_pages: int,
+    extract_range: Callable[[Source, int, int], List[str]],
+    jobs: Optional[int] = None,
+) -> List[str]:
+    """
+    Extrai as páginas [0, n_pages) com extract_range(path, start, stop),
+    dividindo em faixas contíguas entre processos quando vale a pena.
+    extract_range precisa ser uma função de módulo (vai por pickle, assim
+    como os bytes do PDF quando o documento veio em memória).
+    """
+    jobs = _jobs if jobs is None else jobs
+    if not use_parallel(n_pages, jobs):
+        return extract_range(path, 0, n_pages)
+
+    ranges = page_ranges(n_pages, jobs)
+    timings.count("processos", len(ranges))
+    ctx = multiprocessing.get_context("fork")
+    # os filhos não devolvem medições: aqui só o tempo de parede da extração inteira
+    with timings.stage("extracao"), \
+            ProcessPoolExecutor(max_workers=len(ranges), mp_context=ctx) as ex:
+        futures = [ex.submit(extract_range, path, a, b) for a, b in ranges]
+        return [page for f in futures for page in f.result()]
+
+
+# ------------------ documentos em paralelo ------------------
+# Contatos e inadimplentes são independentes até o filtro final: com
+# EXTRACT_CONCURRENT=1 (ou --concurrent) o pipeline de um deles (extração,
+# detecção, parser) roda num processo filho enquanto o chamador faz o outro.
+# Processo, não thread: o MuPDF segura o GIL durante a extração.
+_concurrent = os.environ.get("EXTRACT_CONCURRENT") == "1"
+
+
+def set_concurrent(flag: bool):
+    global _concurrent
+    _concurrent = bool(flag)
+
+
+def _cpus() -> int:
+    # com um núcleo só os dois processos disputam a mesma CPU: não compensa o fork
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _side_call(enabled: bool, fn: Callable, args: tuple):
+    timings.set_enabled(enabled)
+    t = timings.begin()
+    out = fn(*args)
+    return out, t.snapshot() if t is not None else None
+
+
+class _Done:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+class _Side:
+    __slots__ = ("_ex", "_future")
+
+    def __init__(self, fn: Callable, args: tuple):
+        ctx = multiprocessing.get_context("fork")
+        self._ex = ProcessPoolExecutor(max_workers=1, mp_context=ctx)
+        self._future = self._ex.submit(_side_call, timings.ENABLED, fn, args)
+
+    def result(self):
+        try:
+            with timings.stage("espera"):
+                out, snap = self._future.result()
+        finally:
+            self._ex.shutdown()
+        timings.merge(snap)
+        return out
+
+
+def side_call(fn: Callable, *args):
+    """
+    fn(*args) num processo filho (fork) quando EXTRACT_CONCURRENT está ligado,
+    senão ali mesmo; .result() devolve o valor (ou levanta o erro do filho).
+    As medições do filho entram no coletor do chamador. fn precisa ser uma
+    função de módulo e o resultado vai por pickle.
+    """
+    if not _concurrent or _cpus() < 2:
+        return _Done(fn(*args))
+    timings.count("processos_documento", 2)
+    return _Side(fn, args)
+
+
+# ------------------ cache ------------------
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_sha256(src: Source) -> str:
+    if is_stream(src):
+        return hashlib.sha256(src).hexdigest()
+    return file_sha256(src)
+
+
+class TextCache:
+    """
+    Cache LRU limitado por tamanho: um JSON por documento, em root/ab/<chave>.json.
+    O mtime marca o último uso; ao passar de max_bytes os mais antigos saem
+    (até LOW_WATER de max_bytes).
+
+    O tamanho total é estimado em memória (varredura na primeira escrita e
+    depois soma do que este processo grava); o diretório só é varrido de novo
+    quando a estimativa passa de max_bytes ou a última varredura tem mais de
+    RESCAN_SECS (outros processos gravam no mesmo cache).
+    """
+
+    RESCAN_SECS = 300
+    # ao despejar, desce até esta fração de max_bytes: a próxima varredura só
+    # vem depois de ~10% de escritas novas, não a cada página do OCR
+    LOW_WATER = 0.9
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size = None
+        self._scanned_at = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pages = json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pages
+
+    def put(self, key: str, pages: List[str]):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pages": pages}, f, ensure_ascii=False)
+            added = os.path.getsize(tmp)
+            try:
+                added -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+
+        if self._size is not None:
+            self._size += added
+            if self._size <= self.max_bytes and time.monotonic() - self._scanned_at < self.RESCAN_SECS:
+                return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for e in os.scandir(shard.path):
+                if not e.name.endswith(".json"):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+
+        self._scanned_at = time.monotonic()
+        if total > self.max_bytes:
+            target = int(self.max_bytes * self.LOW_WATER)
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+        self._size = total
+
+
+_cache = None
+_cache_loaded = False
+
+
+def set_cache(cache: Optional[TextCache]):
+    global _cache, _cache_loaded
+    _cache = cache
+    _cache_loaded = True
+
+
+def get_cache() -> Optional[TextCache]:
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        root = os.environ.get("EXTRACT_CACHE_DIR")
+        if root:
+            max_mb = float(os.environ.get("EXTRACT_CACHE_MAX_MB") or 512)
+            _cache = TextCache(root, int(max_mb * 1024 * 1024))
+        _cache_loaded = True
+    return _cache
+
+
+def cached_pages(path: Source, version: str, extract: Callable[[Source], List[str]]) -> List[str]:
+    cache = get_cache()
+    if cache is None:
+        pages = extract(path)
+        timings.count("paginas", len(pages))
+        return pages
+
+    with timings.stage("cache_hash"):
+        key = hashlib.sha256(f"{source_sha256(path)}:{version}".encode()).hexdigest()
+    with timings.stage("cache_get"):
+        pages = cache.get(key)
+    timings.count("cache", "miss" if pages is None else "hit")
+    if pages is None:
+        pages = extract(path)
+        with timings.stage("cache_put"):
+            cache.put(key, pages)
+    timings.count("paginas", len(pages))
+    return pages
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segmentação dos relatórios em blocos por unidade, em tempo linear.
+
+Os parsers de bloco usavam corpo preguiçoso em DOTALL com lookahead até o
+próximo marcador (`(.+?)(?=^\\s*...|\\Z)`): o lookahead roda a cada caractere do
+corpo e, com `^\\s*` atravessando linhas em branco, cada posição podia reler o
+resto do documento (quadrático em PDFs malformados). O PDF "colado" ainda
+passava antes por re.sub com lambda no texto inteiro, só para inserir quebras
+antes de cada marcador.
+
+Aqui um único finditer acha os marcadores de início de unidade e cada bloco é a
+fatia entre um marcador e o seguinte, entregue assim que o próximo aparece.
+Custo linear desde que o marcador seja "curto": começa ancorado (^ ou
+lookbehind de um caractere) e só consome corridas de dígitos/espaços e
+literais, sem .* nem lookahead de tamanho variável; assim cada posição do texto
+é examinada um número constante de vezes e o corpo nunca é relido pelo
+segmentador.
+"""
+
+from typing import Iterator, Match, Pattern, Tuple
+
+
+def segments(text: str, marker_re: Pattern) -> Iterator[Tuple[Match, str]]:
+    """(match do marcador, corpo até o próximo marcador ou o fim), em ordem."""
+    prev = None
+    for m in marker_re.finditer(text):
+        if prev is not None:
+            yield prev, text[prev.end():m.start()]
+        prev = m
+    if prev is not None:
+        yield prev, text[prev.end():]
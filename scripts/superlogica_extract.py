@@ -1,583 +1,574 @@
 import re
+import os
 import json
 import sys
-from typing import List, Dict, Set
-import fitz  # PyMuPDF
+import time
+import argparse
+from typing import Callable, List, Dict, Iterator, Optional, Set, Tuple
+
+import contact_store
+import ndjson_out
+import ocr
+import pdf_io
+from contact_record import Contato
+from contact_scan import SUPERLOGICA, scanner
+from segment import segments
+from line_class import CONTACTS, END, HEADER, NAME, ROLE, UNIT, LineClassifier, report_end
+import timings
+import unit_match
+from pdf_io import Source, pdf_pages
+from text_doc import CELL_SEP, TextDoc
+# regras de unidade pré-compiladas + memo; unit_key dá (bloco, ap, quadra, lote, casa)
+from unit_norm import normalize_superlogica as normalize_unidade
+from unit_norm import unit_key_superlogica as unit_key
+
+VENDOR = "superlogica"
 
 
 # ------------------ leitura PDF ------------------
-def pdf_text(path: str) -> str:
-    doc = fitz.open(path)
-    parts = []
-    for p in doc:
-        parts.append(p.get_text("text"))
-    doc.close()
-    t = "\n".join(parts)
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
-    return t
+def pdf_text(path: Source) -> str:
+    # páginas já vêm normalizadas (NBSP/espaços) e podem sair do cache
+    return "\n".join(pdf_pages(path))
 
 
-# ------------------ normalização unidade ------------------
-def norm_space(s: str) -> str:
-    s = (s or "").strip()
-    s = s.replace("\u00A0", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    return s.strip()
+# O relatório de contatos termina em "TOTAL DE CONTATOS": o que vem depois
+# (anexos) não é lido do PDF nem chega à detecção/parsers.
+def _contatos_pages(path: Source) -> List[str]:
+    return pdf_io.report_pages(path, report_end)
 
 
-def normalize_unidade(u: str) -> str:
-    s = norm_space(u).upper()
-    s = re.sub(r"[.,;:/\\|]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+def contatos_pages(path: Source) -> List[str]:
+    return pdf_io.cached_pages(path, f"{pdf_io.text_version()}:ate-fim", _contatos_pages)
 
-    s = (
-        s.replace("APARTAMENTO", "AP")
-         .replace("APTO", "AP")
-         .replace("BLOCO", "BL")
-         .replace("QUADRA", "QD")
-         .replace("LOTE", "LT")
-    )
 
-    s = re.sub(r"\bBL\s*0*(\d+)\b", r"BL \1", s)
-    s = re.sub(r"\bQD\s*0*([A-Z0-9]+)\b", r"QD \1", s)
-    s = re.sub(r"\bLT\s*0*([0-9]+[A-Z]?)\b", r"LT \1", s)
-    s = re.sub(r"\bCASA\s*0*(\d+)\b", r"CASA \1", s)
+def page_doc(pages: List[str]) -> TextDoc:
+    # no layout "rows" as páginas trazem as células (TextDoc.rows)
+    return TextDoc(pages, cells=pdf_io.layout() == "rows")
 
-    # 4-102 -> AP 102 BL 4
-    s = re.sub(r"\b0*(\d+)\s*-\s*0*(\d+)\b", r"AP \2 BL \1", s)
 
-    # BL 1 AP 102 -> AP 102 BL 1
-    s = re.sub(r"\bBL\s+0*(\d+)\s+AP\s+0*(\d+)\b", r"AP \2 BL \1", s)
+def pdf_doc(path: Source, pages_fn: Callable[[Source], List[str]] = pdf_pages) -> TextDoc:
+    # scan sem texto: com --ocr as páginas vazias passam pelo tesseract
+    pages = ocr.fallback(path, pages_fn(path))
+    with timings.stage("normalizacao"):
+        doc = page_doc(pages)
+    timings.count("texto_len", len(doc))
+    return doc
 
-    # AP 001 -> AP 1
-    s = re.sub(r"\bAP\s*0*(\d+)\b", r"AP \1", s)
 
-    # 104BL01 ou 104 BL01 -> AP 104 BL 1
-    s = re.sub(r"^\s*0*(\d{1,5})\s*BL\s*0*(\d{1,3})\b", r"AP \1 BL \2", s)
+# ------------------ normalização unidade ------------------
+_WS_TAB_RE = re.compile(r"[ \t]+")
 
-    # LT 5 QUADRA A -> QD A LT 5
-    s = re.sub(r"\bLT\s*0*([0-9]+[A-Z]?)\s+(?:QUADRA|QD)\s*([A-Z0-9]+)\b", r"QD \2 LT \1", s)
 
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+def norm_space(s: str) -> str:
+    s = (s or "").strip()
+    s = s.replace("\u00A0", " ")
+    s = _WS_TAB_RE.sub(" ", s)
+    return s.strip()
 
 
 # ------------------ detecção de layout ------------------
-def detect_layout(text: str) -> str:
-    t = (text or "").upper()
+# Contadores ancorados no início da linha. Uma regex só testa todos de uma vez
+# em cada início de linha (um lookahead opcional por contador, que registra onde
+# aquele padrão terminaria); pulando inícios de linha antes do fim do último
+# match de cada contador, o total é o mesmo de um re.findall no texto inteiro.
+_DET_LINE_PATTERNS = (
+    ("apbl_nrot_dash", r"^\s*0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*[A-ZÀ-Ü]"),
+    ("apbl_nrot", r"^\s*0*(\d{1,5})\s+0*(\d{1,3})\s+[A-ZÀ-Ü]"),
+    ("apbl_num_bl", r"^\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b"),
+    ("ap_sem_bl_dash", r"^\s*0*(\d{4})\s*-\s*[A-ZÀ-Ü]"),
+    ("ap_sem_bl_line", r"^\s*0*(\d{4})\s*(?=(?:-|[A-ZÀ-Ü]))"),
+    ("ap_bloco_palavra", r"^\s*0*\d{1,5}\s+BLOCO\s*0*\d{1,3}\b"),
+    ("lote_start", r"^\s*LOTE\b"),
+)
+_DET_LINE_NAMES = tuple(name for name, _ in _DET_LINE_PATTERNS)
+_DET_LINE_RE = re.compile(
+    # filtro barato: todos começam com espaço, dígito ou "L"
+    r"^(?=[ ]?[\d\sL])"
+    + "(?=" + "|".join(f"(?:{p})" for _, p in _DET_LINE_PATTERNS) + ")"
+    + "".join(f"(?:(?=(?P<{name}>{p}))|)" for name, p in _DET_LINE_PATTERNS),
+    re.M,
+)
+
+# Contadores sem âncora, num único scan incremental (os três não se sobrepõem).
+_DET_ANY_RE = re.compile(
+    r"\b(?:(?P<casa>CASA\s*0*\d+)|(?P<lote>(?:LT|LOTE)\s+\d+)|(?P<rot>AP\s*0*\d+\s+BL\s*0*\d+))\b"
+)
+_DET_QD_RE = re.compile(r"\bQD\s+[A-Z0-9]+\b")
+_DET_QD_LOOSE_RE = re.compile(r"\bQD\s*[A-Z0-9]+\b")
+
+# Early stop heurístico (opcional): um layout vence quando já tem esse tanto de
+# ocorrências e nenhum layout de prioridade maior apareceu nenhuma vez.
+DETECT_DECISIVE = 50
+
+# Detecção rápida (opcional): só as N primeiras páginas / early stop heurístico.
+DETECT_PAGES = int(os.environ.get("SUPERLOGICA_DETECT_PAGES") or 0)
+DETECT_FAST = os.environ.get("SUPERLOGICA_DETECT_FAST") == "1"
 
-    c_apbl_nrot_dash = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*[A-ZÀ-Ü]", t))
-    c_apbl_nrot = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+0*(\d{1,3})\s+[A-ZÀ-Ü]", t))
-    c_apbl_num_bl = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b", t))
-    c_apbl_rot_strict = len(re.findall(r"\bAP\s*0*\d+\s+BL\s*0*\d+\b", t))
 
-    c_ap_sem_bl_dash = len(re.findall(r"(?m)^\s*0*(\d{4})\s*-\s*[A-ZÀ-Ü]", t))
-    c_ap_sem_bl_line = len(re.findall(r"(?m)^\s*0*(\d{4})\s*(?=(?:-|[A-ZÀ-Ü]))", t))
+class _LayoutCounts:
+    __slots__ = (
+        "apbl_nrot_dash", "apbl_nrot", "apbl_num_bl", "ap_sem_bl_dash",
+        "ap_sem_bl_line", "ap_bloco_palavra", "lote_start",
+        "casa", "lote", "rot", "quadra", "bloco", "ap",
+    )
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
 
-    c_casa_any = len(re.findall(r"\bCASA\s*0*\d+\b", t))
-    c_lote = len(re.findall(r"\b(LT|LOTE)\s+\d+\b", t))
 
-    if c_casa_any >= 3:
-        if "QUADRA" in t or re.search(r"\bQD\s+[A-Z0-9]+\b", t):
+def _has_qd(t: str, end: int, loose: bool = False) -> bool:
+    pat = _DET_QD_LOOSE_RE if loose else _DET_QD_RE
+    return pat.search(t, 0, end) is not None
+
+
+def _decide(c: _LayoutCounts, t: str, end: int) -> str:
+    if c.casa >= 3:
+        if c.quadra or _has_qd(t, end):
             return "CASA_QD"
         return "CASA"
 
-    if c_ap_sem_bl_dash >= 5:
+    if c.ap_sem_bl_dash >= 5:
         return "AP_SEM_BLOCO"
 
-    if (c_apbl_nrot_dash + c_apbl_nrot) >= 5:
+    if (c.apbl_nrot_dash + c.apbl_nrot) >= 5:
         return "APBL_NAO_ROTULADO"
 
-    if c_apbl_num_bl >= 5:
+    if c.apbl_num_bl >= 5:
         return "APBL_NUM_BL"
 
-    if re.search(r"(?m)^\s*LOTE\b", t):
-        if "QUADRA" in t or re.search(r"\bQD\s*[A-Z0-9]+\b", t):
+    if c.lote_start:
+        if c.quadra or _has_qd(t, end, loose=True):
             return "QD_LT"
         return "LT"
 
-    if c_ap_sem_bl_line >= 8:
+    if c.ap_sem_bl_line >= 8:
         return "AP_SEM_BLOCO"
 
-    c_ap_bloco_palavra = len(re.findall(r"(?m)^\s*0*\d{1,5}\s+BLOCO\s*0*\d{1,3}\b", t))
-    if c_ap_bloco_palavra >= 5:
+    if c.ap_bloco_palavra >= 5:
         return "AP_BLOCO_PALAVRA"
 
-    if c_apbl_rot_strict >= 3 or ("BLOCO" in t and "AP" in t):
+    if c.rot >= 3 or (c.bloco and c.ap):
         return "APBL_ROTULADO"
 
-    if c_lote >= 3:
-        if "QUADRA" in t or re.search(r"\bQD\s+[A-Z0-9]+\b", t):
+    if c.lote >= 3:
+        if c.quadra or _has_qd(t, end):
             return "QD_LT"
         return "LT"
 
     return "DESCONHECIDO"
 
 
+def _settled(c: _LayoutCounts) -> bool:
+    """Resultado que nenhuma linha posterior muda (a 1ª regra já casou por completo)."""
+    return c.casa >= 3 and bool(c.quadra)
+
+
+def _decisive(c: _LayoutCounts) -> bool:
+    """Líder com folga e nenhuma regra de prioridade maior contada até aqui."""
+    if c.casa:
+        return _settled(c)
+    if c.ap_sem_bl_dash >= DETECT_DECISIVE:
+        return True
+    if c.ap_sem_bl_dash:
+        return False
+    if c.apbl_nrot_dash + c.apbl_nrot >= DETECT_DECISIVE:
+        return True
+    if c.apbl_nrot_dash + c.apbl_nrot:
+        return False
+    if c.apbl_num_bl >= DETECT_DECISIVE:
+        return True
+    if c.apbl_num_bl:
+        return False
+    if c.lote_start:
+        return c.lote_start >= DETECT_DECISIVE and bool(c.quadra)
+    if c.ap_sem_bl_line >= DETECT_DECISIVE:
+        return True
+    if c.ap_sem_bl_line:
+        return False
+    if c.ap_bloco_palavra >= DETECT_DECISIVE:
+        return True
+    if c.ap_bloco_palavra:
+        return False
+    return c.rot >= DETECT_DECISIVE
+
+
+def detect_layout(doc: TextDoc, max_pages: int = None, early_stop: bool = False) -> str:
+    """
+    Classifica o layout numa passada só pelas linhas do documento (só nas
+    max_pages primeiras páginas, se informado). Para assim que o resultado
+    não pode mais mudar; com early_stop=True para também quando um layout
+    está DETECT_DECISIVE ocorrências à frente.
+    """
+    t = doc.upper
+    end = doc.pages_end(max_pages)
+    end = len(t) if end is None else min(end, len(t))
+
+    c = _LayoutCounts()
+    next_pos = dict.fromkeys(_DET_LINE_NAMES, 0)
+
+    # flags de substring: basta a primeira ocorrência
+    quadra_at = t.find("QUADRA", 0, end)
+    bloco_at = t.find("BLOCO", 0, end)
+    ap_at = t.find("AP", 0, end)
+
+    # as duas varreduras avançam juntas, em ordem de posição
+    line_it = _DET_LINE_RE.finditer(t, 0, end)
+    any_it = _DET_ANY_RE.finditer(t, 0, end)
+    lm = next(line_it, None)
+    am = next(any_it, None)
+
+    stopped_at = end
+    n = 0
+    while lm is not None or am is not None:
+        if am is None or (lm is not None and lm.start() <= am.start()):
+            pos = lm.start()
+            for name in _DET_LINE_NAMES:
+                e = lm.end(name)
+                if e >= 0 and pos >= next_pos[name]:
+                    setattr(c, name, getattr(c, name) + 1)
+                    next_pos[name] = e
+            lm = next(line_it, None)
+        else:
+            pos = am.start()
+            setattr(c, am.lastgroup, getattr(c, am.lastgroup) + 1)
+            am = next(any_it, None)
+
+        n += 1
+        if n & 31:
+            continue
+        c.quadra = 0 <= quadra_at <= pos
+        if _decisive(c) if early_stop else _settled(c):
+            stopped_at = pos + 1
+            break
+
+    c.quadra = 0 <= quadra_at < stopped_at
+    c.bloco = 0 <= bloco_at < stopped_at
+    c.ap = 0 <= ap_at < stopped_at
+    return _decide(c, t, stopped_at)
+
+
 # ------------------ utilitários de contato ------------------
-EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
+# telefones saem canônicos (+55DDD... / só dígitos sem DDD), ver contact_scan
+_contacts = scanner(SUPERLOGICA)
+
+OWNER_ROLES = ("PROPRIETÁRIO", "PROPRIETARIO")
 
 
-def extract_emails(s: str) -> List[str]:
-    return EMAIL_RE.findall(s or "")
+def add_contacts(c: Contato, s: str):
+    """Telefones e e-mails do trecho numa única varredura."""
+    phones, emails = _contacts.scan(s)
+    c.add_phones(phones)
+    c.add_emails(emails)
 
 
-PHONE_RE = re.compile(
+# ------------------ marcadores de unidade (segment.segments) ------------------
+# "101 1 NOME" / "0101 01 - NOME" em qualquer ponto do texto (PDF colado, várias
+# unidades por linha; antes isso era re.sub quebrando a linha) ou "101 1 ..." no
+# começo da linha. Sobre o texto em maiúsculas.
+APBL_MARK_RE = re.compile(
     r"""
-    (?<!\d)
-    (?:\+?55\s*)?
-    (?:\(?\d{2}\)?\s*)?
-    (?:9\s*)?\d{4}[-\s]?\d{4}
-    (?!\d)
+    (?<!\d)0*(\d{1,5})\s+0*(\d{1,3})(?:\s*-\s*|\s+(?=[A-ZÀ-Ü]))
+    |
+    ^0*(\d{1,5})\s+0*(\d{1,3})\s+
     """,
-    re.VERBOSE
+    re.M | re.X
 )
+# linhas de inadimplência: "101 1 - NOME 300,00"
+APBL_DASH_RE = re.compile(r"(?<!\d)0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*")
+# "0101 - NOME"
+AP4_MARK_RE = re.compile(r"(?m)^[ \t]*(0*\d{4})\b")
+# "101 BL 01"
+APBL_NUM_BL_MARK_RE = re.compile(r"(?m)^[ \t]*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b")
 
+_PROPRIETARIO_RE = re.compile(r"\bPROPRIET[ÁA]RIO\b", re.I)
 
-def clean_phone(p: str) -> str:
-    p = (p or "").upper()
-    p = p.replace("PROPRIETARIO", "").replace("PROPRIETÁRIO", "")
-    p = re.sub(r"[^0-9()+\- ]+", " ", p)
-    p = re.sub(r"\s+", " ", p).strip()
-    return p
+# layout "rows" (TextDoc.rows): a unidade só no começo da linha da tabela, seguida
+# de traço, de outra célula ou de mais nada; nada de marcador no meio da linha.
+# Sobre as células juntadas por CELL_SEP.
+APBL_ROW_RE = re.compile(r"0*(\d{1,5})[ \t]+0*(\d{1,3})(?:[ \t]*-[ \t]*|[ \t]+|$)")
+APBL_ROW_DASH_RE = re.compile(r"0*(\d{1,5})[ \t]+0*(\d{1,3})[ \t]*-")
+# o resto da linha e as linhas seguintes, célula a célula
+_apbl_cells = LineClassifier(_contacts, end=False)
 
 
-def extract_phones(s: str) -> List[str]:
-    s = (s or "").replace("\n", " ")
-    matches = PHONE_RE.findall(s)
-    cleaned = [clean_phone(m) for m in matches]
-
+# ------------------ parsers ------------------
+def parse_contatos_apbl_sem_rotulo(doc: TextDoc) -> List[Contato]:
     out = []
-    seen = set()
-    for p in cleaned:
-        digits = re.sub(r"\D", "", p)
-        if len(digits) == 14:
-            continue
-        if len(digits) < 8:
-            continue
-        if p and p not in seen:
-            seen.add(p)
-            out.append(p)
+    for m, body in segments(doc.upper, APBL_MARK_RE):
+        ap = m.group(1) or m.group(3)
+        bl = m.group(2) or m.group(4)
+        unidade = f"AP {int(ap)} BL {int(bl)}"
+        first_line = body.partition("\n")[0].strip()
+        nome = _PROPRIETARIO_RE.sub("", first_line).strip()
+
+        c = Contato(normalize_unidade(unidade), nome.title())
+        add_contacts(c, body)
+        out.append(c)
     return out
 
 
-def dedupe_list(xs: List[str]) -> List[str]:
-    seen = set()
+def parse_contatos_apbl_rows(doc: TextDoc) -> List[Contato]:
+    """
+    APBL_NAO_ROTULADO pelas células: a unidade abre a linha e as demais células
+    (dela e das linhas seguintes, até a próxima unidade) são classificadas uma
+    a uma. A primeira com cara de nome é o nome, o papel fica de fora e
+    telefones/e-mails saem de cada célula.
+    """
     out = []
-    for x in xs:
-        x = (x or "").strip()
-        if not x:
-            continue
-        if x in seen:
+    c = None
+    for cells in doc.rows:
+        row = CELL_SEP.join(cells).upper()
+        m = APBL_ROW_RE.match(row)
+        if m:
+            c = Contato(normalize_unidade(f"AP {int(m.group(1))} BL {int(m.group(2))}"), "")
+            out.append(c)
+            row = row[m.end():]
+        elif c is None:
             continue
-        seen.add(x)
-        out.append(x)
-    return out
-
-
-# ------------------ força quebras (pra PDF colado) ------------------
-def force_breaks_apbl_sem_rotulo(text: str) -> str:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
 
-    t = re.sub(
-        r"(^|[^\d])0*(\d{1,5})\s+0*(\d{1,3})\s+([A-ZÀ-Ü])",
-        lambda m: f"{m.group(1)}\n{m.group(2)} {m.group(3)} {m.group(4)}",
-        t,
-        flags=re.I
-    )
-    t = re.sub(
-        r"(^|[^\d])0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*",
-        lambda m: f"{m.group(1)}\n{m.group(2)} {m.group(3)} - ",
-        t,
-        flags=re.I
-    )
-    return t
+        for cell in row.split(CELL_SEP):
+            cell = cell.strip()
+            if not cell:
+                continue
+            ln = _apbl_cells.classify(cell, cell)
+            if ln.kind == CONTACTS:
+                ln.add_contacts_to(c)
+            elif ln.kind == NAME and not c.nome:
+                c.nome = _PROPRIETARIO_RE.sub("", cell).strip().title()
+    return out
 
 
-# ------------------ parsers ------------------
-def parse_contatos_apbl_sem_rotulo(text: str) -> List[Dict]:
-    t = force_breaks_apbl_sem_rotulo(text).upper()
-    block_re = re.compile(
-        r"^0*(\d{1,5})\s+0*(\d{1,3})\s+(.+?)(?=^\s*0*\d{1,5}\s+0*\d{1,3}\s+|\Z)",
-        re.M | re.S
+def _header_ap_bloco_palavra(up: str) -> bool:
+    return (
+        "CONTATOS DAS UNIDADES" in up or "TIPO DO CONTATO" in up
+        or up.startswith("UNIDADE") or "NOME/TELEFONE" in up
+        or (up.startswith("W0") and "CONDOMINIO" in up)
     )
 
-    out = []
-    for ap, bl, body in block_re.findall(t):
-        unidade = f"AP {int(ap)} BL {int(bl)}"
-        first_line = (body.split("\n")[0] or "").strip()
-        nome = re.sub(r"\bPROPRIET[ÁA]RIO\b", "", first_line, flags=re.I).strip()
-
-        out.append({
-            "unidade": normalize_unidade(unidade),
-            "Nome": nome.title(),
-            "Telefone": dedupe_list(extract_phones(body)),
-            "Email": dedupe_list(extract_emails(body)),
-        })
-    return out
-
-
-def parse_contatos_ap_bloco_palavra(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
 
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_contatos_ap_bloco_palavra(doc: TextDoc) -> List[Contato]:
     out = []
     re_unit = re.compile(r"^\s*0*(\d{1,5})\s+BLOCO\s*0*(\d{1,3})\s*$", re.I)
+    lc = LineClassifier(_contacts, units=(re_unit,), is_header=_header_ap_bloco_palavra)
     cur = None
 
     def flush():
         nonlocal cur
         if not cur:
             return
-        cur["Telefone"] = dedupe_list(cur["Telefone"])
-        cur["Email"] = dedupe_list(cur["Email"])
         out.append(cur)
         cur = None
 
-    for line in lines:
-        up = line.upper().strip()
-
-        if "CONTATOS DAS UNIDADES" in up or "TIPO DO CONTATO" in up:
-            continue
-        if up.startswith("UNIDADE") or "NOME/TELEFONE" in up:
-            continue
-        if up.startswith("W0") and "CONDOMINIO" in up:
-            continue
-        if up.startswith("TOTAL DE CONTATOS"):
+    for ln in lc.lines(doc.lines, doc.upper_lines):
+        kind = ln.kind
+        if kind is END:
             break
+        if kind is HEADER:
+            continue
 
-        m = re_unit.match(line)
-        if m:
+        if kind is UNIT:
             flush()
-            ap = int(m.group(1))
-            bl = int(m.group(2))
-            cur = {
-                "unidade": normalize_unidade(f"AP {ap} BL {bl}"),
-                "Nome": "",
-                "Telefone": [],
-                "Email": [],
-            }
+            ap = int(ln.unit.group(1))
+            bl = int(ln.unit.group(2))
+            cur = Contato(normalize_unidade(f"AP {ap} BL {bl}"))
             continue
 
         if not cur:
             continue
 
-        if up in ("PROPRIETÁRIO", "PROPRIETARIO"):
+        if kind is ROLE and ln.up in OWNER_ROLES:
             flush()
             continue
 
-        if not cur["Nome"]:
-            cur["Nome"] = line.title().strip()
+        if not cur.nome:
+            cur.nome = ln.text.title().strip()
             continue
 
-        cur["Email"].extend(extract_emails(line))
-        cur["Telefone"].extend(extract_phones(line))
-
-        for d in re.findall(r"\b\d{8,9}\b", line):
-            if len(d) == 9 and d.startswith("9"):
-                cur["Telefone"].append(d)
-            elif len(d) == 8 and d[0] in "2345":
-                cur["Telefone"].append(d)
+        ln.add_contacts_to(cur)
 
     flush()
     return out
 
 
-def parse_contatos_casa_lines(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
+def _header_casa(up: str) -> bool:
+    return (
+        "MOURA CONDOM" in up or "ATENDIMENTO@" in up
+        or "CONTATOS DAS UNIDADES" in up or "NOME/TELEFONE" in up
+        or up.startswith("UNIDADE") or up.startswith("STATUS DA UNIDADE")
+    )
+
 
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_contatos_casa_lines(doc: TextDoc) -> List[Contato]:
     out = []
     cur = None
     re_start = re.compile(r"^\s*CASA\s*0*(\d+)\b\s*(.*)$", re.I)
-
-    def is_probably_name(s: str) -> bool:
-        up = (s or "").upper().strip()
-        if not up:
-            return False
-        if up in ("PROPRIETÁRIO", "PROPRIETARIO", "INQUILINO", "SÍNDICO", "SINDICO"):
-            return False
-        if "CONTATOS DAS UNIDADES" in up or "NOME/TELEFONE" in up or up.startswith("UNIDADE"):
-            return False
-        if up.startswith("STATUS DA UNIDADE"):
-            return False
-        if up.startswith("TOTAL DE CONTATOS"):
-            return False
-        if re.fullmatch(r"\d{8,14}", re.sub(r"\D", "", s or "")):
-            return False
-        if extract_phones(s) or extract_emails(s):
-            return False
-        return bool(re.search(r"[A-ZÀ-Ü]", up))
+    lc = LineClassifier(_contacts, units=(re_start,), is_header=_header_casa, scan_units=True)
 
     def flush():
         nonlocal cur
         if not cur:
             return
-        cur["Telefone"] = dedupe_list(cur["Telefone"])
-        cur["Email"] = dedupe_list(cur["Email"])
         out.append(cur)
         cur = None
 
-    for line in lines:
-        up = line.upper().strip()
-
-        if up.startswith("TOTAL DE CONTATOS"):
+    for ln in lc.lines(doc.lines, doc.upper_lines):
+        kind = ln.kind
+        if kind is END:
             break
-        if "MOURA CONDOM" in up or "ATENDIMENTO@" in up:
+        if kind is HEADER:
             continue
 
-        m = re_start.match(line)
-        if m:
+        if kind is UNIT:
             flush()
+            m = ln.unit
             casa_n = int(m.group(1))
             rest = (m.group(2) or "").strip()
             rest = rest.lstrip("-–— ").strip()
             rest = re.sub(r"\bPROPRIET[ÁA]RIO\b", "", rest, flags=re.I).strip()
 
-            cur = {
-                "unidade": normalize_unidade(f"CASA {casa_n}"),
-                "Nome": (rest.title() if rest else ""),
-                "Telefone": [],
-                "Email": [],
-            }
-
-            cur["Telefone"].extend(extract_phones(line))
-            cur["Email"].extend(extract_emails(line))
+            cur = Contato(normalize_unidade(f"CASA {casa_n}"), rest.title() if rest else "")
+            ln.add_contacts_to(cur)
             continue
 
         if not cur:
             continue
 
-        if not cur["Nome"] and is_probably_name(line):
-            cur["Nome"] = line.title().strip()
+        if kind is NAME and not cur.nome:
+            cur.nome = ln.text.title().strip()
             continue
 
-        if up in ("PROPRIETÁRIO", "PROPRIETARIO", "INQUILINO", "SÍNDICO", "SINDICO"):
-            continue
-
-        cur["Telefone"].extend(extract_phones(line))
-        cur["Email"].extend(extract_emails(line))
-
-        for d in re.findall(r"\b\d{8,9}\b", line):
-            if len(d) == 9 and d.startswith("9"):
-                cur["Telefone"].append(d)
-            elif len(d) == 8 and d[0] in "2345":
-                cur["Telefone"].append(d)
+        ln.add_contacts_to(cur)
 
     flush()
     return out
 
 
-def parse_contatos_casa_qd_lines(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
+def _header_casa_qd(up: str) -> bool:
+    return _header_casa(up) or "TIPO DO CONTATO" in up or "UTTIL ADMINISTRAÇÃO" in up
+
 
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_contatos_casa_qd_lines(doc: TextDoc) -> List[Contato]:
     out = []
     cur = None
 
     re_casa = re.compile(r"^\s*CASA\s*0*(\d+)\s*$", re.I)
     re_qd = re.compile(r"^\s*(?:QUADRA|QD)\s*0*([A-Z0-9]+)\s*$", re.I)
-
-    def is_probably_name(s: str) -> bool:
-        up = (s or "").upper().strip()
-        if not up:
-            return False
-        if up in ("PROPRIETÁRIO", "PROPRIETARIO", "INQUILINO", "SÍNDICO", "SINDICO"):
-            return False
-        if "CONTATOS DAS UNIDADES" in up or "NOME/TELEFONE" in up or up.startswith("UNIDADE"):
-            return False
-        if up.startswith("STATUS DA UNIDADE"):
-            return False
-        if up.startswith("TOTAL DE CONTATOS"):
-            return False
-        if re.fullmatch(r"\d{8,14}", re.sub(r"\D", "", s or "")):
-            return False
-        if extract_phones(s) or extract_emails(s):
-            return False
-        return bool(re.search(r"[A-ZÀ-Ü]", up))
+    lc = LineClassifier(_contacts, units=(re_casa, re_qd), is_header=_header_casa_qd)
 
     def flush():
         nonlocal cur
         if not cur:
             return
-        cur["Telefone"] = dedupe_list(cur["Telefone"])
-        cur["Email"] = dedupe_list(cur["Email"])
         out.append(cur)
         cur = None
 
-    for line in lines:
-        up = line.upper().strip()
-
-        if up.startswith("TOTAL DE CONTATOS"):
+    for ln in lc.lines(doc.lines, doc.upper_lines):
+        kind = ln.kind
+        if kind is END:
             break
-        if "CONTATOS DAS UNIDADES" in up or "TIPO DO CONTATO" in up:
-            continue
-        if up.startswith("UNIDADE") or "NOME/TELEFONE" in up:
-            continue
-        if "MOURA CONDOM" in up or "ATENDIMENTO@" in up:
-            continue
-        if "UTTIL ADMINISTRAÇÃO" in up:
+        if kind is HEADER:
             continue
 
-        m_casa = re_casa.match(line)
-        if m_casa:
+        if kind is UNIT and ln.unit.re is re_casa:
             flush()
-            casa_n = int(m_casa.group(1))
-            cur = {
-                "unidade": normalize_unidade(f"CASA {casa_n}"),
-                "Nome": "",
-                "Telefone": [],
-                "Email": [],
-            }
+            casa_n = int(ln.unit.group(1))
+            cur = Contato(normalize_unidade(f"CASA {casa_n}"))
             continue
 
         if not cur:
             continue
 
-        m_qd = re_qd.match(line)
-        if m_qd:
-            qd = m_qd.group(1)
-            cur["unidade"] = normalize_unidade(f'{cur["unidade"]} QD {qd}')
-            continue
-
-        if up in ("PROPRIETÁRIO", "PROPRIETARIO", "INQUILINO", "SÍNDICO", "SINDICO"):
+        if kind is UNIT:
+            qd = ln.unit.group(1)
+            cur.unidade = normalize_unidade(f"{cur.unidade} QD {qd}")
             continue
 
-        if not cur["Nome"] and is_probably_name(line):
-            cur["Nome"] = line.title().strip()
+        if kind is NAME and not cur.nome:
+            cur.nome = ln.text.title().strip()
             continue
 
-        cur["Telefone"].extend(extract_phones(line))
-        cur["Email"].extend(extract_emails(line))
-
-        for d in re.findall(r"\b\d{8,9}\b", line):
-            if len(d) == 9 and d.startswith("9"):
-                cur["Telefone"].append(d)
-            elif len(d) == 8 and d[0] in "2345":
-                cur["Telefone"].append(d)
+        ln.add_contacts_to(cur)
 
     flush()
     return out
 
 
-def parse_contatos_rotulado(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = re.sub(r"[ \t]+", " ", t)
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_contatos_rotulado(doc: TextDoc) -> List[Contato]:
     out = []
     cur = None
 
     unit_re = re.compile(r"\b(AP\s*\d+)\s+(BL\s*\d+)\b", re.I)
+    lc = LineClassifier(_contacts, units=(unit_re,), search=True, end=False)
 
     def flush():
         nonlocal cur
         if not cur:
             return
-        cur["Telefone"] = dedupe_list(cur["Telefone"])
-        cur["Email"] = dedupe_list(cur["Email"])
         out.append(cur)
         cur = None
 
-    for line in lines:
-        m = unit_re.search(line)
-        if m:
+    for ln in lc.lines(doc.lines, doc.upper_lines):
+        if ln.kind is UNIT:
             flush()
+            m = ln.unit
             unidade = normalize_unidade(f"{m.group(1)} {m.group(2)}")
-            nome = unit_re.sub("", line).strip(" -–—:").strip()
-            cur = {"unidade": unidade, "Nome": nome, "Telefone": [], "Email": []}
+            nome = unit_re.sub("", ln.text).strip(" -–—:").strip()
+            cur = Contato(unidade, nome)
             continue
 
         if not cur:
             continue
 
-        cur["Email"].extend(extract_emails(line))
-        cur["Telefone"].extend(extract_phones(line))
+        ln.add_contacts_to(cur)
 
     flush()
     return out
 
 
-def parse_contatos_ap_sem_bloco(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
-
-    t = re.sub(r"(?m)^\s*(0*\d{4})\b", r"\n\1", t)
-    t = re.sub(r"\n{2,}", "\n", t).strip()
-
-    block_re = re.compile(
-        r"(?m)^\s*(0*\d{4})\s*(.*?)(?=^\s*0*\d{4}\b|\Z)",
-        re.S
-    )
-
+def parse_contatos_ap_sem_bloco(doc: TextDoc) -> List[Contato]:
     out = []
-    for raw_ap, body in block_re.findall(t):
-        ap = int(raw_ap)
+    for m, body in segments(doc.text, AP4_MARK_RE):
+        ap = int(m.group(1))
         unidade = normalize_unidade(f"AP {ap}")
 
-        body_clean = (body or "").strip()
+        body_clean = body.strip()
         lines = [norm_space(x) for x in body_clean.splitlines() if norm_space(x)]
         nome = ""
         if lines:
-            nome = re.sub(r"\bPROPRIET[ÁA]RIO\b", "", lines[0], flags=re.I).strip()
+            nome = _PROPRIETARIO_RE.sub("", lines[0]).strip()
 
-        out.append({
-            "unidade": unidade,
-            "Nome": nome.title(),
-            "Telefone": dedupe_list(extract_phones(body_clean)),
-            "Email": dedupe_list(extract_emails(body_clean)),
-        })
+        c = Contato(unidade, nome.title())
+        add_contacts(c, body_clean)
+        out.append(c)
 
     return out
 
 
-def parse_contatos_unit_in_line(text: str, unit_regex: re.Pattern, unit_builder) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = re.sub(r"[ \t]+", " ", t)
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_contatos_unit_in_line(doc: TextDoc, unit_regex: re.Pattern, unit_builder) -> List[Contato]:
     out = []
+    lc = LineClassifier(_contacts, units=(unit_regex,), search=True, end=False,
+                        scan_units=True, scan_rest=False)
 
-    for line in lines:
-        m = unit_regex.search(line)
-        if not m:
+    for ln in lc.lines(doc.lines, doc.upper_lines):
+        if ln.kind is not UNIT:
             continue
 
-        unidade = normalize_unidade(unit_builder(m))
-        nome = unit_regex.sub("", line).strip(" -–—:").strip()
+        unidade = normalize_unidade(unit_builder(ln.unit))
+        nome = unit_regex.sub("", ln.text).strip(" -–—:").strip()
 
-        out.append({
-            "unidade": unidade,
-            "Nome": nome,
-            "Telefone": dedupe_list(extract_phones(line)),
-            "Email": dedupe_list(extract_emails(line)),
-        })
+        c = Contato(unidade, nome)
+        ln.add_contacts_to(c)
+        out.append(c)
 
     return out
 
 
-def parse_contatos_apbl_num_bl(text: str) -> List[Dict]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t)
-
-    block_re = re.compile(
-        r"(?m)^\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b\s*(.*?)(?=^\s*0*\d{1,5}\s+BL\s*0*\d{1,3}\b|\Z)",
-        re.S
-    )
-
+def parse_contatos_apbl_num_bl(doc: TextDoc) -> List[Contato]:
     out = []
-    for ap, bl, body in block_re.findall(t):
-        unidade = normalize_unidade(f"AP {int(ap)} BL {int(bl)}")
-        body_clean = (body or "").strip()
+    for m, body in segments(doc.text, APBL_NUM_BL_MARK_RE):
+        unidade = normalize_unidade(f"AP {int(m.group(1))} BL {int(m.group(2))}")
+        body_clean = body.strip()
         lines = [norm_space(x) for x in body_clean.splitlines() if norm_space(x)]
 
         nome = ""
@@ -585,111 +576,116 @@ def parse_contatos_apbl_num_bl(text: str) -> List[Dict]:
             up = ln.upper()
             if "PROPRIET" in up:
                 continue
-            if extract_phones(ln) or extract_emails(ln):
+            if _contacts.has_contact(ln):
                 continue
             nome = ln
             break
 
-        out.append({
-            "unidade": unidade,
-            "Nome": (nome or "").title(),
-            "Telefone": dedupe_list(extract_phones(body_clean)),
-            "Email": dedupe_list(extract_emails(body_clean)),
-        })
+        c = Contato(unidade, (nome or "").title())
+        add_contacts(c, body_clean)
+        out.append(c)
 
     return out
 
 
 # ------------------ inadimplência ------------------
-def parse_inad_apbl_sem_rotulo(text: str) -> Set[str]:
-    t = force_breaks_apbl_sem_rotulo(text).upper()
-    re_line = re.compile(r"^0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*", re.M)
-
+INAD_AP_BLOCO_RE = re.compile(r"^\s*0*(\d{1,5})\s+BLOCO\s*0*(\d{1,3})\s*-\s*", re.M)
+INAD_AP_BL_RE = re.compile(r"(?:^|\n)\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\s*-\s*")
+INAD_BL_AP_DASH_RE = re.compile(r"\b0*(\d+)\s*-\s*0*(\d+)\b")
+INAD_AP4_DASH_RE = re.compile(r"^\s*0*(\d{4})\s*-\s*[A-ZÀ-Ü]", re.M)
+INAD_AP4_RE = re.compile(r"^\s*0*(\d{4})\s*(?=(?:-|[A-ZÀ-Ü]))", re.M)
+INAD_LOTE_RE = re.compile(r"^\s*LOTE\s+0*([0-9]+[A-Z]?)\s*-\s*", re.M)
+INAD_LOTE_QD_RE = re.compile(r"^\s*LOTE\s+0*([0-9]+[A-Z]?)\s+(?:QUADRA|QD)\s*([A-Z0-9]+)\s*-\s*", re.M)
+INAD_CASA_RE = re.compile(r"\bCASA\s*0*(\d+)\b")
+INAD_CASA_QD_RE = re.compile(r"\bCASA\s*0*(\d+)\s+(?:QUADRA|QD)\s*0*([A-Z0-9]+)\b", re.I)
+INAD_CASA_LINE_RE = re.compile(r"^\s*CASA\s*0*(\d+)\b", re.I)
+INAD_QD_LINE_RE = re.compile(r"^\s*(?:QUADRA|QD)\s*0*([A-Z0-9]+)\b", re.I)
+
+
+def parse_inad_apbl_sem_rotulo(doc: TextDoc) -> Set[str]:
     s = set()
-    for ap, bl in re_line.findall(t):
+    for ap, bl in APBL_DASH_RE.findall(doc.upper):
         s.add(normalize_unidade(f"AP {int(ap)} BL {int(bl)}"))
     return s
 
 
-def parse_inad_ap_bloco_palavra(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t).upper()
+def parse_inad_apbl_rows(doc: TextDoc) -> Set[str]:
+    s = set()
+    for cells in doc.rows:
+        m = APBL_ROW_DASH_RE.match(CELL_SEP.join(cells))
+        if m:
+            s.add(normalize_unidade(f"AP {int(m.group(1))} BL {int(m.group(2))}"))
+    return s
+
+
+def parse_inad_ap_bloco_palavra(doc: TextDoc) -> Set[str]:
+    t = doc.upper
 
     s = set()
-    for ap, bl in re.findall(r"(?m)^\s*0*(\d{1,5})\s+BLOCO\s*0*(\d{1,3})\s*-\s*", t):
+    for ap, bl in INAD_AP_BLOCO_RE.findall(t):
         s.add(normalize_unidade(f"AP {int(ap)} BL {int(bl)}"))
     return s
 
 
-def parse_inad_rotulado(text: str) -> Set[str]:
-    t = (text or "").upper()
+def parse_inad_rotulado(doc: TextDoc) -> Set[str]:
+    t = doc.upper
     s = set()
 
-    for ap, bl in re.findall(r"(?:^|\n)\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\s*-\s*", t):
+    for ap, bl in INAD_AP_BL_RE.findall(t):
         s.add(normalize_unidade(f"AP {int(ap)} BL {int(bl)}"))
 
-    for bl, ap in re.findall(r"\b0*(\d+)\s*-\s*0*(\d+)\b", t):
+    for bl, ap in INAD_BL_AP_DASH_RE.findall(t):
         s.add(normalize_unidade(f"AP {int(ap)} BL {int(bl)}"))
 
     return s
 
 
-def parse_inad_ap_sem_bloco(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n").upper()
+def parse_inad_ap_sem_bloco(doc: TextDoc) -> Set[str]:
+    t = doc.upper
     s = set()
 
-    for ap in re.findall(r"(?m)^\s*0*(\d{4})\s*-\s*[A-ZÀ-Ü]", t):
+    for ap in INAD_AP4_DASH_RE.findall(t):
         s.add(normalize_unidade(f"AP {int(ap)}"))
 
     if not s:
-        for ap in re.findall(r"(?m)^\s*0*(\d{4})\s*(?=(?:-|[A-ZÀ-Ü]))", t):
+        for ap in INAD_AP4_RE.findall(t):
             s.add(normalize_unidade(f"AP {int(ap)}"))
 
     return s
 
 
-def parse_inad_lotes(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t).upper()
+def parse_inad_lotes(doc: TextDoc) -> Set[str]:
+    t = doc.upper
 
     s = set()
 
-    for lt in re.findall(r"(?m)^\s*LOTE\s+0*([0-9]+[A-Z]?)\s*-\s*", t):
+    for lt in INAD_LOTE_RE.findall(t):
         s.add(normalize_unidade(f"LT {lt}"))
 
-    for lt, qd in re.findall(r"(?m)^\s*LOTE\s+0*([0-9]+[A-Z]?)\s+(?:QUADRA|QD)\s*([A-Z0-9]+)\s*-\s*", t):
+    for lt, qd in INAD_LOTE_QD_RE.findall(t):
         s.add(normalize_unidade(f"LT {lt} QD {qd}"))
 
     return s
 
 
-def parse_inad_casa(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n").upper()
+def parse_inad_casa(doc: TextDoc) -> Set[str]:
+    t = doc.upper
     s = set()
 
-    for n in re.findall(r"(?m)\bCASA\s*0*(\d+)\b", t):
+    for n in INAD_CASA_RE.findall(t):
         s.add(normalize_unidade(f"CASA {int(n)}"))
 
     return s
 
 
-def parse_inad_casa_qd(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n")
-    t = t.replace("\u00A0", " ")
-    t = re.sub(r"[ \t]+", " ", t).upper()
-
-    lines = [norm_space(x) for x in t.splitlines() if norm_space(x)]
+def parse_inad_casa_qd(doc: TextDoc) -> Set[str]:
+    t = doc.upper
+    lines = doc.upper_lines
     s = set()
 
     # 1) Caso venha tudo na mesma linha:
     # CASA 09 QUADRA 01 - FULANO
-    for casa, qd in re.findall(
-        r"\bCASA\s*0*(\d+)\s+(?:QUADRA|QD)\s*0*([A-Z0-9]+)\b",
-        t,
-        flags=re.I
-    ):
+    for casa, qd in INAD_CASA_QD_RE.findall(t):
         s.add(normalize_unidade(f"CASA {int(casa)} QD {qd}"))
 
     if s:
@@ -699,16 +695,14 @@ def parse_inad_casa_qd(text: str) -> Set[str]:
     # CASA 09
     # QUADRA 01
     casa_atual = None
-    re_casa = re.compile(r"^\s*CASA\s*0*(\d+)\b", re.I)
-    re_qd = re.compile(r"^\s*(?:QUADRA|QD)\s*0*([A-Z0-9]+)\b", re.I)
 
     for line in lines:
-        m_casa = re_casa.match(line)
+        m_casa = INAD_CASA_LINE_RE.match(line)
         if m_casa:
             casa_atual = int(m_casa.group(1))
             continue
 
-        m_qd = re_qd.match(line)
+        m_qd = INAD_QD_LINE_RE.match(line)
         if m_qd and casa_atual is not None:
             qd = m_qd.group(1)
             s.add(normalize_unidade(f"CASA {casa_atual} QD {qd}"))
@@ -717,105 +711,197 @@ def parse_inad_casa_qd(text: str) -> Set[str]:
     return s
 
 
-def parse_inad_apbl_num_bl(text: str) -> Set[str]:
-    t = (text or "").replace("\f", "\n").upper()
+def parse_inad_apbl_num_bl(doc: TextDoc) -> Set[str]:
+    t = doc.upper
     s = set()
 
-    for ap, bl in re.findall(r"(?:^|\n)\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\s*-\s*", t):
+    for ap, bl in INAD_AP_BL_RE.findall(t):
         s.add(normalize_unidade(f"AP {int(ap)} BL {int(bl)}"))
 
     return s
 
 
 # ------------------ router ------------------
-def parse_contatos(layout: str, text: str) -> List[Dict]:
+def parse_contatos(layout: str, doc: TextDoc) -> List[Contato]:
     if layout == "AP_BLOCO_PALAVRA":
-        return parse_contatos_ap_bloco_palavra(text)
+        return parse_contatos_ap_bloco_palavra(doc)
     if layout == "APBL_NAO_ROTULADO":
-        return parse_contatos_apbl_sem_rotulo(text)
+        if doc.cells:
+            return parse_contatos_apbl_rows(doc)
+        return parse_contatos_apbl_sem_rotulo(doc)
     if layout == "APBL_ROTULADO":
-        return parse_contatos_rotulado(text)
+        return parse_contatos_rotulado(doc)
     if layout == "AP_SEM_BLOCO":
-        return parse_contatos_ap_sem_bloco(text)
+        return parse_contatos_ap_sem_bloco(doc)
     if layout == "APBL_NUM_BL":
-        return parse_contatos_apbl_num_bl(text)
+        return parse_contatos_apbl_num_bl(doc)
     if layout == "CASA":
-        return parse_contatos_casa_lines(text)
+        return parse_contatos_casa_lines(doc)
     if layout == "CASA_QD":
-        return parse_contatos_casa_qd_lines(text)
+        return parse_contatos_casa_qd_lines(doc)
     if layout == "LT":
         return parse_contatos_unit_in_line(
-            text,
+            doc,
             re.compile(r"\b(LT|LOTE)\s*0*\d+\b", re.I),
             lambda m: m.group(0).replace("LOTE", "LT")
         )
     if layout == "QD_LT":
         return parse_contatos_unit_in_line(
-            text,
+            doc,
             re.compile(r"\bQD\s*[A-Z0-9]+\b.*?\b(LT|LOTE)\s*0*\d+\b", re.I),
             lambda m: m.group(0).replace("LOTE", "LT")
         )
     return []
 
 
-def parse_inad(layout: str, text: str) -> Set[str]:
+def parse_inad(layout: str, doc: TextDoc) -> Set[str]:
     if layout == "AP_BLOCO_PALAVRA":
-        return parse_inad_ap_bloco_palavra(text)
+        return parse_inad_ap_bloco_palavra(doc)
     if layout == "APBL_NAO_ROTULADO":
-        return parse_inad_apbl_sem_rotulo(text)
+        if doc.cells:
+            return parse_inad_apbl_rows(doc)
+        return parse_inad_apbl_sem_rotulo(doc)
     if layout == "APBL_ROTULADO":
-        return parse_inad_rotulado(text)
+        return parse_inad_rotulado(doc)
     if layout == "AP_SEM_BLOCO":
-        return parse_inad_ap_sem_bloco(text)
+        return parse_inad_ap_sem_bloco(doc)
     if layout == "APBL_NUM_BL":
-        return parse_inad_apbl_num_bl(text)
+        return parse_inad_apbl_num_bl(doc)
     if layout == "CASA":
-        return parse_inad_casa(text)
+        return parse_inad_casa(doc)
     if layout == "CASA_QD":
-        return parse_inad_casa_qd(text)
+        return parse_inad_casa_qd(doc)
     if layout in ("LT", "QD_LT"):
-        return parse_inad_lotes(text)
+        return parse_inad_lotes(doc)
     return set()
 
 
-# ------------------ main ------------------
-def main():
-    if len(sys.argv) < 3:
-        print(json.dumps({
-            "erro": "Uso: python3 superlogica_extract.py contatos.pdf inadimplentes.pdf"
-        }, ensure_ascii=False))
-        sys.exit(2)
+# ------------------ inadimplentes: só a coluna das unidades ------------------
+def _union(*rxs: re.Pattern) -> re.Pattern:
+    return re.compile("|".join(f"(?:{rx.pattern})" for rx in rxs), re.M | re.I)
+
+
+# tudo o que parse_inad casa, por layout: a página recortada em que isto não
+# acha nada é descartada. APBL_ROTULADO fica de fora: o par "BL-AP" solto casa
+# em qualquer coluna (datas, valores), então não há coluna fixa para recortar.
+_LOTES_UNIT_RE = _union(INAD_LOTE_RE, INAD_LOTE_QD_RE)
+INAD_UNIT_RES = {
+    "AP_BLOCO_PALAVRA": _union(INAD_AP_BLOCO_RE),
+    "APBL_NAO_ROTULADO": _union(APBL_DASH_RE),
+    "AP_SEM_BLOCO": _union(INAD_AP4_DASH_RE, INAD_AP4_RE),
+    "APBL_NUM_BL": _union(INAD_AP_BL_RE),
+    "CASA": _union(INAD_CASA_RE),
+    "CASA_QD": _union(INAD_CASA_QD_RE, INAD_CASA_LINE_RE, INAD_QD_LINE_RE),
+    "LT": _LOTES_UNIT_RE,
+    "QD_LT": _LOTES_UNIT_RE,
+}
+
+
+def inad_column_pages(path: Source) -> List[str]:
+    """
+    Páginas da lista de inadimplentes recortadas na coluna das unidades (ver
+    pdf_io.column_pages). O layout sai das páginas inteiras até a primeira com
+    unidade; se o documento recortado não der o mesmo layout, ou o recorte
+    perder unidade na página do aprendizado, extrai tudo como sempre.
+    """
+    layout = None
+    learned = False
+
+    def probe(pages: List[str]):
+        nonlocal layout, learned
+        layout = detect_layout(page_doc(pages), DETECT_PAGES, DETECT_FAST)
+        if layout == "DESCONHECIDO":
+            return None
+        if layout not in INAD_UNIT_RES:
+            return False
+        if not parse_inad(layout, page_doc(pages[-1:])):
+            return None
+        learned = True
+        return INAD_UNIT_RES[layout]
 
-    contatos_path = sys.argv[1]
-    inad_path = sys.argv[2]
+    def check(full: str, clipped: str) -> bool:
+        return parse_inad(layout, page_doc([full])) == parse_inad(layout, page_doc([clipped]))
 
-    cont_text = pdf_text(contatos_path)
-    inad_text = pdf_text(inad_path)
+    pages = pdf_io.column_pages(path, probe, check)
+    if pages is not None and (not learned or detect_layout(page_doc(pages), DETECT_PAGES, DETECT_FAST) == layout):
+        return pages
+    timings.count("coluna", "recusada")
+    return pdf_io.fitz_pages(path)
 
-    if len(cont_text.strip()) < 50 or len(inad_text.strip()) < 50:
-        print(json.dumps({
+
+def inad_pages(path: Source) -> List[str]:
+    if not pdf_io.inad_fast():
+        return pdf_pages(path)
+    return pdf_io.cached_pages(path, f"{pdf_io.column_version()}:superlogica", inad_column_pages)
+
+
+# ------------------ main ------------------
+def inad_pipeline(inad_path: Source) -> Tuple[int, Optional[str], Set[str]]:
+    """(tamanho do texto, layout, unidades) da lista; layout None = texto vazio."""
+    with timings.scope("inadimplentes"):
+        inad_doc = pdf_doc(inad_path, inad_pages)
+    if len(inad_doc.text.strip()) < 50:
+        return len(inad_doc), None, set()
+    with timings.scope("inadimplentes"), timings.stage("deteccao"):
+        inad_layout = detect_layout(inad_doc, DETECT_PAGES, DETECT_FAST)
+    with timings.scope("inadimplentes"), timings.stage(f"parser.{inad_layout}"):
+        inad_set = parse_inad(inad_layout, inad_doc)
+    return len(inad_doc), inad_layout, inad_set
+
+
+def iter_run(contatos_path: Source, inad_path: Source, condominio: Optional[str] = None,
+             diff: bool = False) -> Iterator[Dict]:
+    """
+    Contatos casados um a um e, por último, o registro "fim" (layouts/totais).
+    Com store e condomínio, os contatos parseados ficam gravados (ver contact_store);
+    com diff, só saem os contatos das unidades novas na lista.
+    """
+    t = timings.begin()
+
+    # os dois documentos só se encontram no filtro: com --concurrent a lista
+    # de inadimplentes vai inteira (extração, detecção, parser) para outro processo
+    inad = pdf_io.side_call(inad_pipeline, inad_path)
+
+    with timings.scope("contatos"):
+        cont_doc = pdf_doc(contatos_path, contatos_pages)
+    cont_ok = len(cont_doc.text.strip()) >= 50
+    if cont_ok:
+        with timings.scope("contatos"), timings.stage("deteccao"):
+            cont_layout = detect_layout(cont_doc, DETECT_PAGES, DETECT_FAST)
+        with timings.scope("contatos"), timings.stage(f"parser.{cont_layout}"):
+            contatos = parse_contatos(cont_layout, cont_doc)
+        with timings.scope("contatos"):
+            contact_store.save(condominio, VENDOR, lambda: pdf_io.source_sha256(contatos_path),
+                               cont_layout, contatos, normalize_unidade)
+
+    inad_len, inad_layout, inad_set = inad.result()
+    if not cont_ok or inad_layout is None:
+        yield ndjson_out.trailer(timings.attach({
             "erro": "PDF parece ser imagem/scan (texto vazio). Precisa OCR/vision.",
             "debug": {
-                "cont_text_len": len(cont_text),
-                "inad_text_len": len(inad_text),
+                "cont_text_len": len(cont_doc),
+                "inad_text_len": inad_len,
             }
-        }, ensure_ascii=False))
-        sys.exit(0)
+        }, t))
+        return
 
-    cont_layout = detect_layout(cont_text)
-    inad_layout = detect_layout(inad_text)
-
-    contatos = parse_contatos(cont_layout, cont_text)
-    inad_set = parse_inad(inad_layout, inad_text)
+    d = _inad_diff(inad_path, condominio, inad_set) if diff else None
+    index = _unit_index(contatos, inad_set)
+    emit = d.novos if d else inad_set
 
+    matched = 0
     for c in contatos:
-        c["unidade"] = normalize_unidade(c.get("unidade", ""))
-        c["Telefone"] = dedupe_list(c.get("Telefone", []))
-        c["Email"] = dedupe_list(c.get("Email", []))
-
-    data = [c for c in contatos if c.get("unidade") in inad_set]
-
-    out = {
+        t0 = time.perf_counter() if t else 0
+        hit = index.find(c.unidade)
+        if t:
+            # só o casamento; o tempo de quem consome o yield fica de fora
+            t.add("match", time.perf_counter() - t0)
+        if hit is not None:
+            matched += 1
+            if hit in emit:
+                yield c.to_dict()
+
+    yield ndjson_out.trailer(timings.attach(unit_match.attach(contact_store.attach_diff({
         "layouts": {
             "contatos": cont_layout,
             "inadimplentes": inad_layout,
@@ -823,13 +909,197 @@ def main():
         "totais": {
             "contatos_extraidos": len(contatos),
             "inad_unicos": len(inad_set),
-            "match": len(data),
+            "match": matched,
+        },
+    }, d), index), t))
+
+
+def _unit_index(contatos: List[Contato], inad_set: Set[str],
+                units: Optional[Set[str]] = None) -> unit_match.UnitIndex:
+    """units: unidades do diretório inteiro, quando `contatos` é só uma parte dele."""
+    # a unidade do contato sai normalizada também na saída
+    with timings.stage("match.indice"):
+        for c in contatos:
+            c.unidade = normalize_unidade(c.unidade)
+        if units is None:
+            units = {c.unidade for c in contatos}
+        return unit_match.UnitIndex(inad_set, units, unit_key)
+
+
+def _inad_diff(inad_path: Source, condominio: str, inad_set: Set[str]) -> contact_store.Diff:
+    return contact_store.inad_diff(condominio, VENDOR, lambda: pdf_io.source_sha256(inad_path), inad_set)
+
+
+def iter_match(inad_path: Source, condominio: str, diff: bool = False) -> Iterator[Dict]:
+    """
+    Só a lista de inadimplentes, cruzada com o último diretório de contatos
+    gravado do condomínio. Mesma saída do iter_run.
+    """
+    t = timings.begin()
+
+    erro = contact_store.match_error(condominio)
+    if erro:
+        yield ndjson_out.trailer(timings.attach({"erro": erro}, t))
+        return
+
+    store = contact_store.get_store()
+    versao = store.latest(str(condominio), VENDOR)
+    if versao is None:
+        yield ndjson_out.trailer(timings.attach({
+            "erro": f"Sem contatos gravados do condomínio {condominio!r} (rode antes com os dois PDFs e --store).",
+        }, t))
+        return
+
+    inad_len, inad_layout, inad_set = inad_pipeline(inad_path)
+    if inad_layout is None:
+        yield ndjson_out.trailer(timings.attach({
+            "erro": "PDF parece ser imagem/scan (texto vazio). Precisa OCR/vision.",
+            "debug": {"inad_text_len": inad_len},
+        }, t))
+        return
+
+    d = _inad_diff(inad_path, condominio, inad_set) if diff else None
+    contatos, units = store.for_match(str(condominio), VENDOR, versao.pdf_sha256, inad_set, unit_match.APPROX)
+    index = _unit_index(contatos, inad_set, units)
+    emit = d.novos if d else inad_set
+
+    matched = 0
+    for c in contatos:
+        hit = index.find(c.unidade)
+        if hit is not None:
+            matched += 1
+            if hit in emit:
+                yield c.to_dict()
+
+    yield ndjson_out.trailer(timings.attach(unit_match.attach(contact_store.attach_diff({
+        "layouts": {
+            "contatos": versao.layout,
+            "inadimplentes": inad_layout,
+        },
+        "totais": {
+            "contatos_extraidos": versao.total,
+            "inad_unicos": len(inad_set),
+            "match": matched,
         },
-        "data": data,
-    }
+    }, d), index), t))
+
+
+def _collect(records: Iterator[Dict]) -> Dict:
+    data, tail = ndjson_out.collect(records)
+    if "erro" in tail:
+        return tail
+    out = {"layouts": tail["layouts"], "totais": tail["totais"], "data": data}
+    for k in ("diff", "sem_contato", "debug"):
+        if k in tail:
+            out[k] = tail[k]
+    return out
+
+
+def run(contatos_path: Source, inad_path: Source, condominio: Optional[str] = None,
+        diff: bool = False) -> Dict:
+    return _collect(iter_run(contatos_path, inad_path, condominio, diff))
+
+
+def run_match(inad_path: Source, condominio: str, diff: bool = False) -> Dict:
+    return _collect(iter_match(inad_path, condominio, diff))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("contatos", nargs="?", help='caminho do PDF ou "-" para ler do stdin')
+    ap.add_argument("inadimplentes", nargs="?", help='caminho do PDF ou "-" para ler do stdin')
+    ap.add_argument("--jobs", type=int, help="processos na extração por página (PDFs grandes)")
+    ap.add_argument("--layout", choices=pdf_io.LAYOUTS,
+                    help='"rows" refaz linhas e células das tabelas pela geometria das palavras (ou EXTRACT_LAYOUT)')
+    ap.add_argument("--inad-fast", action="store_true",
+                    help="da lista de inadimplentes extrai só a coluna das unidades (ou EXTRACT_INAD_FAST=1)")
+    ap.add_argument("--ocr", action="store_true",
+                    help="PDF escaneado (sem texto): OCR local com tesseract (ou EXTRACT_OCR=1)")
+    ap.add_argument("--ocr-dpi", type=int, help="resolução da renderização para o OCR (padrão 300)")
+    ap.add_argument("--concurrent", action="store_true",
+                    help="processa contatos e inadimplentes em processos separados (ou EXTRACT_CONCURRENT=1)")
+    ap.add_argument("--detect-pages", type=int, help="detecta o layout só nas N primeiras páginas")
+    ap.add_argument("--detect-fast", action="store_true",
+                    help="encerra a detecção quando um layout está claramente à frente")
+    ap.add_argument("--store", help="banco SQLite dos contatos parseados (ou EXTRACT_STORE)")
+    ap.add_argument("--condominio", help="id do condomínio no store")
+    ap.add_argument("--match-only", action="store_true",
+                    help="recebe só inadimplentes.pdf e cruza com os contatos gravados (--store/--condominio)")
+    ap.add_argument("--approx-units", action="store_true",
+                    help="casa também unidades grafadas diferente nos dois PDFs, pelos componentes "
+                         "(ou EXTRACT_UNIT_APPROX=1)")
+    ap.add_argument("--list-unmatched", action="store_true",
+                    help='inclui "sem_contato": unidades em débito sem contato (ou EXTRACT_LIST_UNMATCHED=1)')
+    ap.add_argument("--diff", action="store_true",
+                    help="compara com a lista anterior do condomínio: só saem os contatos novos, "
+                         "com novos/quitados/persistentes (--store/--condominio)")
+    ap.add_argument("--timings", action="store_true",
+                    help="inclui tempos por etapa em debug (ou EXTRACT_TIMINGS=1)")
+    ap.add_argument("--ndjson", action="store_true",
+                    help='um contato por linha, conforme casam, e por último {"fim": true, ...}')
+    opts = ap.parse_args()
+
+    if opts.match_only:
+        # o único PDF posicional é a lista de inadimplentes
+        opts.inadimplentes = opts.inadimplentes or opts.contatos
+        if not opts.inadimplentes or not opts.condominio:
+            print(json.dumps({
+                "erro": "Uso: python3 superlogica_extract.py --match-only --condominio ID inadimplentes.pdf"
+            }, ensure_ascii=False))
+            sys.exit(2)
+    elif not opts.inadimplentes:
+        print(json.dumps({
+            "erro": "Uso: python3 superlogica_extract.py contatos.pdf inadimplentes.pdf"
+        }, ensure_ascii=False))
+        sys.exit(2)
 
-    print(json.dumps(out, ensure_ascii=False))
+    if opts.jobs:
+        pdf_io.set_jobs(opts.jobs)
+    if opts.layout:
+        pdf_io.set_layout(opts.layout)
+    if opts.inad_fast:
+        pdf_io.set_inad_fast(True)
+    if opts.concurrent:
+        pdf_io.set_concurrent(True)
+    if opts.approx_units:
+        unit_match.set_approx(True)
+    if opts.list_unmatched:
+        unit_match.set_list_unmatched(True)
+    if opts.ocr:
+        ocr.set_enabled(True)
+    if opts.ocr_dpi:
+        ocr.set_dpi(opts.ocr_dpi)
+    if opts.store:
+        contact_store.set_path(opts.store)
+    for on, check in ((opts.match_only, contact_store.match_error), (opts.diff, contact_store.diff_error)):
+        erro = check(opts.condominio) if on else None
+        if erro:
+            print(json.dumps({"erro": erro}, ensure_ascii=False))
+            sys.exit(2)
+    if opts.timings:
+        timings.set_enabled(True)
+
+    global DETECT_PAGES, DETECT_FAST
+    if opts.detect_pages:
+        DETECT_PAGES = opts.detect_pages
+    if opts.detect_fast:
+        DETECT_FAST = True
+
+    if opts.match_only:
+        inad, = pdf_io.stdin_sources([opts.inadimplentes])
+        records = iter_match(inad, opts.condominio, opts.diff)
+    else:
+        contatos, inad = pdf_io.stdin_sources([opts.contatos, opts.inadimplentes])
+        records = iter_run(contatos, inad, opts.condominio, opts.diff)
+    if opts.ndjson:
+        out = ndjson_out.write_ndjson(records, sys.stdout)
+    else:
+        out = _collect(records)
+        print(json.dumps(out, ensure_ascii=False))
+    # store sem a versão do condomínio: quem chama precisa ver a falha
+    if opts.match_only and "erro" in out:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifesto do batch_extract: linhas que não são objeto ou com campos que não
+são texto viram resposta ok=false e o lote segue.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_extract import manifest_jobs, read_manifest  # noqa: E402
+
+
+def _manifest(text: str, suffix: str) -> str:
+    f = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+    f.write(text)
+    f.close()
+    return f.name
+
+
+class ManifestTest(unittest.TestCase):
+    def _jobs(self, text: str, suffix: str = ".json") -> list:
+        path = _manifest(text, suffix)
+        self.addCleanup(os.remove, path)
+        return list(manifest_jobs(read_manifest(path)))
+
+    def test_linha_que_nao_e_objeto(self):
+        jobs = self._jobs(json.dumps([5, "x", None, {"condominium_id": "1", "vendor": "nenhum"}]))
+
+        self.assertEqual([j["id"] for j in jobs], ["linha-1", "linha-2", "linha-3", "linha-4"])
+        for job in jobs:
+            self.assertEqual(job["resp"]["ok"], False)
+        self.assertIn("objeto", jobs[0]["resp"]["erro"])
+        self.assertIn("Vendor", jobs[3]["resp"]["erro"])
+
+    def test_campo_que_nao_e_texto(self):
+        jobs = self._jobs(json.dumps([{"condominium_id": 7, "vendor": 3, "inad_path": ["a.pdf"]}]))
+
+        self.assertEqual(jobs[0]["condominium_id"], "7")
+        self.assertIn("vendor, inad_path", jobs[0]["resp"]["erro"])
+
+    def test_json_lines_com_linha_invalida(self):
+        jobs = self._jobs('{"condominium_id": "1", "vendor": "x"}\nnada\n42\n', ".jsonl")
+
+        self.assertEqual(len(jobs), 3)
+        self.assertTrue(all(j["resp"]["ok"] is False for j in jobs))
+
+    def test_manifesto_que_nao_e_lista(self):
+        path = _manifest("5", ".json")
+        self.addCleanup(os.remove, path)
+        with self.assertRaises(ValueError):
+            read_manifest(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
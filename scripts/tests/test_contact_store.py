@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+contact_store com um banco temporário: execução completa gravando os
+contatos, match-only contra a versão gravada, diff entre duas listas de
+inadimplentes e os erros do --match-only na linha de comando (sem store: saída
+2; sem versão gravada do condomínio: saída 1).
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.dirname(TESTS)
+sys.path.insert(0, SCRIPTS)
+sys.path.insert(0, os.path.join(SCRIPTS, "bench"))
+
+import contact_store  # noqa: E402
+import superlogica_extract as sl  # noqa: E402
+from contact_record import Contato  # noqa: E402
+from corpus import superlogica_lines, write_pdf  # noqa: E402
+
+
+def _inad_lines(units) -> list:
+    return ["RELATORIO DE INADIMPLENCIA"] + [f"{ap} {bl} - FULANO DE TAL {ap},00" for ap, bl in units]
+
+
+class ContactStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.db = os.path.join(self.dir, "contatos.db")
+        contact_store.set_path(self.db)
+        self.addCleanup(contact_store.set_path, None)
+
+        cont, _ = superlogica_lines("APBL_NAO_ROTULADO", 40, random.Random(5))
+        self.contatos = self._pdf("contatos.pdf", cont)
+        # com menos de 5 linhas o detect_layout não decide
+        self.inad_1 = self._pdf("inad-1.pdf", _inad_lines((ap, 1) for ap in range(101, 107)))
+        self.inad_2 = self._pdf("inad-2.pdf", _inad_lines((ap, 1) for ap in range(103, 109)))
+
+    def _pdf(self, name: str, lines: list) -> str:
+        path = os.path.join(self.dir, name)
+        write_pdf(path, lines)
+        return path
+
+    def test_store_direto(self):
+        store = contact_store.get_store()
+        a = Contato("AP 101 BL 1", "Jose")
+        a.add_phone("+5598988881111")
+        b = Contato("AP 102 BL 1", "Maria")
+        store.save("c1", "superlogica", "sha-1", "APBL_NAO_ROTULADO", [a, b], sl.normalize_unidade)
+
+        self.assertEqual(store.latest("c1", "superlogica").total, 2)
+        self.assertIsNone(store.latest("c2", "superlogica"))
+        got = store.match("c1", "superlogica", "sha-1", {"AP 102 BL 1", "AP 9 BL 9"})
+        self.assertEqual([c.to_dict() for c in got], [b.to_dict()])
+        self.assertEqual(store.unit_keys("c1", "superlogica", "sha-1"), {"AP 101 BL 1", "AP 102 BL 1"})
+
+        # o mesmo PDF gravado de novo substitui a versão
+        store.save("c1", "superlogica", "sha-1", "APBL_NAO_ROTULADO", [a], sl.normalize_unidade)
+        self.assertEqual(store.contatos("c1", "superlogica", "sha-1")[0].to_dict(), a.to_dict())
+        self.assertEqual(store.latest("c1", "superlogica").total, 1)
+
+    def test_completo_depois_match_only(self):
+        full = sl.run(self.contatos, self.inad_1, condominio="c1")
+        self.assertEqual(full["totais"]["match"], 6)
+
+        versao = contact_store.get_store().latest("c1", sl.VENDOR)
+        self.assertEqual(versao.total, full["totais"]["contatos_extraidos"])
+
+        only = sl.run_match(self.inad_1, "c1")
+        self.assertEqual(only["data"], full["data"])
+        self.assertEqual(only["totais"], full["totais"])
+        self.assertEqual(only["layouts"], full["layouts"])
+
+    def test_diff_entre_duas_listas(self):
+        sl.run(self.contatos, self.inad_1, condominio="c1")
+
+        first = sl.run_match(self.inad_1, "c1", diff=True)
+        # sem lista anterior: tudo é novo
+        self.assertEqual(len(first["diff"]["novos"]), 6)
+
+        second = sl.run_match(self.inad_2, "c1", diff=True)
+        self.assertEqual(second["diff"], {
+            "novos": ["AP 107 BL 1", "AP 108 BL 1"],
+            "quitados": ["AP 101 BL 1", "AP 102 BL 1"],
+            "persistentes": ["AP 103 BL 1", "AP 104 BL 1", "AP 105 BL 1", "AP 106 BL 1"],
+        })
+        self.assertEqual([c["unidade"] for c in second["data"]], ["AP 107 BL 1", "AP 108 BL 1"])
+        self.assertEqual(second["totais"]["novos"], 2)
+
+        # a mesma lista de novo compara com a anterior a ela, não com ela mesma
+        again = sl.run_match(self.inad_2, "c1", diff=True)
+        self.assertEqual(again["diff"], second["diff"])
+
+    def test_match_only_sem_versao(self):
+        out = sl.run_match(self.inad_1, "c-sem-contatos")
+        self.assertIn("Sem contatos gravados", out["erro"])
+
+    # ------------------ linha de comando ------------------
+    def _cli(self, *args):
+        env = {k: v for k, v in os.environ.items() if k != "EXTRACT_STORE"}
+        proc = subprocess.run(
+            [sys.executable, os.path.join(SCRIPTS, "superlogica_extract.py"), *args],
+            capture_output=True, text=True, env=env,
+        )
+        return proc.returncode, json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def test_cli_match_only_sem_store(self):
+        code, out = self._cli("--match-only", "--condominio", "c1", self.inad_1)
+        self.assertEqual(code, 2)
+        self.assertIn("store", out["erro"])
+
+    def test_cli_match_only_sem_versao(self):
+        code, out = self._cli("--match-only", "--condominio", "c1", "--store", self.db, self.inad_1)
+        self.assertEqual(code, 1)
+        self.assertIn("Sem contatos gravados", out["erro"])
+
+        code, out = self._cli("--match-only", "--condominio", "c1", "--store", self.db, "--ndjson", self.inad_1)
+        self.assertEqual(code, 1)
+        self.assertTrue(out["fim"])
+
+    def test_cli_completo_e_match_only(self):
+        code, full = self._cli("--condominio", "c1", "--store", self.db, self.contatos, self.inad_1)
+        self.assertEqual(code, 0)
+        code, only = self._cli("--match-only", "--condominio", "c1", "--store", self.db, self.inad_1)
+        self.assertEqual(code, 0)
+        self.assertEqual(only["data"], full["data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
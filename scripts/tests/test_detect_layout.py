@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+detect_layout da Superlógica (duas varreduras numa passada só) contra a
+detecção antiga (um re.findall por contador no texto inteiro): mesmo rótulo
+nos relatórios do corpus sintético, em misturas de linhas de layouts
+diferentes e com max_pages.
+
+A detecção antiga recebia o texto já juntado por "\\n"; o TextDoc troca também
+"\\f" por "\\n", então um form feed no meio da linha abre linha nova (como já
+faziam os parsers). A comparação é sempre com o texto do TextDoc.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import os
+import random
+import re
+import sys
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS), "bench"))
+
+import superlogica_extract as sl  # noqa: E402
+from corpus import SUPERLOGICA_LAYOUTS, superlogica_lines  # noqa: E402
+from text_doc import TextDoc  # noqa: E402
+
+
+# ------------------ detecção antiga (como era antes da passada única) ------------------
+def old_detect_layout(text: str) -> str:
+    t = (text or "").upper()
+
+    c_apbl_nrot_dash = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*[A-ZÀ-Ü]", t))
+    c_apbl_nrot = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+0*(\d{1,3})\s+[A-ZÀ-Ü]", t))
+    c_apbl_num_bl = len(re.findall(r"(?m)^\s*0*(\d{1,5})\s+BL\s*0*(\d{1,3})\b", t))
+    c_apbl_rot_strict = len(re.findall(r"\bAP\s*0*\d+\s+BL\s*0*\d+\b", t))
+
+    c_ap_sem_bl_dash = len(re.findall(r"(?m)^\s*0*(\d{4})\s*-\s*[A-ZÀ-Ü]", t))
+    c_ap_sem_bl_line = len(re.findall(r"(?m)^\s*0*(\d{4})\s*(?=(?:-|[A-ZÀ-Ü]))", t))
+
+    c_casa_any = len(re.findall(r"\bCASA\s*0*\d+\b", t))
+    c_lote = len(re.findall(r"\b(LT|LOTE)\s+\d+\b", t))
+
+    if c_casa_any >= 3:
+        if "QUADRA" in t or re.search(r"\bQD\s+[A-Z0-9]+\b", t):
+            return "CASA_QD"
+        return "CASA"
+
+    if c_ap_sem_bl_dash >= 5:
+        return "AP_SEM_BLOCO"
+
+    if (c_apbl_nrot_dash + c_apbl_nrot) >= 5:
+        return "APBL_NAO_ROTULADO"
+
+    if c_apbl_num_bl >= 5:
+        return "APBL_NUM_BL"
+
+    if re.search(r"(?m)^\s*LOTE\b", t):
+        if "QUADRA" in t or re.search(r"\bQD\s*[A-Z0-9]+\b", t):
+            return "QD_LT"
+        return "LT"
+
+    if c_ap_sem_bl_line >= 8:
+        return "AP_SEM_BLOCO"
+
+    c_ap_bloco_palavra = len(re.findall(r"(?m)^\s*0*\d{1,5}\s+BLOCO\s*0*\d{1,3}\b", t))
+    if c_ap_bloco_palavra >= 5:
+        return "AP_BLOCO_PALAVRA"
+
+    if c_apbl_rot_strict >= 3 or ("BLOCO" in t and "AP" in t):
+        return "APBL_ROTULADO"
+
+    if c_lote >= 3:
+        if "QUADRA" in t or re.search(r"\bQD\s+[A-Z0-9]+\b", t):
+            return "QD_LT"
+        return "LT"
+
+    return "DESCONHECIDO"
+
+
+def _lines(layout: str, n: int, seed: int):
+    return superlogica_lines(layout, n, random.Random(f"{seed}:{layout}:{n}"))
+
+
+class DetectLayoutTest(unittest.TestCase):
+    def assertSameLabel(self, doc: TextDoc, **kw):
+        self.assertEqual(sl.detect_layout(doc, **kw), old_detect_layout(doc.text))
+
+    def test_relatorios_do_corpus(self):
+        for layout in SUPERLOGICA_LAYOUTS:
+            for n in (3, 8, 60):
+                cont, inad = _lines(layout, n, 1)
+                for lines in (cont, inad):
+                    with self.subTest(layout=layout, n=n):
+                        self.assertSameLabel(TextDoc.from_text("\n".join(lines)))
+            # com 60 unidades o próprio layout tem que vencer
+            cont, _ = _lines(layout, 60, 1)
+            self.assertEqual(sl.detect_layout(TextDoc.from_text("\n".join(cont))), layout)
+
+    def test_misturas_de_layouts(self):
+        pool = []
+        for layout in SUPERLOGICA_LAYOUTS:
+            cont, inad = _lines(layout, 40, 2)
+            pool += cont + inad
+        pool += ["", " ", "QUADRA", "QD A", "AP", "BLOCO", "LOTE", "TOTAL 12 3", "0101", "12 34 -"]
+
+        rnd = random.Random(11)
+        labels = set()
+        for i in range(400):
+            k = rnd.choice((3, 8, 20, 60, 200))
+            lines = [rnd.choice(pool) for _ in range(k)]
+            # às vezes espaços/zeros à esquerda, que os contadores ancorados aceitam
+            lines = [(" " + ln if rnd.random() < 0.1 else ln) for ln in lines]
+            doc = TextDoc.from_text("\n".join(lines))
+            with self.subTest(i=i):
+                self.assertSameLabel(doc)
+            labels.add(sl.detect_layout(doc))
+        # a mistura exercita várias regras, não só uma
+        self.assertGreaterEqual(len(labels), 6)
+
+    def test_max_pages(self):
+        cont_a, _ = _lines("AP_BLOCO_PALAVRA", 30, 3)
+        cont_b, _ = _lines("CASA_QD", 30, 3)
+        pages = ["\n".join(cont_a[:60]), "\n".join(cont_a[60:]), "\n".join(cont_b)]
+        doc = TextDoc(pages)
+
+        for n in (1, 2, 3):
+            with self.subTest(max_pages=n):
+                self.assertEqual(sl.detect_layout(doc, max_pages=n), old_detect_layout("\n".join(pages[:n])))
+        self.assertEqual(sl.detect_layout(doc), "CASA_QD")
+
+    def test_form_feed_vira_quebra_de_linha(self):
+        cont, _ = _lines("APBL_NAO_ROTULADO", 12, 4)
+        # form feed colado no fim da linha anterior (sem "\n" entre as unidades)
+        raw = "\f".join(cont)
+        doc = TextDoc.from_text(raw)
+
+        self.assertNotIn("\f", doc.text)
+        self.assertEqual(sl.detect_layout(doc), "APBL_NAO_ROTULADO")
+        self.assertSameLabel(doc)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JobReader do extract_worker: jobs partidos entre leituras, "bodies" inválido
+e stdin que termina antes dos PDFs; handle com "args" malformado.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_worker import JobReader, _job_response, handle, handle_stream  # noqa: E402
+
+
+def _line(job: dict) -> bytes:
+    return (json.dumps(job) + "\n").encode()
+
+
+class JobReaderTest(unittest.TestCase):
+    def test_job_partido_entre_leituras(self):
+        data = _line({"id": 1, "vendor": "condomob", "args": ["-"], "bodies": [5]}) + b"%PDF-" \
+            + _line({"id": 2, "op": "stats"})
+        reader = JobReader()
+        jobs = []
+        for i in range(len(data)):
+            jobs += reader.feed(data[i:i + 1])
+        jobs += reader.close()
+
+        self.assertEqual([j["id"] for j in jobs], [1, 2])
+        self.assertEqual(jobs[0]["args"], [b"%PDF-"])
+        self.assertNotIn("bodies", jobs[0])
+
+    def test_bodies_invalido_responde_e_para(self):
+        data = _line({"id": 1, "op": "stats"}) + _line({"id": 2, "bodies": "x"}) \
+            + _line({"id": 3, "op": "stats"})
+        reader = JobReader()
+        jobs = reader.feed(data)
+
+        self.assertTrue(reader.broken)
+        self.assertEqual([j["id"] for j in jobs], [1, 2])
+        self.assertIsNone(_job_response(jobs[0]))
+        resp = _job_response(jobs[1])
+        self.assertEqual((resp["id"], resp["ok"]), (2, False))
+        # o resto do fluxo não tem como ser ressincronizado
+        self.assertEqual(reader.feed(_line({"id": 4, "op": "stats"})), [])
+        self.assertEqual(reader.close(), [])
+
+    def test_bodies_com_tamanho_negativo_ou_bool(self):
+        for bad in ([-1], [True], [1.5]):
+            reader = JobReader()
+            jobs = reader.feed(_line({"id": 1, "bodies": bad}))
+            self.assertEqual(_job_response(jobs[0])["ok"], False)
+
+    def test_stdin_termina_antes_dos_pdfs(self):
+        reader = JobReader()
+        self.assertEqual(reader.feed(_line({"id": 7, "args": ["-"], "bodies": [10]}) + b"abc"), [])
+        jobs = reader.close()
+
+        self.assertEqual(jobs, [{"id": 7, "truncated": True}])
+        self.assertEqual(_job_response(jobs[0])["ok"], False)
+
+    def test_ultima_linha_sem_quebra(self):
+        reader = JobReader()
+        self.assertEqual(reader.feed(b'{"id": 9, "op": "stats"}'), [])
+        self.assertEqual(reader.close(), [{"id": 9, "op": "stats"}])
+
+    def test_linha_que_nao_e_json(self):
+        reader = JobReader()
+        jobs = reader.feed(b"nada\n")
+        self.assertEqual(jobs, [None])
+        self.assertEqual(_job_response(None)["ok"], False)
+
+    def test_args_invalido_com_bodies_nao_dessincroniza(self):
+        data = _line({"id": 1, "vendor": "condomob", "args": 5, "bodies": [3]}) + b"abc" \
+            + _line({"id": 2, "op": "stats"})
+        reader = JobReader()
+        jobs = reader.feed(data)
+
+        self.assertFalse(reader.broken)
+        self.assertEqual([j["id"] for j in jobs], [1, 2])
+        self.assertEqual(_job_response(jobs[0])["ok"], False)
+
+
+class HandleTest(unittest.TestCase):
+    def test_args_invalido_responde_erro(self):
+        for bad in (5, "x.pdf", [1], {"a": 1}):
+            job = {"id": 1, "vendor": "condomob", "args": bad}
+            resp = handle(job)
+            self.assertEqual((resp["id"], resp["ok"]), (1, False))
+            self.assertIn("args", resp["erro"])
+            resps = list(handle_stream(job))
+            self.assertEqual(len(resps), 1)
+            self.assertEqual((resps[0]["id"], resps[0]["ok"]), (1, False))
+
+    def test_vendor_desconhecido(self):
+        resp = handle({"id": 1, "vendor": "x", "args": []})
+        self.assertEqual(resp["ok"], False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Layout "rows" do pdf_io: linhas e células refeitas pela geometria das palavras
+e os parsers que leem as células (Superlógica APBL_NAO_ROTULADO e
+BRCondominios), sem o recorte do texto no meio da linha.
+
+As tabelas de teste são escritas coluna por coluna, como nos PDFs em que o
+get_text("text") do MuPDF devolve a coluna inteira antes da próxima.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import fitz
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS), "bench"))
+
+import brcondominios_extract as br  # noqa: E402
+import pdf_io  # noqa: E402
+import superlogica_extract as sl  # noqa: E402
+from corpus import brcondominios_lines, superlogica_lines  # noqa: E402
+from text_doc import CELL_SEP, TextDoc  # noqa: E402
+
+ROW_HEIGHT = 14
+
+
+def write_table(path: str, rows: list):
+    """rows: [(x, texto), ...] por linha; escreve coluna por coluna (x crescente)."""
+    doc = fitz.open()
+    page = doc.new_page()
+    for x in sorted({x for row in rows for x, _ in row}):
+        for i, row in enumerate(rows):
+            for cx, text in row:
+                if cx == x:
+                    page.insert_text((x, 40 + i * ROW_HEIGHT), text, fontsize=9, fontname="helv")
+    doc.save(path)
+    doc.close()
+
+
+class RowsLayoutTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        pdf_io.set_layout("rows")
+        self.addCleanup(pdf_io.set_layout, "text")
+
+    def _pdf(self, name: str, rows: list) -> str:
+        path = os.path.join(self.dir, name)
+        write_table(path, rows)
+        return path
+
+    # ------------------ células ------------------
+    def test_celulas_pela_distancia_entre_palavras(self):
+        path = self._pdf("t.pdf", [
+            [(30, "0101 01"), (100, "JOSE DA SILVA"), (260, "PROPRIETARIO"), (360, "(98) 98888-1111")],
+            [(360, "jose@mail.com")],
+        ])
+        doc = sl.pdf_doc(path, pdf_io.fitz_pages)
+
+        self.assertTrue(doc.cells)
+        self.assertEqual(doc.rows, [
+            ["0101 01", "JOSE DA SILVA", "PROPRIETARIO", "(98) 98888-1111"],
+            ["jose@mail.com"],
+        ])
+        # o texto dos detectores troca o separador por espaço
+        self.assertNotIn(CELL_SEP, doc.text)
+        self.assertEqual(doc.lines[0], "0101 01 JOSE DA SILVA PROPRIETARIO (98) 98888-1111")
+
+    # ------------------ Superlógica ------------------
+    def test_apbl_contatos_pelas_celulas(self):
+        rows = [[(30, "CONTATOS DAS UNIDADES")]]
+        for ap in range(101, 107):
+            rows.append([(30, f"0{ap} 01"), (100, f"MORADOR {ap}"), (260, "PROPRIETARIO"),
+                         (360, f"(98) 98888-{ap:04d}")])
+            rows.append([(360, f"m{ap}@mail.com")])
+        path = self._pdf("c.pdf", rows)
+        doc = sl.pdf_doc(path, pdf_io.fitz_pages)
+
+        self.assertEqual(sl.detect_layout(doc), "APBL_NAO_ROTULADO")
+        got = sl.parse_contatos("APBL_NAO_ROTULADO", doc)
+        self.assertEqual([c.to_dict() for c in got[:2]], [
+            {"unidade": "AP 101 BL 1", "Nome": "Morador 101",
+             "Telefone": ["+5598988880101"], "Email": ["M101@MAIL.COM"]},
+            {"unidade": "AP 102 BL 1", "Nome": "Morador 102",
+             "Telefone": ["+5598988880102"], "Email": ["M102@MAIL.COM"]},
+        ])
+        self.assertEqual(len(got), 6)
+
+        # no layout "text" as colunas saem uma depois da outra e nem o layout é detectado
+        pdf_io.set_layout("text")
+        self.assertEqual(sl.detect_layout(sl.pdf_doc(path, pdf_io.fitz_pages)), "DESCONHECIDO")
+
+    def test_apbl_inad_so_no_comeco_da_linha(self):
+        rows = [[(30, "RELATORIO DE INADIMPLENCIA")]]
+        for ap in range(101, 107):
+            rows.append([(30, f"{ap} 1 - FULANO"), (200, f"{ap},00")])
+        # "2 3 - " no meio da linha não é unidade (o texto achava um par ali)
+        rows.append([(30, "TOTAL"), (200, "2 3 - 600,00")])
+        doc = sl.pdf_doc(self._pdf("i.pdf", rows), pdf_io.fitz_pages)
+
+        self.assertEqual(sl.parse_inad("APBL_NAO_ROTULADO", doc),
+                         {sl.normalize_unidade(f"AP {ap} BL 1") for ap in range(101, 107)})
+        self.assertIn(sl.normalize_unidade("AP 2 BL 3"), sl.parse_inad_apbl_sem_rotulo(doc))
+
+    def test_apbl_uma_unidade_por_linha_igual_ao_texto(self):
+        # no corpus (uma unidade por linha, uma célula por linha) os dois caminhos concordam
+        cont, inad = superlogica_lines("APBL_NAO_ROTULADO", 80, random.Random(9))
+        for lines in (cont, inad):
+            text_doc = TextDoc.from_text("\n".join(lines))
+            rows_doc = TextDoc(text_doc.pages, cells=True)
+            self.assertEqual([c.to_dict() for c in sl.parse_contatos_apbl_rows(rows_doc)],
+                             [c.to_dict() for c in sl.parse_contatos_apbl_sem_rotulo(text_doc)])
+            self.assertEqual(sl.parse_inad_apbl_rows(rows_doc), sl.parse_inad_apbl_sem_rotulo(text_doc))
+
+    # ------------------ BRCondominios ------------------
+    def test_br_campos_pelas_celulas(self):
+        path = self._pdf("br.pdf", [
+            [(30, "Unidade: AR1001"), (200, "Local: Torre")],
+            [(30, "Pessoa: JOSE DA SILVA")],
+            [(30, "Tp. Pessoa:"), (120, "Proprietário")],
+            [(30, "Telefone:"), (120, "98 98888-1111"), (260, "Celular: 98 97777-2222"), (420, "Whats:")],
+            [(30, "Email:"), (120, "jose@mail.com")],
+            [(30, "Pessoa: MARIA LIMA")],
+            [(30, "Tp. Pessoa:"), (120, "Inquilino")],
+            [(30, "Telefone:"), (120, "98 96666-3333")],
+            [(30, "Unidade: BL I 05 Local: Casa")],
+            [(30, "Pessoa: ANA"), (200, "Tp. Pessoa: Proprietária")],
+            [(30, "Contato:"), (120, "ana@mail.com")],
+        ])
+        text = br.pdf_text(path, pdf_io.fitz_pages)
+
+        self.assertIs(br.contatos_parser(), br.parse_contatos_unidades_rows)
+        self.assertEqual([c.to_dict() for c in br.parse_contatos_unidades_rows(text)], [
+            {"unidade": "AR1001", "Nome": "Jose Da Silva",
+             "Telefone": ["+5598988881111", "+5598977772222"], "Email": ["jose@mail.com"]},
+            {"unidade": br.normalize_unidade("BL I 05"), "Nome": "Ana", "Telefone": [], "Email": ["ana@mail.com"]},
+        ])
+
+    def test_br_debitos_primeira_celula(self):
+        path = self._pdf("deb.pdf", [
+            [(30, "LISTA DE DEBITOS")],
+            [(30, "AR100"), (120, "12/2025"), (220, "123,45")],
+            [(30, "BL I 05"), (120, "11/2025"), (220, "9,90")],
+            [(30, "Obs."), (120, "AR999 renegociado")],
+        ])
+        text = br.pdf_text(path, pdf_io.fitz_pages)
+
+        self.assertEqual(br.parse_inadimplentes_debitos_rows(text),
+                         {br.normalize_unidade("AR100"), br.normalize_unidade("BL I 05")})
+
+    def test_br_corpus_igual_ao_texto(self):
+        for layout in ("BR_ANTIGO", "BR_NOVO"):
+            cont, deb = brcondominios_lines(layout, 40, random.Random(4))
+            cont_text, deb_text = "\n".join(cont), "\n".join(deb)
+            with self.subTest(layout=layout):
+                self.assertEqual([c.to_dict() for c in br.parse_contatos_unidades_rows(cont_text)],
+                                 [c.to_dict() for c in br.parse_contatos_unidades(cont_text)])
+                self.assertEqual(br.parse_inadimplentes_debitos_rows(deb_text),
+                                 br.parse_inadimplentes_debitos(deb_text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segmentador linear da Superlógica (segment.segments) contra as regex antigas
+(corpo preguiçoso em DOTALL com lookahead, bench_segment.LEGACY): mesmos
+blocos nos textos do corpus sintético e em PDFs "colados", fora as duas
+mudanças documentadas no commit do segmentador:
+
+  - AP_SEM_BLOCO: marcador com \\b depois dos 4 dígitos (a regex antiga abria
+    um bloco falso no meio de um telefone no começo do texto);
+  - APBL_NAO_ROTULADO: "101 1 - NOME" não deixa "- " no começo do nome.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import os
+import random
+import re
+import sys
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS), "bench"))
+
+import superlogica_extract as sl  # noqa: E402
+from bench_segment import LEGACY  # noqa: E402
+from corpus import superlogica_lines  # noqa: E402
+from contact_record import Contato  # noqa: E402
+from text_doc import TextDoc  # noqa: E402
+
+LEGACY_RE = dict(LEGACY)
+
+
+# ------------------ parsers antigos (como eram antes do segmentador) ------------------
+def _old_force_breaks(doc: TextDoc) -> str:
+    t = re.sub(
+        r"(^|[^\d])0*(\d{1,5})\s+0*(\d{1,3})\s+([A-ZÀ-Ü])",
+        lambda m: f"{m.group(1)}\n{m.group(2)} {m.group(3)} {m.group(4)}",
+        doc.text,
+        flags=re.I
+    )
+    return re.sub(
+        r"(^|[^\d])0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*",
+        lambda m: f"{m.group(1)}\n{m.group(2)} {m.group(3)} - ",
+        t,
+        flags=re.I
+    )
+
+
+def old_apbl_sem_rotulo(doc: TextDoc) -> list:
+    out = []
+    for ap, bl, body in LEGACY_RE["apbl_sem_rotulo"].findall(_old_force_breaks(doc).upper()):
+        first_line = (body.split("\n")[0] or "").strip()
+        nome = re.sub(r"\bPROPRIET[ÁA]RIO\b", "", first_line, flags=re.I).strip()
+        c = Contato(sl.normalize_unidade(f"AP {int(ap)} BL {int(bl)}"), nome.title())
+        sl.add_contacts(c, body)
+        out.append(c)
+    return out
+
+
+def old_ap_sem_bloco(doc: TextDoc) -> list:
+    t = re.sub(r"(?m)^\s*(0*\d{4})\b", r"\n\1", doc.text)
+    t = re.sub(r"\n{2,}", "\n", t).strip()
+    out = []
+    for raw_ap, body in LEGACY_RE["ap_sem_bloco"].findall(t):
+        body_clean = (body or "").strip()
+        lines = [sl.norm_space(x) for x in body_clean.splitlines() if sl.norm_space(x)]
+        nome = re.sub(r"\bPROPRIET[ÁA]RIO\b", "", lines[0], flags=re.I).strip() if lines else ""
+        c = Contato(sl.normalize_unidade(f"AP {int(raw_ap)}"), nome.title())
+        sl.add_contacts(c, body_clean)
+        out.append(c)
+    return out
+
+
+def old_apbl_num_bl(doc: TextDoc) -> list:
+    out = []
+    for ap, bl, body in LEGACY_RE["apbl_num_bl"].findall(doc.text):
+        body_clean = (body or "").strip()
+        lines = [sl.norm_space(x) for x in body_clean.splitlines() if sl.norm_space(x)]
+        nome = ""
+        for ln in lines:
+            if "PROPRIET" in ln.upper() or sl._contacts.has_contact(ln):
+                continue
+            nome = ln
+            break
+        c = Contato(sl.normalize_unidade(f"AP {int(ap)} BL {int(bl)}"), nome.title())
+        sl.add_contacts(c, body_clean)
+        out.append(c)
+    return out
+
+
+def old_inad_apbl_sem_rotulo(doc: TextDoc) -> set:
+    re_line = re.compile(r"^0*(\d{1,5})\s+0*(\d{1,3})\s*-\s*", re.M)
+    return {sl.normalize_unidade(f"AP {int(ap)} BL {int(bl)}")
+            for ap, bl in re_line.findall(_old_force_breaks(doc).upper())}
+
+
+def _dicts(contatos: list) -> list:
+    return [c.to_dict() for c in contatos]
+
+
+def _corpus(layout: str, n: int = 120, seed: int = 3):
+    cont, inad = superlogica_lines(layout, n, random.Random(f"{seed}:{layout}"))
+    return TextDoc.from_text("\n".join(cont)), TextDoc.from_text("\n".join(inad))
+
+
+# ------------------ testes ------------------
+class SegmentLegacyTest(unittest.TestCase):
+    def test_apbl_sem_rotulo_corpus(self):
+        cont, inad = _corpus("APBL_NAO_ROTULADO")
+        new = sl.parse_contatos_apbl_sem_rotulo(cont)
+        self.assertEqual(len(new), 120)
+        self.assertEqual(_dicts(new), _dicts(old_apbl_sem_rotulo(cont)))
+        self.assertEqual(sl.parse_inad_apbl_sem_rotulo(inad), old_inad_apbl_sem_rotulo(inad))
+
+    def test_apbl_sem_rotulo_colado(self):
+        # várias unidades por linha, com e sem quebra entre elas
+        doc = TextDoc.from_text(
+            "0101 01 JOSE SOUZA PROPRIETARIO (98) 98888-1111 jose@mail.com 102 1 MARIA LIMA 98 97777-2222\n"
+            "0103 01 ANA SÁ\nana@mail.com 104 2 PEDRO 11 96666-3333 0105 02 LUCIA\n"
+        )
+        new = sl.parse_contatos_apbl_sem_rotulo(doc)
+        self.assertEqual([c.unidade for c in new],
+                         [sl.normalize_unidade(u) for u in
+                          ("AP 101 BL 1", "AP 102 BL 1", "AP 103 BL 1", "AP 104 BL 2", "AP 105 BL 2")])
+        self.assertEqual(_dicts(new), _dicts(old_apbl_sem_rotulo(doc)))
+
+    def test_inad_apbl_sem_rotulo_colado(self):
+        doc = TextDoc.from_text("101 1 - JOSE 300,00 0102 01 - MARIA 10,00\n103 2 - ANA 1,00 TOTAL 2 3\n")
+        self.assertEqual(sl.parse_inad_apbl_sem_rotulo(doc), old_inad_apbl_sem_rotulo(doc))
+        self.assertEqual(len(sl.parse_inad_apbl_sem_rotulo(doc)), 3)
+
+    def test_apbl_sem_rotulo_sem_prefixo_de_traco(self):
+        doc = TextDoc.from_text("101 1 - JOSE SOUZA\n98 98888-1111\n102 1 - MARIA LIMA\n")
+        new = sl.parse_contatos_apbl_sem_rotulo(doc)
+        old = old_apbl_sem_rotulo(doc)
+
+        self.assertEqual([c.nome for c in new], ["Jose Souza", "Maria Lima"])
+        # mudança documentada: a regex antiga deixava o "- " do marcador no nome
+        self.assertEqual([c.nome for c in old], ["- Jose Souza", "- Maria Lima"])
+        for c in old:
+            c.nome = c.nome[2:]
+        self.assertEqual(_dicts(new), _dicts(old))
+
+    def test_ap_sem_bloco_corpus(self):
+        cont, _ = _corpus("AP_SEM_BLOCO")
+        new = sl.parse_contatos_ap_sem_bloco(cont)
+        self.assertEqual(len(new), 120)
+        self.assertEqual(_dicts(new), _dicts(old_ap_sem_bloco(cont)))
+
+    def test_ap_sem_bloco_telefone_no_comeco(self):
+        doc = TextDoc.from_text("95918-3623\n0101 - JOSE\n98 98888-1111\n0102 - MARIA\n")
+        new = sl.parse_contatos_ap_sem_bloco(doc)
+        old = old_ap_sem_bloco(doc)
+
+        # mudança documentada: sem \b a regex antiga abria "AP 9591" no telefone
+        self.assertEqual(old[0].unidade, sl.normalize_unidade("AP 9591"))
+        self.assertEqual(_dicts(new), _dicts(old[1:]))
+
+    def test_apbl_num_bl_corpus(self):
+        cont, _ = _corpus("APBL_NUM_BL")
+        new = sl.parse_contatos_apbl_num_bl(cont)
+        self.assertEqual(len(new), 120)
+        self.assertEqual(_dicts(new), _dicts(old_apbl_num_bl(cont)))
+
+    def test_apbl_num_bl_linhas_em_branco(self):
+        doc = TextDoc.from_text("101 BL 01\n\n \nPROPRIETARIO\nJOSE\n\n\n98 98888-1111\n 102 BL 1\nMARIA\n")
+        self.assertEqual(_dicts(sl.parse_contatos_apbl_num_bl(doc)), _dicts(old_apbl_num_bl(doc)))
+
+
+if __name__ == "__main__":
+    unittest.main()
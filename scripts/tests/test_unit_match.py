@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UnitIndex do unit_match: casamento exato, aproximado (componente a mais de um
+lado, só par único dos dois lados) e "sem_contato" com --list-unmatched.
+
+    python3 -m pytest -q scripts/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unit_match  # noqa: E402
+from unit_match import UnitIndex  # noqa: E402
+from unit_norm import normalize_superlogica as norm  # noqa: E402
+from unit_norm import unit_key_superlogica as key  # noqa: E402
+
+
+def _index(inad, contatos, approx) -> UnitIndex:
+    return UnitIndex({norm(u) for u in inad}, [norm(u) for u in contatos], key, approx=approx)
+
+
+class UnitIndexTest(unittest.TestCase):
+    def test_exato(self):
+        idx = _index(["AP 101 BL 1", "AP 102 BL 1"], ["Apto 101 Bloco 01", "AP 103 BL 1"], approx=False)
+
+        self.assertEqual(idx.find(norm("AP 101 BL 01")), "AP 101 BL 1")
+        self.assertIsNone(idx.find("AP 103 BL 1"))
+        self.assertEqual(idx.sem_contato(), ["AP 102 BL 1"])
+        self.assertEqual(idx.totais(), {"inad_sem_contato": 1, "unidades_sem_debito": 1})
+
+    def test_aproximado_unico(self):
+        inad = ["QD A CASA 5", "AP 101 BL 1 SALA"]
+        contatos = ["CASA 5", "AP 101 BL 1"]
+
+        # desligado: grafias diferentes não casam
+        self.assertIsNone(_index(inad, contatos, approx=False).find("CASA 5"))
+
+        idx = _index(inad, contatos, approx=True)
+        # distância 1: a quadra só de um lado
+        self.assertEqual(idx.find("CASA 5"), "QD A CASA 5")
+        # mesma chave, grafia diferente
+        self.assertEqual(idx.find("AP 101 BL 1"), "AP 101 BL 1 SALA")
+        self.assertEqual(idx.sem_contato(), [])
+        self.assertEqual(idx.totais()["match_aproximado"], 2)
+
+    def test_candidato_ambiguo_e_rejeitado(self):
+        # duas unidades em débito servem para "CASA 5"
+        idx = _index(["QD A CASA 5", "QD B CASA 5"], ["CASA 5"], approx=True)
+        self.assertIsNone(idx.find("CASA 5"))
+        self.assertEqual(idx.totais()["match_aproximado"], 0)
+
+    def test_candidato_disputado_e_rejeitado(self):
+        # duas unidades de contato apontam para a mesma unidade em débito
+        idx = _index(["QD A CASA 5"], ["CASA 5", "QD A LT 3 CASA 5"], approx=True)
+        self.assertIsNone(idx.find("CASA 5"))
+        self.assertIsNone(idx.find(norm("QD A LT 3 CASA 5")))
+        self.assertEqual(idx.sem_contato(), ["QD A CASA 5"])
+
+    def test_valor_diferente_nunca_casa(self):
+        idx = _index(["AP 102 BL 1"], ["AP 101 BL 1"], approx=True)
+        self.assertIsNone(idx.find("AP 101 BL 1"))
+
+
+class AttachTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(unit_match.set_list_unmatched, unit_match.LIST_UNMATCHED)
+
+    def _out(self) -> dict:
+        idx = _index(["AP 101 BL 1", "AP 102 BL 1"], ["AP 101 BL 1"], approx=False)
+        return unit_match.attach({"totais": {"contatos": 1}}, idx)
+
+    def test_sem_list_unmatched_so_contagens(self):
+        unit_match.set_list_unmatched(False)
+        out = self._out()
+        self.assertNotIn("sem_contato", out)
+        self.assertEqual(out["totais"], {"contatos": 1, "inad_sem_contato": 1, "unidades_sem_debito": 0})
+
+    def test_com_list_unmatched(self):
+        unit_match.set_list_unmatched(True)
+        out = self._out()
+        self.assertEqual(out["sem_contato"], ["AP 102 BL 1"])
+        self.assertEqual(out["totais"]["inad_sem_contato"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Documento de texto normalizado uma única vez por PDF.
+
+Detectores e parsers recebem o mesmo TextDoc em vez de cada um refazer a troca
+de form feed e NBSP, o colapso de espaços, o splitlines() e o upper() no texto todo.
+As visões derivadas (maiúsculas, linhas limpas, offsets) são criadas sob demanda
+e guardadas.
+
+No layout "rows" do pdf_io as páginas trazem as células de cada linha da tabela
+separadas por CELL_SEP: o texto troca o separador por espaço (mesmos offsets)
+e `rows` devolve as células, para os parsers que leem a linha por coluna.
+"""
+
+import re
+from bisect import bisect_right
+from typing import List, Optional
+
+_WS_RE = re.compile(r"[ \t]+")
+
+# entre as células de uma linha no layout "rows" (normalize_text o apagaria)
+CELL_SEP = "\t"
+
+
+def normalize_text(t: str) -> str:
+    t = (t or "").replace("\f", "\n")
+    t = t.replace("\u00A0", " ")
+    return _WS_RE.sub(" ", t)
+
+
+def cell_rows(text: str) -> List[List[str]]:
+    """Linhas não vazias quebradas nas células (sem CELL_SEP: uma célula por linha)."""
+    out = []
+    for ln in (text or "").replace("\f", "\n").splitlines():
+        cells = [c.strip() for c in ln.split(CELL_SEP) if c.strip()]
+        if cells:
+            out.append(cells)
+    return out
+
+
+class TextDoc:
+    __slots__ = ("pages", "text", "page_starts", "cells",
+                 "_upper", "_lines", "_upper_lines", "_line_starts", "_rows")
+
+    def __init__(self, pages: List[str], cells: bool = False):
+        """
+        `pages` já normalizadas (pdf_io.normalize_page ou normalize_text).
+        cells: páginas do layout "rows", com CELL_SEP entre as células.
+        """
+        self.pages = pages
+        self.cells = cells
+        text = "\n".join(pages)
+        if "\f" in text:
+            text = text.replace("\f", "\n")
+        if cells and CELL_SEP in text:
+            text = text.replace(CELL_SEP, " ")
+        self.text = text
+
+        starts = []
+        off = 0
+        for p in pages:
+            starts.append(off)
+            off += len(p) + 1
+        self.page_starts = starts
+
+        self._upper = None
+        self._lines = None
+        self._upper_lines = None
+        self._line_starts = None
+        self._rows = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "TextDoc":
+        return cls([normalize_text(text)])
+
+    # ------------------ visões ------------------
+    @property
+    def upper(self) -> str:
+        if self._upper is None:
+            self._upper = self.text.upper()
+        return self._upper
+
+    @property
+    def lines(self) -> List[str]:
+        """Linhas não vazias, sem espaços nas pontas (o antigo norm_space + filtro)."""
+        if self._lines is None:
+            self._lines = [x.strip() for x in self.text.splitlines() if x.strip()]
+        return self._lines
+
+    @property
+    def upper_lines(self) -> List[str]:
+        if self._upper_lines is None:
+            self._upper_lines = [x.upper() for x in self.lines]
+        return self._upper_lines
+
+    @property
+    def rows(self) -> List[List[str]]:
+        """Células de cada linha não vazia (só faz sentido com cells)."""
+        if self._rows is None:
+            self._rows = cell_rows("\n".join(self.pages) if self.cells else self.text)
+        return self._rows
+
+    @property
+    def line_starts(self) -> List[int]:
+        """Offset de início de cada linha ("\\n") em self.text."""
+        if self._line_starts is None:
+            starts = [0]
+            find = self.text.find
+            i = find("\n")
+            while i >= 0:
+                starts.append(i + 1)
+                i = find("\n", i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    # ------------------ posições ------------------
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset) - 1
+
+    def page_of(self, offset: int) -> int:
+        return bisect_right(self.page_starts, offset) - 1
+
+    def pages_end(self, n: Optional[int]) -> Optional[int]:
+        """Offset do fim das n primeiras páginas (None = documento inteiro)."""
+        if not n or n >= len(self.pages):
+            return None
+        return self.page_starts[n]
+
+    def __len__(self) -> int:
+        return len(self.text)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tempos por etapa e contadores dos extratores (opcional).
+
+Ligado por --timings nos scripts/worker ou EXTRACT_TIMINGS=1. Cada run() abre
+um coletor com begin(); as etapas marcadas com stage() somam tempo de parede
+sob o escopo atual ("contatos", "inadimplentes"...) e o resultado vai em
+debug.timings da saída JSON, junto com páginas, tamanho do texto e pico de RSS.
+
+Desligado, stage()/count() não fazem nada além de checar um global.
+"""
+
+import os
+import resource
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+ENABLED = os.environ.get("EXTRACT_TIMINGS") == "1"
+
+
+def set_enabled(flag: bool):
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+class Timings:
+    __slots__ = ("stages", "counters", "pages", "scope", "_t0")
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.pages = {}
+        self.scope = None
+        self._t0 = time.perf_counter()
+
+    def _key(self, name: str) -> str:
+        return f"{self.scope}.{name}" if self.scope else name
+
+    def add(self, name: str, secs: float):
+        key = self._key(name)
+        self.stages[key] = self.stages.get(key, 0.0) + secs
+
+    def count(self, name: str, value):
+        if self.scope:
+            self.counters.setdefault(name, {})[self.scope] = value
+        else:
+            self.counters[name] = value
+
+    def page(self, index: int, secs: float):
+        """Tempo de extração de uma página (resumido em por_pagina)."""
+        n, total, worst, worst_i = self.pages.get(self.scope, (0, 0.0, 0.0, None))
+        if worst_i is None or secs > worst:
+            worst, worst_i = secs, index
+        self.pages[self.scope] = (n + 1, total + secs, worst, worst_i)
+
+    def snapshot(self) -> tuple:
+        """Medições cruas, para voltar de um processo filho (ver merge)."""
+        return self.stages, self.counters, self.pages
+
+    def merge(self, snap: tuple):
+        stages, counters, pages = snap
+        for k, v in stages.items():
+            self.stages[k] = self.stages.get(k, 0.0) + v
+        for k, v in counters.items():
+            mine = self.counters.get(k)
+            if isinstance(v, dict) and isinstance(mine, dict):
+                mine.update(v)
+            else:
+                self.counters[k] = v
+        self.pages.update(pages)
+
+    def as_dict(self) -> dict:
+        out = {
+            "timings": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+        }
+        out["timings"]["total"] = round((time.perf_counter() - self._t0) * 1000, 2)
+        out.update(self.counters)
+
+        if self.pages:
+            out["por_pagina"] = {
+                scope or "-": {
+                    "paginas": n,
+                    "media_ms": round(total * 1000 / n, 3),
+                    "max_ms": round(worst * 1000, 3),
+                    "pagina_max": worst_i,
+                }
+                for scope, (n, total, worst, worst_i) in self.pages.items()
+            }
+
+        out["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        if children:
+            out["peak_rss_filhos_mb"] = round(children, 1)
+        return out
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+_current: Optional[Timings] = None
+
+
+def begin() -> Optional[Timings]:
+    """Novo coletor para este run() (None se desligado)."""
+    global _current
+    _current = Timings() if ENABLED else None
+    return _current
+
+
+def current() -> Optional[Timings]:
+    return _current
+
+
+@contextmanager
+def stage(name: str):
+    t = _current
+    if t is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t.add(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def scope(name: str):
+    t = _current
+    if t is None:
+        yield
+        return
+    prev, t.scope = t.scope, name
+    try:
+        yield
+    finally:
+        t.scope = prev
+
+
+def count(name: str, value):
+    t = _current
+    if t is not None:
+        t.count(name, value)
+
+
+def merge(snap: Optional[tuple]):
+    """Soma ao coletor atual as medições de outro processo (snapshot())."""
+    t = _current
+    if t is not None and snap is not None:
+        t.merge(snap)
+
+
+def attach(out: dict, t: Optional[Timings]) -> dict:
+    """Junta as medições em out["debug"] (mantendo o que já estiver lá)."""
+    if t is not None:
+        out.setdefault("debug", {}).update(t.as_dict())
+    return out
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Casamento das unidades dos contatos com as da lista de inadimplentes.
+
+Os dois lados chegam já normalizados (normalize_* do vendor). O que for igual
+casa por pertinência no conjunto, O(1) por unidade. Com o modo aproximado
+ligado, só as sobras dos dois lados passam por um índice dos componentes
+estruturados (unit_key: bloco, ap, quadra, lote, casa), sem comparar todas
+contra todas:
+
+  - mesma chave: as grafias diferem, os componentes não ("AP 101 BL 01 SALA"
+    e "AP 101 BL 1");
+  - distância 1: um componente a mais de um lado, todos os outros iguais
+    ("CASA 5" e "QD A CASA 5"). Cada chave entra no índice também com cada
+    componente apagado, então a busca custa um acesso por componente.
+
+Valor de componente diferente nunca casa (AP 101 x AP 102 são unidades
+vizinhas, não erro de grafia), e um par aproximado só vale se for único dos
+dois lados: a unidade do contato tem um único candidato e esse candidato não é
+disputado por outra unidade de contato. Cobrança para a unidade errada é pior
+que contato faltando.
+
+As sobras dos dois lados saem sempre como contagens nos totais; a lista das
+unidades em débito sem contato só com --list-unmatched (pode ser grande e
+anularia o ganho do modo diff).
+
+Configuração por ambiente:
+    EXTRACT_UNIT_APPROX      "1" liga o casamento aproximado (ou --approx-units)
+    EXTRACT_LIST_UNMATCHED   "1" inclui "sem_contato" na saída (ou --list-unmatched)
+"""
+
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import timings
+from unit_norm import UnitKey
+
+APPROX = os.environ.get("EXTRACT_UNIT_APPROX") == "1"
+LIST_UNMATCHED = os.environ.get("EXTRACT_LIST_UNMATCHED") == "1"
+
+# chave com mais de uma unidade de inadimplentes: não serve para casar
+_AMBIGUOUS = object()
+
+
+def set_approx(flag: bool):
+    global APPROX
+    APPROX = bool(flag)
+
+
+def set_list_unmatched(flag: bool):
+    global LIST_UNMATCHED
+    LIST_UNMATCHED = bool(flag)
+
+
+def _drops(key: UnitKey) -> List[UnitKey]:
+    """A chave sem cada um dos componentes presentes (só se sobrar algum)."""
+    present = [i for i, v in enumerate(key) if v is not None]
+    if len(present) < 2:
+        return []
+    out = []
+    for i in present:
+        parts = list(key)
+        parts[i] = None
+        out.append(UnitKey(*parts))
+    return out
+
+
+def _approx_pairs(inad: Iterable[str], contatos: Iterable[str],
+                  key_fn: Callable[[str], UnitKey]) -> Dict[str, str]:
+    """Pares (unidade do contato -> unidade em débito) aproximados e únicos."""
+    by_key = {}
+    by_drop = {}
+    for u in inad:
+        k = key_fn(u)
+        if k == UnitKey():
+            continue
+        by_key[k] = _AMBIGUOUS if k in by_key else u
+        for d in _drops(k):
+            by_drop.setdefault(d, set()).add(u)
+
+    proposals = {}
+    claims = {}
+    for u in contatos:
+        k = key_fn(u)
+        if k == UnitKey():
+            continue
+        hit = by_key.get(k)
+        if hit is not None:
+            cands = set() if hit is _AMBIGUOUS else {hit}
+        else:
+            # inadimplente com um componente a mais / a menos que o contato
+            cands = set(by_drop.get(k, ()))
+            for d in _drops(k):
+                h = by_key.get(d)
+                if h is not None:
+                    cands.add(h)
+        if len(cands) != 1 or _AMBIGUOUS in cands:
+            continue
+        cand, = cands
+        proposals[u] = cand
+        claims[cand] = claims.get(cand, 0) + 1
+
+    return {u: c for u, c in proposals.items() if claims[c] == 1}
+
+
+class UnitIndex:
+    """
+    Resolve a unidade (normalizada) de um contato para a unidade em débito com
+    que ela casa, ou None. Montado uma vez com os dois lados inteiros.
+    """
+
+    def __init__(self, inad_units: Set[str], contato_units: Iterable[str],
+                 key_fn: Callable[[str], UnitKey], approx: Optional[bool] = None):
+        self.approx = APPROX if approx is None else approx
+        self.inad = inad_units
+        self.contatos = set(contato_units)
+        exact = self.contatos & inad_units
+        self.resolved = {u: u for u in exact}
+        self.n_approx = 0
+        if self.approx:
+            with timings.stage("match.aproximado"):
+                pairs = _approx_pairs(inad_units - exact, self.contatos - exact, key_fn)
+            self.resolved.update(pairs)
+            self.n_approx = len(pairs)
+
+    def find(self, unit: str) -> Optional[str]:
+        return self.resolved.get(unit)
+
+    def sem_contato(self) -> List[str]:
+        """Unidades em débito que nenhum contato alcançou."""
+        hit = set(self.resolved.values())
+        return sorted(u for u in self.inad if u not in hit)
+
+    def totais(self) -> Dict[str, int]:
+        out = {
+            "inad_sem_contato": len(self.inad) - len(set(self.resolved.values())),
+            "unidades_sem_debito": len(self.contatos) - len(self.resolved),
+        }
+        if self.approx:
+            out["match_aproximado"] = self.n_approx
+        return out
+
+
+def attach(out: Dict, index: UnitIndex) -> Dict:
+    """Sobras dos dois lados em totais; com LIST_UNMATCHED, as unidades em débito sem contato."""
+    out["totais"].update(index.totais())
+    if LIST_UNMATCHED:
+        out["sem_contato"] = index.sem_contato()
+    return out
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Normalização de unidades com regex pré-compiladas e memo limitado.
+
+As mesmas strings de unidade se repetem o tempo todo (contatos, inadimplentes
+e de novo no join), então cada normalizador guarda os últimos resultados.
+As regras de canonicalização são as mesmas de antes, na mesma ordem.
+
+unit_key() quebra a unidade canônica em componentes (bloco, ap, quadra,
+lote, casa) para casamento estruturado.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+MEMO_SIZE = 16384
+
+
+class UnitKey(NamedTuple):
+    bloco: Optional[str] = None
+    ap: Optional[str] = None
+    quadra: Optional[str] = None
+    lote: Optional[str] = None
+    casa: Optional[str] = None
+
+
+_WS_TAB_RE = re.compile(r"[ \t]+")
+_WS_RE = re.compile(r"\s+")
+
+
+# ------------------ Superlógica ------------------
+_SL_PUNCT_RE = re.compile(r"[.,;:/\\|]+")
+_SL_RULES = (
+    (re.compile(r"\bBL\s*0*(\d+)\b"), r"BL \1"),
+    (re.compile(r"\bQD\s*0*([A-Z0-9]+)\b"), r"QD \1"),
+    (re.compile(r"\bLT\s*0*([0-9]+[A-Z]?)\b"), r"LT \1"),
+    (re.compile(r"\bCASA\s*0*(\d+)\b"), r"CASA \1"),
+    # 4-102 -> AP 102 BL 4
+    (re.compile(r"\b0*(\d+)\s*-\s*0*(\d+)\b"), r"AP \2 BL \1"),
+    # BL 1 AP 102 -> AP 102 BL 1
+    (re.compile(r"\bBL\s+0*(\d+)\s+AP\s+0*(\d+)\b"), r"AP \2 BL \1"),
+    # AP 001 -> AP 1
+    (re.compile(r"\bAP\s*0*(\d+)\b"), r"AP \1"),
+    # 104BL01 ou 104 BL01 -> AP 104 BL 1
+    (re.compile(r"^\s*0*(\d{1,5})\s*BL\s*0*(\d{1,3})\b"), r"AP \1 BL \2"),
+    # LT 5 QUADRA A -> QD A LT 5
+    (re.compile(r"\bLT\s*0*([0-9]+[A-Z]?)\s+(?:QUADRA|QD)\s*([A-Z0-9]+)\b"), r"QD \2 LT \1"),
+)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _normalize_superlogica(u: str) -> str:
+    s = u.strip().replace("\u00A0", " ")
+    s = _WS_TAB_RE.sub(" ", s).strip().upper()
+    s = _SL_PUNCT_RE.sub(" ", s)
+    s = _WS_RE.sub(" ", s).strip()
+
+    s = (
+        s.replace("APARTAMENTO", "AP")
+         .replace("APTO", "AP")
+         .replace("BLOCO", "BL")
+         .replace("QUADRA", "QD")
+         .replace("LOTE", "LT")
+    )
+
+    for pat, repl in _SL_RULES:
+        s = pat.sub(repl, s)
+
+    return _WS_RE.sub(" ", s).strip()
+
+
+def normalize_superlogica(u: str) -> str:
+    return _normalize_superlogica(u or "")
+
+
+_SL_KEY_RE = re.compile(r"\b(AP|BL|QD|LT|CASA)\s+([A-Z0-9]+)\b")
+_SL_KEY_FIELDS = {"AP": "ap", "BL": "bloco", "QD": "quadra", "LT": "lote", "CASA": "casa"}
+
+
+def _strip_zeros(v: str) -> str:
+    return v.lstrip("0") or "0" if v.isdigit() else v
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _unit_key_superlogica(canon: str) -> UnitKey:
+    parts = {}
+    for label, val in _SL_KEY_RE.findall(canon):
+        parts.setdefault(_SL_KEY_FIELDS[label], _strip_zeros(val))
+    return UnitKey(**parts)
+
+
+def unit_key_superlogica(u: str) -> UnitKey:
+    """Componentes da unidade (normaliza antes, se ainda não estiver canônica)."""
+    return _unit_key_superlogica(normalize_superlogica(u))
+
+
+# ------------------ BRCondomínios ------------------
+# Antigo: BL I 05 / BL I 106
+BR_OLD_UNIT_RE = re.compile(r"^(BL)\s+([A-ZIVX]+)\s+(\d{1,3})\b", re.I)
+# Novo: AR1001 / BA102 / BALI1004 (com ou sem espaço)
+BR_NEW_UNIT_RE = re.compile(r"\b([A-Z]{1,10})\s*(\d{1,6})\b")
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _normalize_brcondominios(u: str) -> str:
+    s = u.upper().strip()
+    s = s.replace("\u00A0", " ")
+    s = _WS_TAB_RE.sub(" ", s).strip()
+
+    m = BR_OLD_UNIT_RE.match(s)
+    if m:
+        bl, bloco, num = m.group(1).upper(), m.group(2).upper(), m.group(3)
+        if len(num) == 1:
+            num = "0" + num
+        return f"{bl} {bloco} {num}"
+
+    m2 = BR_NEW_UNIT_RE.search(s)
+    if m2:
+        return f"{m2.group(1).upper()}{m2.group(2)}"
+
+    return s
+
+
+def normalize_brcondominios(u: str) -> str:
+    return _normalize_brcondominios(u or "")
+
+
+_BR_CANON_OLD_RE = re.compile(r"^BL ([A-Z]+) (\d+)$")
+_BR_CANON_NEW_RE = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _unit_key_brcondominios(canon: str) -> UnitKey:
+    m = _BR_CANON_OLD_RE.match(canon) or _BR_CANON_NEW_RE.match(canon)
+    if not m:
+        return UnitKey()
+    return UnitKey(bloco=m.group(1), ap=_strip_zeros(m.group(2)))
+
+
+def unit_key_brcondominios(u: str) -> UnitKey:
+    return _unit_key_brcondominios(normalize_brcondominios(u))
+
+
+def memo_info() -> dict:
+    return {
+        "superlogica": _normalize_superlogica.cache_info()._asdict(),
+        "brcondominios": _normalize_brcondominios.cache_info()._asdict(),
+    }
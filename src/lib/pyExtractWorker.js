@@ -0,0 +1,156 @@
+const os = require("os");
+const path = require("path");
+const readline = require("readline");
+const { spawn } = require("child_process");
+
+/**
+ * Worker Python persistente (scripts/extract_worker.py --serve).
+ * Um único supervisor atende todos os uploads com um pool pré-forkado
+ * (PY_WORKERS processos, reciclados por PY_WORKER_MAX_JOBS / PY_WORKER_MAX_RSS_MB);
+ * cada job leva um id e a resposta (uma linha JSON no stdout) é casada pelo mesmo id.
+ * PDFs em Buffer vão no próprio stdin (tamanhos em "bodies", bytes logo após a linha),
+ * sem passar por arquivo temporário.
+ * Cada job falha sozinho após PY_WORKER_TIMEOUT_MS (padrão 300000) sem resposta;
+ * em jobs com stream o prazo recomeça a cada contato recebido.
+ */
+let py = null;
+let seq = 0;
+const pending = new Map();
+
+function pythonBin() {
+  return process.env.PYTHON_BIN || path.resolve(process.cwd(), ".venv", "bin", "python");
+}
+
+function timeoutMs() {
+  return Number(process.env.PY_WORKER_TIMEOUT_MS) || 300000;
+}
+
+function failAll(err) {
+  for (const { reject, timer } of pending.values()) {
+    clearTimeout(timer);
+    reject(err);
+  }
+  pending.clear();
+}
+
+// resposta que chegar depois do prazo é ignorada (o id já saiu de pending)
+function arm(id) {
+  const job = pending.get(id);
+  if (!job) return;
+  clearTimeout(job.timer);
+  job.timer = setTimeout(() => {
+    pending.delete(id);
+    job.reject(new Error(`Worker Python não respondeu em ${timeoutMs()} ms`));
+  }, timeoutMs());
+}
+
+function workerArgs() {
+  return [
+    "scripts/extract_worker.py",
+    "--serve",
+    "--workers", String(process.env.PY_WORKERS || os.cpus().length),
+    "--max-jobs", String(process.env.PY_WORKER_MAX_JOBS || 200),
+    "--max-rss-mb", String(process.env.PY_WORKER_MAX_RSS_MB || 1024),
+  ];
+}
+
+function start() {
+  const proc = spawn(pythonBin(), workerArgs(), {
+    stdio: ["pipe", "pipe", "pipe"],
+  });
+
+  let err = "";
+  proc.stderr.on("data", (d) => {
+    err = (err + d.toString("utf-8")).slice(-4000);
+  });
+
+  readline.createInterface({ input: proc.stdout }).on("line", (line) => {
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch {
+      console.error("Worker Python retornou linha inválida:", line.slice(0, 200));
+      return;
+    }
+
+    const job = pending.get(msg.id);
+    if (!job) return;
+
+    // job em stream: linhas parciais com um contato cada, até a resposta final
+    if (msg.item !== undefined) {
+      arm(msg.id);
+      if (job.onItem) job.onItem(msg.item);
+      return;
+    }
+    clearTimeout(job.timer);
+    pending.delete(msg.id);
+
+    if (msg.ok) job.resolve(msg.result);
+    else job.reject(new Error(msg.erro || "Falha no worker Python"));
+  });
+
+  proc.on("error", (e) => {
+    console.error("Python spawn error:", e);
+    if (py === proc) py = null;
+    failAll(e);
+  });
+
+  // worker morto ou que não subiu: EPIPE / ERR_STREAM_DESTROYED no write, que
+  // sem handler derrubaria o servidor; o próximo send sobe outro processo
+  proc.stdin.on("error", (e) => {
+    console.error("Python stdin error:", e);
+    if (py === proc) py = null;
+    failAll(e);
+  });
+
+  proc.on("close", (code) => {
+    if (py === proc) py = null;
+    failAll(new Error(err || `Python exit ${code}`));
+  });
+
+  return proc;
+}
+
+function send(job, bodies = [], onItem = null) {
+  if (!py) py = start();
+  const proc = py;
+
+  return new Promise((resolve, reject) => {
+    const id = String(++seq);
+    pending.set(id, { resolve, reject, onItem, timer: null });
+    arm(id);
+    const msg = bodies.length ? { ...job, id, bodies: bodies.map((b) => b.length) } : { ...job, id };
+    // writes síncronos em sequência: a linha e os corpos não se intercalam com outro job
+    proc.stdin.write(JSON.stringify(msg) + "\n");
+    for (const b of bodies) proc.stdin.write(b);
+  });
+}
+
+function wire(args) {
+  return {
+    args: args.map((a) => (Buffer.isBuffer(a) ? "-" : a)),
+    bodies: args.filter((a) => Buffer.isBuffer(a)),
+  };
+}
+
+/** args: caminhos de arquivo ou Buffers com o PDF (enviados pelo stdin). */
+function runExtractor(vendor, args) {
+  const w = wire(args);
+  return send({ vendor, args: w.args }, w.bodies);
+}
+
+/**
+ * Igual a runExtractor, mas cada contato casado chega em onItem assim que o
+ * parser o encontra; a promise resolve com o restante (layouts/totais, sem data).
+ */
+function runExtractorStream(vendor, args, onItem) {
+  const w = wire(args);
+  return send({ vendor, args: w.args, stream: true }, w.bodies, onItem);
+}
+
+/** Estado do pool: workers, ocupados, fila, processados, reciclados. */
+function workerStats() {
+  return send({ op: "stats" });
+}
+
+module.exports = { runExtractor, runExtractorStream, workerStats };
@@ -1,42 +1,10 @@
 const express = require("express");
 const multer = require("multer");
-const fs = require("fs");
-const { spawn } = require("child_process");
+const { runExtractor, runExtractorStream } = require("../lib/pyExtractWorker");
 
 const router = express.Router();
-const upload = multer({ dest: "uploads/" });
-
-function runPython(contatosPath, inadPath) {
-  return new Promise((resolve, reject) => {
-    const pyBin = process.env.PYTHON_BIN || "/app/.venv/bin/python";
-
-    const py = spawn(pyBin, [
-      "scripts/superlogica_extract.py",
-      contatosPath,
-      inadPath,
-    ], { stdio: ["ignore", "pipe", "pipe"] });
-
-    py.on("error", (e) => {
-      console.error("Python spawn error:", e);
-    });
-
-
-    let out = "";
-    let err = "";
-
-    py.stdout.on("data", (d) => (out += d.toString("utf-8")));
-    py.stderr.on("data", (d) => (err += d.toString("utf-8")));
-
-    py.on("close", (code) => {
-      if (code !== 0) return reject(new Error(err || `Python exit ${code}`));
-      try {
-        resolve(JSON.parse(out.trim()));
-      } catch {
-        reject(new Error("Python não retornou JSON válido (stdout)."));
-      }
-    });
-  });
-}
+// PDFs ficam em memória e vão direto para o worker (sem uploads/)
+const upload = multer({ storage: multer.memoryStorage() });
 
 router.post(
   "/analisar",
@@ -54,14 +22,29 @@ router.post(
       });
     }
 
+    const pdfs = [contatosFile.buffer, inadFile.buffer];
+
+    // ?formato=ndjson: um contato por linha conforme sai do parser, e no fim { fim, layouts, totais }
+    if (req.query.formato === "ndjson") {
+      res.type("application/x-ndjson");
+      try {
+        const tail = await runExtractorStream("superlogica", pdfs, (item) => {
+          res.write(JSON.stringify(item) + "\n");
+        });
+        return res.end(JSON.stringify({ fim: true, ...tail }) + "\n");
+      } catch (e) {
+        if (!res.headersSent) {
+          return res.status(500).json({ erro: "Falha ao extrair", detalhes: e.message });
+        }
+        return res.end(JSON.stringify({ fim: true, erro: "Falha ao extrair", detalhes: e.message }) + "\n");
+      }
+    }
+
     try {
-      const result = await runPython(contatosFile.path, inadFile.path);
+      const result = await runExtractor("superlogica", pdfs);
       return res.json(result);
     } catch (e) {
       return res.status(500).json({ erro: "Falha ao extrair", detalhes: e.message });
-    } finally {
-      try { fs.unlinkSync(contatosFile.path); } catch { }
-      try { fs.unlinkSync(inadFile.path); } catch { }
     }
   }
 );